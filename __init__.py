@@ -20,77 +20,450 @@ bl_info = {
     'version_txt': 'version.txt'
 }
 
+import time
+
+_IMPORT_START = time.perf_counter()
+
+import json
+import logging
 import math
+import os
+import sys
+from contextlib import contextmanager
 import bpy
+import bmesh
 import mathutils
-import os
-import urllib.request
+from bpy.app.handlers import persistent
+
+# Heavy modules (numpy, and urllib/http/ssl for the updater) are imported on first use
+# so that loading the add-on in the many background Blender processes stays cheap.
+
+class _LazyModule:
+    """Placeholder for a module that is imported on first attribute access.
+
+    On first use the real module replaces the placeholder in this module's globals,
+    so later lookups cost nothing extra.
+    """
+
+    def __init__(self, module_name, alias):
+        self._module_name = module_name
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        import importlib
+        module = importlib.import_module(self._module_name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+np = _LazyModule("numpy", "np")
+
+# ------------------ Logging and Timing ------------------
+
+logger = logging.getLogger("quick_gun_setup")
+logger.propagate = False
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("QGS %(levelname)s: %(message)s"))
+    logger.addHandler(_log_handler)
+logger.setLevel(logging.WARNING)
+
+# Environment overrides for headless runs where add-on preferences are not saved.
+LOG_LEVEL_ENV = "QGS_LOG_LEVEL"
+TIMING_LOG_ENV = "QGS_TIMING_LOG"
+LOG_LEVELS = {
+    'ERROR': logging.ERROR,
+    'WARNING': logging.WARNING,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+}
+
+def get_addon_preferences():
+    """Return this add-on's preferences, or None when run as a plain script."""
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
 
-# Global URLs for the updater
-REMOTE_INIT_URL = "https://raw.githubusercontent.com/ItsALiving/Test/main/__init__.py"
-REMOTE_VERSION_URL = "https://raw.githubusercontent.com/ItsALiving/Test/main/version.txt"
+def apply_log_level(level=None):
+    """Set the logger level from the argument, the environment or the add-on preferences."""
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV)
+    if level is None:
+        prefs = get_addon_preferences()
+        level = prefs.log_level if prefs else 'WARNING'
+    level = level.strip().upper()
+    if level == 'OFF':
+        logger.setLevel(logging.CRITICAL + 1)
+    elif level in LOG_LEVELS:
+        logger.setLevel(LOG_LEVELS[level])
+    else:
+        logger.setLevel(logging.WARNING)
+        logger.warning("Unknown log level '%s'; using WARNING.", level)
+
+def get_timing_log_path():
+    path = os.environ.get(TIMING_LOG_ENV)
+    if not path:
+        prefs = get_addon_preferences()
+        path = bpy.path.abspath(prefs.timing_log_path) if prefs and prefs.timing_log_path else ""
+    return path
+
+class OperatorTimer:
+    """Per-stage wall-clock timings of one operator run.
+
+    Usage:
+        timer = OperatorTimer("object.armature_and_vertex_groups")
+        with timer.stage("origin"):
+            ...
+        timer.finish()
+
+    finish() logs the timings at DEBUG level and, when a timing log path is set in the
+    preferences (or QGS_TIMING_LOG), appends them as one JSON line.
+    """
+
+    def __init__(self, operator_name):
+        self.operator_name = operator_name
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, status='FINISHED'):
+        record = {
+            "operator": self.operator_name,
+            "status": status,
+            "timestamp": time.time(),
+            "total": time.perf_counter() - self._start,
+            "stages": self.stages,
+        }
+        if logger.isEnabledFor(logging.DEBUG):
+            stage_text = ", ".join(f"{name}={seconds * 1000.0:.1f}ms" for name, seconds in self.stages.items())
+            logger.debug("%s %s in %.1fms (%s)", self.operator_name, status, record["total"] * 1000.0, stage_text)
+        path = get_timing_log_path()
+        if path:
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.warning("Could not write timing log '%s': %s", path, e)
+        return record
 
 # ------------------ Online Updater Operators ------------------
 
+UPDATE_URL_ENV = "QGS_UPDATE_URL"
+UPDATE_CHECK_TIMEOUT = 10.0  # seconds
+UPDATE_CHECK_TTL = 6 * 60 * 60  # seconds a cached check result stays valid
+UPDATE_CACHE_FILE = "update_cache.json"
+
+# Result of the last background check, shown in the panel.
+update_status = {"state": 'IDLE', "remote_version": None, "message": ""}
+_update_check_thread = None
+_update_check_results = None
+
+def get_update_base_url():
+    """Base URL the updater reads from: preferences, then QGS_UPDATE_URL, then GitHub."""
+    prefs = get_addon_preferences()
+    url = prefs.update_url if prefs and prefs.update_url else os.environ.get(UPDATE_URL_ENV, "")
+    return url or bl_info["github_raw_url"]
+
+def remote_url(filename, base_url=None):
+    return (base_url or get_update_base_url()).rstrip("/") + "/" + filename
+
+def get_update_cache_path():
+    config_dir = bpy.utils.user_resource('CONFIG', path="quick_gun_setup", create=True)
+    return os.path.join(config_dir, UPDATE_CACHE_FILE)
+
+def parse_version(text):
+    """Turn '0.8.7' into (0, 8, 7)."""
+    return tuple(map(int, text.strip().split(".")))
+
+def _read_update_cache(cache_path):
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_update_cache(cache_path, cache):
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write update cache '%s': %s", cache_path, e)
+
+def fetch_remote_version(url, cache_path, timeout=UPDATE_CHECK_TIMEOUT, ttl=UPDATE_CHECK_TTL, force=False):
+    """Return (version string, source) for the version file at url.
+
+    source is 'cache' when a fresh cached answer was reused without any request,
+    'not-modified' when the server answered 304 to the conditional request, and
+    'network' when the body was downloaded. Safe to call from a worker thread.
+    """
+    import urllib.error
+    import urllib.request
+
+    cache = _read_update_cache(cache_path)
+    if cache.get("url") != url:
+        cache = {}
+    now = time.time()
+    if not force and cache.get("version") and now - cache.get("checked_at", 0.0) < ttl:
+        return cache["version"], 'cache'
+
+    headers = {}
+    if cache.get("version"):
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            version = response.read().decode("utf-8").strip()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        source = 'network'
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not cache.get("version"):
+            raise
+        version = cache["version"]
+        etag = e.headers.get("ETag") or cache.get("etag")
+        last_modified = e.headers.get("Last-Modified") or cache.get("last_modified")
+        source = 'not-modified'
+
+    _write_update_cache(cache_path, {
+        "url": url,
+        "version": version,
+        "etag": etag,
+        "last_modified": last_modified,
+        "checked_at": now,
+    })
+    return version, source
+
+def _update_check_worker(url, cache_path, force):
+    try:
+        version, source = fetch_remote_version(url, cache_path, force=force)
+        _update_check_results.put((version, source, None))
+    except Exception as e:
+        _update_check_results.put((None, None, e))
+
+def _poll_update_check():
+    """Timer callback: hand the worker's result to the UI once it is available."""
+    import queue
+
+    try:
+        version, source, error = _update_check_results.get_nowait()
+    except queue.Empty:
+        return 0.25
+
+    local_version = bl_info.get("version", (0, 0, 0))
+    if error is not None:
+        update_status.update(state='ERROR', remote_version=None, message=f"Failed to fetch remote version: {error}")
+    else:
+        try:
+            remote_version = parse_version(version)
+        except ValueError as e:
+            update_status.update(state='ERROR', remote_version=None, message=f"Invalid version format in remote version file: {e}")
+        else:
+            if remote_version > local_version:
+                update_status.update(
+                    state='AVAILABLE',
+                    remote_version=remote_version,
+                    message=f"Update available: {version} (Local: {'.'.join(map(str, local_version))})",
+                )
+            else:
+                update_status.update(state='CURRENT', remote_version=remote_version, message="No update available.")
+    logger.info("Update check (%s): %s", source or "failed", update_status["message"])
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return None
+
 class CheckForUpdateOperator(bpy.types.Operator):
-    """Check remote version and report if an update is available."""
+    """Check remote version in the background and report if an update is available."""
     bl_idname = "addon.check_for_update"
     bl_label = "Check for Update"
 
+    force: bpy.props.BoolProperty(
+        name="Force",
+        description="Ignore the cached result and ask the server again",
+        default=False
+    )
+
     def execute(self, context):
-        try:
-            with urllib.request.urlopen(REMOTE_VERSION_URL) as response:
-                remote_version_str = response.read().decode("utf-8").strip()
-        except Exception as e:
-            self.report({'ERROR'}, f"Failed to fetch remote version: {e}")
-            return {'CANCELLED'}
+        import queue
+        import threading
 
-        try:
-            # Assume version.txt is in the format: 0.8.7
-            remote_version = tuple(map(int, remote_version_str.split(".")))
-        except Exception as e:
-            self.report({'ERROR'}, f"Invalid version format in remote version file: {e}")
+        global _update_check_thread, _update_check_results
+        if _update_check_thread is not None and _update_check_thread.is_alive():
+            self.report({'INFO'}, "Update check already running.")
             return {'CANCELLED'}
 
-        local_version = bl_info.get("version", (0, 0, 0))
-        if remote_version > local_version:
-            self.report({'INFO'}, f"Update available: {remote_version_str} (Local: {'.'.join(map(str, local_version))})")
-        else:
-            self.report({'INFO'}, "No update available.")
+        url = remote_url(bl_info["version_txt"])
+        if _update_check_results is None:
+            _update_check_results = queue.Queue()
+        _update_check_thread = threading.Thread(
+            target=_update_check_worker,
+            args=(url, get_update_cache_path(), self.force),
+            daemon=True,
+        )
+        update_status.update(state='CHECKING', message="Checking for updates...")
+        _update_check_thread.start()
+        if not bpy.app.timers.is_registered(_poll_update_check):
+            bpy.app.timers.register(_poll_update_check, first_interval=0.1)
+        self.report({'INFO'}, "Checking for updates in the background.")
         return {'FINISHED'}
 
-class UpdateNowOperator(bpy.types.Operator):
-    """Download the latest __init__.py, overwrite the current file, and update the version number."""
-    bl_idname = "addon.update_now"
-    bl_label = "Update Now"
+UPDATE_DOWNLOAD_TIMEOUT = 30.0  # seconds per socket operation
+UPDATE_CHECKSUM_SUFFIX = ".sha256"
+UPDATE_CHUNK_SIZE = 64 * 1024
 
-    def execute(self, context):
+def file_sha256(path):
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPDATE_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class UpdateConnection:
+    """One keep-alive HTTP(S) connection to the update server, reused for every file.
+
+    Honors the standard proxy environment variables.
+    """
+
+    def __init__(self, base_url, timeout=UPDATE_DOWNLOAD_TIMEOUT):
+        import http.client
+        import urllib.parse
+        import urllib.request
+
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in {"http", "https"}:
+            raise ValueError(f"Unsupported update URL scheme: '{parts.scheme}'")
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.base_path = parts.path.rstrip("/")
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        proxy = urllib.request.getproxies().get(parts.scheme)
+        self._absolute_paths = False
+        if proxy and not urllib.request.proxy_bypass(parts.hostname or ""):
+            proxy_netloc = urllib.parse.urlsplit(proxy).netloc or proxy
+            if parts.scheme == "https":
+                self.connection = connection_class(proxy_netloc, timeout=timeout)
+                self.connection.set_tunnel(parts.netloc)
+            else:
+                self.connection = connection_class(proxy_netloc, timeout=timeout)
+                self._absolute_paths = True
+        else:
+            self.connection = connection_class(parts.netloc, timeout=timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, filename):
+        """Send a GET for filename and return the response (status already checked)."""
+        path = f"{self.base_path}/{filename}"
+        if self._absolute_paths:
+            path = f"{self.scheme}://{self.netloc}{path}"
+        self.connection.request("GET", path, headers={"Connection": "keep-alive", "User-Agent": "QuickGunSetup-Updater"})
+        response = self.connection.getresponse()
+        if response.status != 200:
+            response.read()
+            raise OSError(f"HTTP {response.status} {response.reason} for {filename}")
+        return response
+
+    def read_text(self, filename):
+        return self.get(filename).read().decode("utf-8").strip()
+
+    def download(self, filename, target_path):
+        """Stream filename to target_path and return its SHA-256 hex digest."""
+        import hashlib
+
+        digest = hashlib.sha256()
+        response = self.get(filename)
+        with open(target_path, "wb") as f:
+            while True:
+                chunk = response.read(UPDATE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+        return digest.hexdigest()
+
+def install_update(base_url, target_path, filename="__init__.py", version_file="version.txt"):
+    """Fetch the published version and checksum, then install filename over target_path.
+
+    The payload is streamed to a temporary file next to target_path, checked against
+    the published '<filename>.sha256' and moved into place with os.replace(), so an
+    interrupted update never leaves a half-written add-on. Nothing is downloaded when
+    the local file already matches the checksum. A missing or empty checksum file is an
+    error: nothing is installed. tools/publish_checksum.py writes the checksum file.
+    Returns (remote version tuple, 'UP_TO_DATE' or 'UPDATED').
+    """
+    import shutil
+    import tempfile
+
+    with UpdateConnection(base_url) as connection:
+        remote_version = parse_version(connection.read_text(version_file))
         try:
-            with urllib.request.urlopen(REMOTE_INIT_URL) as response:
-                new_code = response.read().decode("utf-8")
-        except Exception as e:
-            self.report({'ERROR'}, f"Failed to fetch update: {e}")
-            return {'CANCELLED'}
+            published = connection.read_text(filename + UPDATE_CHECKSUM_SUFFIX).split()[0].lower()
+        except (OSError, IndexError) as e:
+            raise ValueError(
+                f"No checksum published for {filename} ({e}); refusing to install an unverified update"
+            ) from e
+        if len(published) != 64:
+            raise ValueError(f"Malformed checksum file for {filename}")
+
+        if os.path.exists(target_path) and file_sha256(target_path) == published:
+            return remote_version, 'UP_TO_DATE'
 
+        fd, tmp_path = tempfile.mkstemp(prefix=".qgs_update_", dir=os.path.dirname(target_path))
+        os.close(fd)
         try:
-            with urllib.request.urlopen(REMOTE_VERSION_URL) as response:
-                remote_version_str = response.read().decode("utf-8").strip()
-            remote_version = tuple(map(int, remote_version_str.split(".")))
-        except Exception as e:
-            remote_version = None
-            self.report({'WARNING'}, f"Failed to fetch remote version: {e}")
+            downloaded = connection.download(filename, tmp_path)
+            if downloaded != published:
+                raise ValueError(f"Checksum mismatch for {filename}: expected {published}, got {downloaded}")
+            # mkstemp creates the file as 0600; keep the installed add-on's permissions.
+            if os.path.exists(target_path):
+                shutil.copymode(target_path, tmp_path)
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return remote_version, 'UPDATED'
 
-        addon_file = __file__
+class UpdateNowOperator(bpy.types.Operator):
+    """Download the latest __init__.py, verify it against the published SHA-256 and swap it in atomically."""
+    bl_idname = "addon.update_now"
+    bl_label = "Update Now"
+
+    def execute(self, context):
         try:
-            with open(addon_file, "w", encoding="utf-8") as f:
-                f.write(new_code)
+            remote_version, result = install_update(get_update_base_url(), __file__)
         except Exception as e:
-            self.report({'ERROR'}, f"Failed to write update: {e}")
+            self.report({'ERROR'}, f"Failed to update: {e}")
             return {'CANCELLED'}
 
-        if remote_version:
-            bl_info["version"] = remote_version
+        if result == 'UP_TO_DATE':
+            self.report({'INFO'}, "Installed add-on already matches the published version.")
+            return {'FINISHED'}
 
+        bl_info["version"] = remote_version
         self.report(
             {'INFO'},
             f"Update applied to version: {'.'.join(map(str, bl_info['version']))}. Please restart Blender for changes to take effect."
@@ -99,126 +472,580 @@ class UpdateNowOperator(bpy.types.Operator):
 
 # ------------------ Existing Functionality ------------------
 
-def remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True):
-    print("DEBUG: Starting remove_existing_vertex_groups_modifiers_and_armature()...")
+def remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True, purge_orphans=False):
+    """Remove every QGS vertex group, modifier, armature and (optionally) QGS mesh.
 
-    removed_vgroups = 0
-    removed_modifiers = 0
-    removed_QGS_meshes = 0
-    removed_QGS_armature_objs = 0
-    removed_armature_datas = 0
+    Walks bpy.data.objects once and deletes all collected data-blocks with a single
+    bpy.data.batch_remove() call. Returns a dict with the number of removed items.
+    """
+    counts = {
+        "vertex_groups": 0,
+        "modifiers": 0,
+        "armature_objects": 0,
+        "armature_datas": 0,
+        "meshes": 0,
+        "orphans": 0,
+    }
 
-    all_meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
-    for mesh in all_meshes:
-        for group in list(mesh.vertex_groups):
-            if group.name.startswith("QGS_"):
-                try:
-                    mesh.vertex_groups.remove(group)
-                    removed_vgroups += 1
-                    print(f"DEBUG: Removed QGS vertex group '{group.name}' from mesh '{mesh.name}'.")
-                except ReferenceError:
-                    pass
-        for mod in list(mesh.modifiers):
-            if mod.type == 'ARMATURE' and mod.name == "QGS_Armature":
-                try:
-                    mesh.modifiers.remove(mod)
-                    removed_modifiers += 1
-                    print(f"DEBUG: Removed QGS_Armature modifier from mesh '{mesh.name}'.")
-                except ReferenceError:
-                    pass
-
-    QGS_armature_objects = [obj for obj in bpy.data.objects if obj.type == 'ARMATURE' and obj.get("QGS", False)]
-    for arm_obj in QGS_armature_objects:
-        try:
-            for scene in bpy.data.scenes:
-                top_coll = scene.collection
-                if arm_obj.name in top_coll.objects:
-                    top_coll.objects.unlink(top_coll.objects[arm_obj.name])
-            for coll in bpy.data.collections:
-                if arm_obj.name in coll.objects:
-                    coll.objects.unlink(coll.objects[arm_obj.name])
-            if arm_obj.name in bpy.data.objects:
-                bpy.data.objects.remove(bpy.data.objects[arm_obj.name], do_unlink=True)
-                removed_QGS_armature_objs += 1
-                print(f"DEBUG: Removed QGS armature object '{arm_obj.name}'.")
-        except ReferenceError:
-            pass
-
-    QGS_meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH' and obj.get("QGS", False)]
-    if keep_QGS_mesh:
-        for mesh_obj in QGS_meshes:
-            if "QGS" in mesh_obj:
-                del mesh_obj["QGS"]
-                print(f"DEBUG: Removed QGS property from mesh '{mesh_obj.name}' (keeping the object).")
-    else:
-        for mesh_obj in QGS_meshes:
-            try:
-                bpy.data.objects.remove(mesh_obj, do_unlink=True)
-                removed_QGS_meshes += 1
-                print(f"DEBUG: Removed QGS mesh object '{mesh_obj.name}'.")
-            except ReferenceError:
-                pass
+    doomed_objects = []
+    removed_armature_users = {}
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH':
+            changed = False
+            for group in [g for g in obj.vertex_groups if g.name.startswith("QGS_")]:
+                obj.vertex_groups.remove(group)
+                counts["vertex_groups"] += 1
+                changed = True
+            for mod in [m for m in obj.modifiers if m.type == 'ARMATURE' and m.name == "QGS_Armature"]:
+                obj.modifiers.remove(mod)
+                counts["modifiers"] += 1
+                changed = True
+            if obj.get("QGS", False):
+                if keep_QGS_mesh:
+                    del obj["QGS"]
+                    changed = True
+                else:
+                    doomed_objects.append(obj)
+                    counts["meshes"] += 1
+                    continue
+            if changed:
+                qgs_change_index.refresh_object(obj)
+        elif obj.type == 'ARMATURE' and obj.get("QGS", False):
+            doomed_objects.append(obj)
+            counts["armature_objects"] += 1
+            if obj.data is not None:
+                key = obj.data.session_uid
+                removed_armature_users[key] = removed_armature_users.get(key, 0) + 1
 
-    for arm_data in list(bpy.data.armatures):
-        if arm_data.name.startswith("QGS_"):
-            try:
-                if arm_data.users == 0:
-                    bpy.data.armatures.remove(arm_data, do_unlink=True)
-                    removed_armature_datas += 1
-                    print(f"DEBUG: Removed QGS armature data block '{arm_data.name}'.")
-            except ReferenceError:
-                pass
-
-    print("DEBUG: Finished removing QGS items. Totals:")
-    print(f"       QGS Vertex Groups removed: {removed_vgroups}")
-    print(f"       QGS Armature Modifiers removed: {removed_modifiers}")
-    print(f"       QGS Armature Objects removed: {removed_QGS_armature_objs}")
-    print(f"       QGS Armature Data blocks removed: {removed_armature_datas}")
-    print(f"       QGS Mesh Objects removed: {removed_QGS_meshes} (only if keep_QGS_mesh=False)")
+    # Armature data-blocks left without users once the doomed objects are gone.
+    doomed_armatures = [
+        arm_data for arm_data in bpy.data.armatures
+        if arm_data.name.startswith("QGS_")
+        and arm_data.users - removed_armature_users.get(arm_data.session_uid, 0) == 0
+    ]
+    counts["armature_datas"] = len(doomed_armatures)
 
-def count_QGS_changes():
-    total_changes = 0
-    for obj in bpy.data.objects:
-        if obj.get("QGS", False):
-            total_changes += 1
-    for obj in bpy.data.objects:
+    for obj in doomed_objects:
+        qgs_change_index.discard_object(obj)
+    for arm_data in doomed_armatures:
+        qgs_change_index.discard_armature_data(arm_data)
+    if doomed_objects or doomed_armatures:
+        bpy.data.batch_remove(doomed_objects + doomed_armatures)
+
+    if purge_orphans:
+        counts["orphans"] = bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=False, do_recursive=True)
+        qgs_change_index.mark_dirty()
+    return counts
+
+# ------------------ QGS Change Index ------------------
+
+class QGSChangeIndex:
+    """Registry of every item the add-on owns in the current file.
+
+    Built once per file load and then kept up to date by the add-on's own operators
+    and the depsgraph handler, so reading the change count is O(1).
+    Each object entry is (name, QGS flag, QGS vertex group count, QGS_Armature modifier count).
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self._armature_datas = {}
+        self._total = 0
+        self._object_len = 0
+        self._armature_len = 0
+        self._dirty = True
+
+    @staticmethod
+    def _scan_object(obj):
+        flagged = bool(obj.get("QGS", False))
+        vgroups = 0
+        modifiers = 0
         if obj.type == 'MESH':
-            for group in obj.vertex_groups:
-                if group.name.startswith("QGS_"):
-                    total_changes += 1
-            for mod in obj.modifiers:
-                if mod.type == 'ARMATURE' and mod.name == "QGS_Armature":
-                    total_changes += 1
-    for arm_data in bpy.data.armatures:
+            vgroups = sum(1 for group in obj.vertex_groups if group.name.startswith("QGS_"))
+            modifiers = sum(1 for mod in obj.modifiers if mod.type == 'ARMATURE' and mod.name == "QGS_Armature")
+        return obj.name, flagged, vgroups, modifiers
+
+    @staticmethod
+    def _weight(entry):
+        return int(entry[1]) + entry[2] + entry[3]
+
+    def mark_dirty(self):
+        """Force a full rebuild on the next read."""
+        self._dirty = True
+
+    def rebuild(self):
+        """Scan bpy.data once and replace the whole index."""
+        self._objects.clear()
+        self._armature_datas.clear()
+        self._total = 0
+        for obj in bpy.data.objects:
+            entry = self._scan_object(obj)
+            weight = self._weight(entry)
+            if weight:
+                self._objects[obj.session_uid] = entry
+                self._total += weight
+        for arm_data in bpy.data.armatures:
+            if arm_data.name.startswith("QGS_"):
+                self._armature_datas[arm_data.session_uid] = arm_data.name
+                self._total += 1
+        self._object_len = len(bpy.data.objects)
+        self._armature_len = len(bpy.data.armatures)
+        self._dirty = False
+
+    def _ensure(self):
+        if self._dirty:
+            self.rebuild()
+
+    def refresh_object(self, obj):
+        """Re-evaluate a single object after it was created or changed."""
+        if self._dirty:
+            return
+        key = obj.session_uid
+        old = self._objects.pop(key, None)
+        if old is not None:
+            self._total -= self._weight(old)
+        entry = self._scan_object(obj)
+        weight = self._weight(entry)
+        if weight:
+            self._objects[key] = entry
+            self._total += weight
+        self._object_len = len(bpy.data.objects)
+
+    def discard_object(self, obj):
+        """Forget an object that is about to be removed."""
+        if self._dirty:
+            return
+        old = self._objects.pop(obj.session_uid, None)
+        if old is not None:
+            self._total -= self._weight(old)
+        self._object_len -= 1
+
+    def refresh_armature_data(self, arm_data):
+        """Re-evaluate a single armature data-block after it was created or renamed."""
+        if self._dirty:
+            return
+        key = arm_data.session_uid
+        if self._armature_datas.pop(key, None) is not None:
+            self._total -= 1
         if arm_data.name.startswith("QGS_"):
-            total_changes += 1
-    return total_changes
+            self._armature_datas[key] = arm_data.name
+            self._total += 1
+        self._armature_len = len(bpy.data.armatures)
 
-def set_origin_to_center_of_mass():
-    selected_objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+    def discard_armature_data(self, arm_data):
+        """Forget an armature data-block that is about to be removed."""
+        if self._dirty:
+            return
+        if self._armature_datas.pop(arm_data.session_uid, None) is not None:
+            self._total -= 1
+        self._armature_len -= 1
+
+    def sync_depsgraph(self, depsgraph):
+        """Apply the object and armature updates reported by a depsgraph evaluation."""
+        if self._dirty:
+            return
+        if len(bpy.data.objects) != self._object_len or len(bpy.data.armatures) != self._armature_len:
+            # Something was added or deleted outside the add-on; cheaper to rescan once.
+            self._dirty = True
+            return
+        for update in depsgraph.updates:
+            id_orig = update.id.original
+            if isinstance(id_orig, bpy.types.Object):
+                self.refresh_object(id_orig)
+            elif isinstance(id_orig, bpy.types.Armature):
+                self.refresh_armature_data(id_orig)
+
+    def count(self):
+        """Total number of QGS changes, as shown in the panel."""
+        self._ensure()
+        return self._total
+
+    def contains(self, obj):
+        """True if obj carries the QGS flag, a QGS vertex group or a QGS_Armature modifier."""
+        self._ensure()
+        return obj.session_uid in self._objects
+
+    def objects(self, flagged_only=False):
+        """Return the live QGS-owned objects."""
+        self._ensure()
+        # Entries are keyed by session_uid; names go stale when an object is renamed.
+        live = {obj.session_uid: obj for obj in bpy.data.objects}
+        result = []
+        for key, (name, flagged, vgroups, modifiers) in self._objects.items():
+            if flagged_only and not flagged:
+                continue
+            obj = live.get(key)
+            if obj is not None:
+                result.append(obj)
+        return result
+
+    def armature_datas(self):
+        """Return the live QGS armature data-blocks."""
+        self._ensure()
+        live = {arm.session_uid: arm for arm in bpy.data.armatures}
+        return [live[key] for key in self._armature_datas if key in live]
+
+qgs_change_index = QGSChangeIndex()
+
+def count_QGS_changes():
+    return qgs_change_index.count()
+
+def mesh_centers_of_mass(meshes):
+    """Surface center of mass of each mesh in local space, as an (n, 3) array.
+
+    Matches origin_set(type='ORIGIN_CENTER_OF_MASS'): polygons are fan-triangulated,
+    triangle centroids are weighted by their area signed against the polygon normal,
+    and degenerate input falls back to the vertex median. Meshes without faces get zero.
+    """
+    centers = np.zeros((len(meshes), 3), dtype=np.float64)
+    if not meshes:
+        return centers
+
+    co_parts, loop_parts, start_parts, total_parts, normal_parts = [], [], [], [], []
+    vert_offset = 0
+    loop_offset = 0
+    face_counts = np.empty(len(meshes), dtype=np.int64)
+    vert_counts = np.empty(len(meshes), dtype=np.int64)
+    for i, mesh in enumerate(meshes):
+        v_count, l_count, f_count = len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+        co = np.empty(v_count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        loop_vert = np.empty(l_count, dtype=np.int64)
+        mesh.loops.foreach_get("vertex_index", loop_vert)
+        loop_start = np.empty(f_count, dtype=np.int64)
+        mesh.polygons.foreach_get("loop_start", loop_start)
+        loop_total = np.empty(f_count, dtype=np.int64)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        normals = np.empty(f_count * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", normals)
+        co_parts.append(co.reshape(-1, 3))
+        loop_parts.append(loop_vert + vert_offset)
+        start_parts.append(loop_start + loop_offset)
+        total_parts.append(loop_total)
+        normal_parts.append(normals.reshape(-1, 3))
+        vert_offset += v_count
+        loop_offset += l_count
+        face_counts[i] = f_count
+        vert_counts[i] = v_count
+
+    co = np.concatenate(co_parts).astype(np.float64)
+    loop_vert = np.concatenate(loop_parts)
+    loop_start = np.concatenate(start_parts)
+    loop_total = np.concatenate(total_parts)
+    normals = np.concatenate(normal_parts).astype(np.float64)
+    face_mesh = np.repeat(np.arange(len(meshes)), face_counts)
+    vert_mesh = np.repeat(np.arange(len(meshes)), vert_counts)
+
+    # Fan triangles (v0, vk, vk+1) of every polygon, all meshes at once.
+    tri_counts = np.maximum(loop_total - 2, 0)
+    tri_face = np.repeat(np.arange(len(loop_start)), tri_counts)
+    tri_step = np.arange(len(tri_face)) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+    first = loop_start[tri_face]
+    p1 = co[loop_vert[first]]
+    p2 = co[loop_vert[first + 1 + tri_step]]
+    p3 = co[loop_vert[first + 2 + tri_step]]
+    cross = np.cross(p2 - p1, p3 - p1)
+    area = 0.5 * np.linalg.norm(cross, axis=1)
+    area = np.where(np.einsum('ij,ij->i', cross, normals[tri_face]) < 0.0, -area, area)
+    weighted = (p1 + p2 + p3) / 3.0 * area[:, None]
+
+    n_faces = len(loop_start)
+    face_area = np.bincount(tri_face, weights=area, minlength=n_faces)
+    tri_mesh = face_mesh[tri_face]
+    mesh_area = np.bincount(tri_mesh, weights=area, minlength=len(meshes))
+    for axis in range(3):
+        centers[:, axis] = np.bincount(tri_mesh, weights=weighted[:, axis], minlength=len(meshes))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centers /= mesh_area[:, None]
+
+    # Blender divides per polygon first, so a single zero-area polygon poisons the sum.
+    degenerate = np.bincount(face_mesh[face_area == 0.0], minlength=len(meshes)) > 0
+    degenerate |= ~np.all(np.isfinite(centers), axis=1)
+    degenerate &= face_counts > 0
+    if degenerate.any():
+        vert_sum = np.zeros((len(meshes), 3), dtype=np.float64)
+        for axis in range(3):
+            vert_sum[:, axis] = np.bincount(vert_mesh, weights=co[:, axis], minlength=len(meshes))
+        median = vert_sum / np.maximum(vert_counts, 1)[:, None]
+        centers[degenerate] = median[degenerate]
+    centers[face_counts == 0] = 0.0
+    return centers
+
+def set_origin_to_center_of_mass(objects=None):
+    """Move the origin of each mesh object (default: the selection) to its center of mass."""
+    selected_objects = [obj for obj in (bpy.context.selected_objects if objects is None else objects) if obj.type == 'MESH']
     if not selected_objects:
         bpy.ops.object.dialog_message('INVOKE_DEFAULT', message="No object selected. Please select at least one object.")
         return {'CANCELLED'}
 
-    bpy.context.view_layer.objects.active = selected_objects[0]
-    bpy.ops.object.mode_set(mode='OBJECT')
+    if bpy.context.mode != 'OBJECT':
+        bpy.context.view_layer.objects.active = selected_objects[0]
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Shared meshes are moved once; every selected user is compensated, like origin_set.
+    meshes = list({obj.data.session_uid: obj.data for obj in selected_objects}.values())
+    mesh_slot = {mesh.session_uid: i for i, mesh in enumerate(meshes)}
+    centers = mesh_centers_of_mass(meshes)
 
-    for obj in selected_objects:
-        bpy.context.view_layer.objects.active = obj
-        bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
+    for mesh, center in zip(meshes, centers):
+        if center.any():
+            mesh.transform(mathutils.Matrix.Translation(-mathutils.Vector(center)), shape_keys=True)
+            mesh.update()
 
-    print("✅ Origins set to center of mass.")
+    basis = np.array([np.array(obj.matrix_basis) for obj in selected_objects], dtype=np.float64)
+    obj_centers = centers[[mesh_slot[obj.data.session_uid] for obj in selected_objects]]
+    offsets = np.einsum('nij,nj->ni', basis[:, :3, :3], obj_centers)
+    for obj, offset in zip(selected_objects, offsets):
+        if offset.any():
+            obj.location = obj.location + mathutils.Vector(offset)
+
+    logger.info("Origins set to center of mass.")
     return {'FINISHED'}
 
-def create_armature_and_bones(armature_name, bone_length=0.1):
-    if not armature_name.startswith("QGS_"):
-        armature_name = "QGS_" + armature_name
+def compute_part_principal_axes(objects):
+    """Principal axis and extent of each mesh object in world space, in one NumPy pass.
+
+    Returns (axes, extents): unit vectors of shape (n, 3) along each part's largest
+    variance, and the part's length along that axis. Parts without vertices get a
+    zero extent and a +Z axis.
+    """
+    count = len(objects)
+    if not count:
+        return np.tile(np.array([0.0, 0.0, 1.0]), (count, 1)), np.zeros(count, dtype=np.float64)
+    world, part = part_world_points(objects)
+    return principal_axes(world, part, count)
+
+def part_world_points(objects):
+    """World-space vertex positions of all objects, read in one batch per object.
+
+    Returns (points, part): an (n, 3) array and the index of the owning object per point.
+    """
+    vert_counts = np.array([len(obj.data.vertices) for obj in objects], dtype=np.int64)
+    coords = np.empty((int(vert_counts.sum()), 3), dtype=np.float32)
+    offset = 0
+    for obj, v_count in zip(objects, vert_counts.tolist()):
+        obj.data.vertices.foreach_get("co", coords[offset:offset + v_count].ravel())
+        offset += v_count
+    matrices = np.array([np.array(obj.matrix_world) for obj in objects], dtype=np.float64)
+    part = np.repeat(np.arange(len(objects)), vert_counts)
+
+    world = np.einsum('nij,nj->ni', matrices[part, :3, :3], coords.astype(np.float64)) + matrices[part, :3, 3]
+    return world, part
+
+def principal_axes(points, part, count):
+    """Principal axis and extent of each of count point sets; part labels every point with its set.
+
+    Same conventions as compute_part_principal_axes.
+    """
+    _, axes, lower, upper, has_verts = principal_span(points, part, count)
+    extents = np.zeros(count, dtype=np.float64)
+    extents[has_verts] = upper[has_verts] - lower[has_verts]
+    return axes, extents
+
+def principal_segments(points, part, count, bone_length=0.1):
+    """World-space (heads, tails) of a bone spanning each point set along its principal axis.
+
+    The head sits at the smallest projection onto the axis and the tail at the largest, so
+    the bone covers its part from end to end. Sets that are flat along the axis (or empty)
+    get a bone_length bone starting at their centroid.
+    """
+    means, axes, lower, upper, has_verts = principal_span(points, part, count)
+    spans = has_verts & (upper - lower > 1e-6)
+    lower = np.where(spans, lower, 0.0)
+    upper = np.where(spans, upper, bone_length)
+    return means + axes * lower[:, None], means + axes * upper[:, None]
+
+def principal_span(points, part, count):
+    """Centroid, principal axis and projection range of each of count point sets.
 
+    Returns (means, axes, lower, upper, has_verts); lower and upper are the smallest and
+    largest projections onto the axis relative to the centroid (infinite for empty sets).
+    """
+    axes = np.tile(np.array([0.0, 0.0, 1.0]), (count, 1))
+    vert_counts = np.bincount(part, minlength=count)
+    safe_counts = np.maximum(vert_counts, 1)
+    means = np.stack([np.bincount(part, weights=points[:, i], minlength=count) for i in range(3)], axis=1)
+    means /= safe_counts[:, None]
+    centered = points - means[part]
+
+    covariance = np.empty((count, 3, 3), dtype=np.float64)
+    for i in range(3):
+        for j in range(i, 3):
+            value = np.bincount(part, weights=centered[:, i] * centered[:, j], minlength=count) / safe_counts
+            covariance[:, i, j] = value
+            covariance[:, j, i] = value
+    _, eigenvectors = np.linalg.eigh(covariance)
+    principal = eigenvectors[:, :, 2]
+    # Eigenvectors have no sign; point each one along its dominant positive component.
+    dominant = np.argmax(np.abs(principal), axis=1)
+    signs = np.where(principal[np.arange(count), dominant] < 0.0, -1.0, 1.0)
+    principal *= signs[:, None]
+
+    projection = np.einsum('ij,ij->i', centered, principal[part])
+    upper = np.full(count, -np.inf)
+    lower = np.full(count, np.inf)
+    np.maximum.at(upper, part, projection)
+    np.minimum.at(lower, part, projection)
+    has_verts = vert_counts > 0
+    axes[has_verts] = principal[has_verts]
+    return means, axes, lower, upper, has_verts
+
+# ------------------ Loose Part Detection ------------------
+
+# UV coordinates closer than this count as the same point when splitting by UV island.
+UV_ISLAND_LIMIT = 1e-5
+
+def connected_components(node_count, edges):
+    """Label every node with the smallest node index of its connected component.
+
+    Vectorized union-find over an (n, 2) edge array: each round hooks the larger root of
+    every edge that still joins two components onto the smaller one, then compresses all
+    paths by pointer jumping. Edges inside a finished component drop out after each round.
+    """
+    parent = np.arange(node_count, dtype=np.int32)
+    a = edges[:, 0].astype(np.int32)
+    b = edges[:, 1].astype(np.int32)
+    while len(a):
+        root_a = parent[a]
+        root_b = parent[b]
+        crossing = root_a != root_b
+        if not crossing.any():
+            break
+        a, b, root_a, root_b = a[crossing], b[crossing], root_a[crossing], root_b[crossing]
+        parent[np.maximum(root_a, root_b)] = np.minimum(root_a, root_b)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+def detect_loose_parts(mesh, split_material=False, split_uv=False):
+    """Find the connected parts of mesh without separating it.
+
+    Returns (vertex_parts, part_count): the part index of every vertex, numbered by each
+    part's lowest vertex index. With split_material or split_uv, faces only connect across
+    corners that share the same material or UV coordinates, like separating by material
+    or by UV island; a vertex where such parts touch goes to one of them.
+    """
+    v_count = len(mesh.vertices)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    edge_verts.shape = (-1, 2)
+
+    if split_material or split_uv:
+        node_count, vertex_node, node_edges = _corner_graph(mesh, edge_verts, split_material, split_uv)
+    else:
+        node_count, vertex_node, node_edges = v_count, None, edge_verts
+
+    roots = connected_components(node_count, node_edges)
+    is_root = roots == np.arange(node_count)
+    labels = (np.cumsum(is_root, dtype=np.int32) - 1)[roots]
+    if vertex_node is not None:
+        labels = labels[vertex_node]
+        # Parts that lost every vertex to a neighbour are dropped and the rest renumbered.
+        present, labels = np.unique(labels, return_inverse=True)
+        return labels.astype(np.int32), len(present)
+    return labels, int(is_root.sum())
+
+def _corner_graph(mesh, edge_verts, split_material, split_uv):
+    """Graph whose nodes are distinct (vertex, material, UV) corner keys plus the vertices
+    no face uses; faces link their corners and loose edges link their vertices."""
+    v_count = len(mesh.vertices)
+    l_count = len(mesh.loops)
+    loop_vert = np.empty(l_count, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    loop_edge = np.empty(l_count, dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edge)
+    loop_start = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+
+    # Corners with equal (vertex, material) keys are one node. With only materials the
+    # key space is small enough to number densely; UVs need a sort.
+    material_count = max(len(mesh.materials), 1)
+    corner_key = loop_vert.astype(np.int64) * material_count
+    if split_material and material_count > 1:
+        face_material = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", face_material)
+        corner_key += np.repeat(np.clip(face_material, 0, material_count - 1), loop_total)
+    if split_uv and mesh.uv_layers.active is not None:
+        uv = np.empty(l_count * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", uv)
+        uv = np.round(uv.reshape(-1, 2) / UV_ISLAND_LIMIT).astype(np.int64)
+        keys = (corner_key, uv[:, 0], uv[:, 1])
+        order = np.lexsort(keys[::-1])
+        changed = np.zeros(l_count, dtype=bool)
+        if l_count:
+            changed[0] = True
+        for key in keys:
+            sorted_key = key[order]
+            changed[1:] |= sorted_key[1:] != sorted_key[:-1]
+        corner_node = np.empty(l_count, dtype=np.int32)
+        corner_node[order] = np.cumsum(changed, dtype=np.int32) - 1
+        corner_nodes = int(changed.sum())
+    else:
+        used = np.zeros(v_count * material_count, dtype=bool)
+        used[corner_key] = True
+        numbering = np.cumsum(used, dtype=np.int32) - 1
+        corner_node = numbering[corner_key]
+        corner_nodes = int(numbering[-1]) + 1 if len(numbering) else 0
+
+    # Every vertex is represented by the node of one of its corners (reversed so the first
+    # corner wins); vertices outside faces get nodes of their own.
+    vertex_node = np.full(v_count, -1, dtype=np.int32)
+    vertex_node[loop_vert[::-1]] = corner_node[::-1]
+    faceless = vertex_node < 0
+    vertex_node[faceless] = corner_nodes + np.arange(int(faceless.sum()), dtype=np.int32)
+
+    # Link every corner to its face's first corner (a star keeps union-find trees shallow).
+    first_corner = np.repeat(loop_start, loop_total)
+    loose_edges = np.ones(len(edge_verts), dtype=bool)
+    loose_edges[loop_edge] = False
+    node_edges = np.concatenate((
+        np.stack((corner_node, corner_node[first_corner]), axis=1),
+        vertex_node[edge_verts[loose_edges]],
+    ))
+    return corner_nodes + int(faceless.sum()), vertex_node, node_edges
+
+def create_armature_and_bones(armature_name, bone_length=0.1, placement='ORIGIN'):
     selected_objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
     if not selected_objects:
         bpy.ops.object.dialog_message('INVOKE_DEFAULT', message="No object selected. Please select at least one object.")
         return None
 
+    heads, tails = part_bone_ends(selected_objects, bone_length, placement)
+    bone_names = ["QGS_" + obj.name for obj in selected_objects]
+    armature_obj = build_armature(armature_name, bone_names, heads, tails, bone_length, placement)
+    write_part_map(armature_obj.data, {
+        obj.name: {"bones": [name], "signature": part_signature(obj, 'OBJECTS', placement)}
+        for obj, name in zip(selected_objects, bone_names)
+    })
+    return armature_obj
+
+def part_bone_ends(objects, bone_length=0.1, placement='ORIGIN'):
+    """World-space (heads, tails) of the bone of each whole-object part."""
+    if placement == 'PCA':
+        origins = np.array([obj.matrix_world.translation for obj in objects], dtype=np.float64).reshape(-1, 3)
+        if not len(objects):
+            return origins, origins.copy()
+        world, part = part_world_points(objects)
+        heads, tails = principal_segments(world, part, len(objects), bone_length)
+        # Objects without vertices keep a default bone at their origin.
+        empty = np.bincount(part, minlength=len(objects)) == 0
+        heads[empty] = origins[empty]
+        tails[empty] = origins[empty] + np.array([0.0, 0.0, bone_length])
+    else:
+        heads = np.array([obj.location for obj in objects], dtype=np.float64).reshape(-1, 3)
+        tails = heads + np.array([0.0, 0.0, bone_length])
+    return heads, tails
+
+def build_armature(armature_name, bone_names, heads, tails, bone_length=0.1, placement='ORIGIN'):
+    """Create the QGS armature with one loose bone per name, all added in a single edit session."""
+    if not armature_name.startswith("QGS_"):
+        armature_name = "QGS_" + armature_name
+
     armature = bpy.data.armatures.new(name=armature_name)
     armature_obj = bpy.data.objects.new(name=armature_name, object_data=armature)
     armature_obj["QGS"] = True
@@ -227,41 +1054,452 @@ def create_armature_and_bones(armature_name, bone_length=0.1):
     bpy.context.view_layer.objects.active = armature_obj
     bpy.ops.object.mode_set(mode='EDIT')
 
-    for obj in selected_objects:
-        bone_name = "QGS_" + obj.name
+    for bone_name, head, tail in zip(bone_names, heads.tolist(), tails.tolist()):
         bone = armature.edit_bones.new(bone_name)
-        bone.head = obj.location
-        bone.tail = obj.location + mathutils.Vector((0, 0, bone_length))
+        bone.head = head
+        bone.tail = tail
         bone.use_connect = False
 
     bpy.ops.object.mode_set(mode='OBJECT')
-    print(f"✅ Armature '{armature_name}' created. Bone length = {bone_length}.")
+    qgs_change_index.refresh_armature_data(armature)
+    qgs_change_index.refresh_object(armature_obj)
+    if placement == 'PCA':
+        logger.info("Armature '%s' created. Bones aligned to part principal axes.", armature_name)
+    else:
+        logger.info("Armature '%s' created. Bone length = %s.", armature_name, bone_length)
     return armature_obj
 
-def create_vertex_groups_from_selection():
-    selected_meshes = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+def create_armature_from_loose_parts(armature_name, bone_length=0.1, placement='ORIGIN',
+                                     split_material=False, split_uv=False):
+    """Rig the loose parts of every selected mesh without separating it.
+
+    Each connected part (see detect_loose_parts) gets a bone at its vertex centroid and a
+    vertex group of the same name holding its vertices. Returns the armature object and
+    the number of parts, or (None, 0) when nothing is selected.
+    """
+    selected_objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+    if not selected_objects:
+        return None, 0
+    if any(obj.mode == 'EDIT' for obj in selected_objects):
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    bone_names, heads, tails, assignments = loose_part_bones(
+        selected_objects, bone_length, placement, split_material, split_uv
+    )
+    if not bone_names:
+        return None, 0
+
+    armature_obj = build_armature(armature_name, bone_names, heads, tails, bone_length, placement)
+    assign_loose_part_groups(assignments)
+    part_map = {
+        obj.name: {"bones": [], "signature": part_signature(obj, 'LOOSE', placement, split_material, split_uv)}
+        for obj in selected_objects
+    }
+    for obj, vertex_parts, names in assignments:
+        part_map[obj.name]["bones"] = names
+    write_part_map(armature_obj.data, part_map)
+    logger.info("Rigged %s loose part(s) on %s mesh(es).", len(bone_names), len(assignments))
+    return armature_obj, len(bone_names)
+
+def loose_part_bones(objects, bone_length=0.1, placement='ORIGIN', split_material=False, split_uv=False):
+    """Bones for the loose parts of objects, without creating anything.
+
+    Returns (bone names, world heads, world tails, assignments), where assignments holds
+    (object, vertex part labels, bone names) for every object with at least one part.
+    """
+    bone_names = []
+    head_parts = [np.empty((0, 3))]
+    tail_parts = [np.empty((0, 3))]
+    assignments = []
+    for obj in objects:
+        mesh = obj.data
+        vertex_parts, part_count = detect_loose_parts(mesh, split_material, split_uv)
+        if not part_count:
+            continue
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        world = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        if placement == 'PCA':
+            heads, tails = principal_segments(world, vertex_parts, part_count, bone_length)
+        else:
+            counts = np.maximum(np.bincount(vertex_parts, minlength=part_count), 1)
+            heads = np.stack(
+                [np.bincount(vertex_parts, weights=world[:, i], minlength=part_count) for i in range(3)], axis=1
+            ) / counts[:, None]
+            tails = heads + np.array([0.0, 0.0, bone_length])
+        names = [f"QGS_{obj.name}_Part_{i:03d}" for i in range(part_count)]
+        bone_names += names
+        head_parts.append(heads)
+        tail_parts.append(tails)
+        assignments.append((obj, vertex_parts, names))
+    return bone_names, np.concatenate(head_parts), np.concatenate(tail_parts), assignments
+
+def assign_loose_part_groups(assignments):
+    """Give every loose part a vertex group named after its bone (see loose_part_bones)."""
+    for obj, vertex_parts, names in assignments:
+        order = np.argsort(vertex_parts, kind='stable')
+        bounds = np.cumsum(np.bincount(vertex_parts, minlength=len(names)))
+        for name, indices in zip(names, np.split(order, bounds[:-1])):
+            obj.vertex_groups.new(name=name).add(indices.tolist(), 1.0, 'REPLACE')
+        qgs_change_index.refresh_object(obj)
+
+def create_vertex_groups_from_selection(objects=None):
+    selected_meshes = [obj for obj in (bpy.context.selected_objects if objects is None else objects) if obj.type == 'MESH']
     if not selected_meshes:
         bpy.ops.object.dialog_message('INVOKE_DEFAULT', message="No object selected. Please select at least one object.")
         return {'CANCELLED'}
 
-    for mesh in selected_meshes:
-        bpy.context.view_layer.objects.active = mesh
+    # VertexGroup.add() refuses to run in edit mode; one switch covers every object in it.
+    if any(mesh.mode == 'EDIT' for mesh in selected_meshes):
         bpy.ops.object.mode_set(mode='OBJECT')
+
+    for mesh in selected_meshes:
         group = mesh.vertex_groups.new(name="QGS_" + mesh.name)
-        vertex_indices = [v.index for v in mesh.data.vertices]
-        group.add(vertex_indices, 1.0, 'REPLACE')
+        # add() still turns each index into a Python int as it walks the sequence, but a
+        # range skips reading every vertex and building the index list first.
+        group.add(range(len(mesh.data.vertices)), 1.0, 'REPLACE')
+        qgs_change_index.refresh_object(mesh)
 
-    print("✅ Vertex groups created with prefix 'QGS_' matching bone names.")
+    logger.info("Vertex groups created with prefix 'QGS_' matching bone names.")
     return {'FINISHED'}
 
-def add_armature_modifier(armature_obj):
-    selected_meshes = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+def add_armature_modifier(armature_obj, objects=None):
+    selected_meshes = [obj for obj in (bpy.context.selected_objects if objects is None else objects) if obj.type == 'MESH']
     if not selected_meshes or armature_obj is None:
         return
     for mesh in selected_meshes:
         modifier = mesh.modifiers.new(name="QGS_Armature", type='ARMATURE')
         modifier.object = armature_obj
-    print("✅ Armature modifiers added with name 'QGS_Armature' to selected meshes.")
+        qgs_change_index.refresh_object(mesh)
+    logger.info("Armature modifiers added with name 'QGS_Armature' to selected meshes.")
+
+# ------------------ Incremental Re-rig ------------------
+
+PART_MAP_PROP = "QGS_parts"
+
+def find_qgs_armature(armature_name):
+    """The QGS armature object the operator would create under armature_name, if it exists."""
+    if not armature_name.startswith("QGS_"):
+        armature_name = "QGS_" + armature_name
+    obj = bpy.data.objects.get(armature_name)
+    if obj is None or obj.type != 'ARMATURE' or not obj.get("QGS", False):
+        return None
+    return obj
+
+def part_signature(obj, part_source, placement='ORIGIN', split_material=False, split_uv=False):
+    """What the bones of a part were built from; a different signature means the part changed.
+
+    Bones depend on the placement, the object's transform and its geometry. Geometry is
+    compared by element counts plus a short digest of the vertex positions, read in one
+    foreach_get, so that checking the unchanged objects stays cheap. Loose parts also
+    depend on the split options.
+    """
+    import hashlib
+
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    signature = [
+        part_source,
+        placement,
+        [round(value, 6) for row in obj.matrix_world for value in row],
+        len(mesh.vertices),
+        len(mesh.edges),
+        len(mesh.polygons),
+        hashlib.blake2b(co.tobytes(), digest_size=8).hexdigest(),
+    ]
+    if part_source == 'LOOSE':
+        signature += [split_material, split_uv]
+    return signature
+
+def read_part_map(armature):
+    """Object name -> {"bones": [...], "signature": [...]} for the parts rigged on armature.
+
+    Armatures made before the map was stored get one derived from their QGS bone names,
+    without signatures, so every part is rigged again on the next update.
+    """
+    if PART_MAP_PROP in armature:
+        return json.loads(armature[PART_MAP_PROP])
+    part_map = {}
+    for bone in armature.bones:
+        if not bone.name.startswith("QGS_"):
+            continue
+        name = bone.name[len("QGS_"):]
+        base, _, index = name.rpartition("_Part_")
+        if name in bpy.data.objects or not (base and index.isdigit()):
+            part_map[name] = {"bones": [bone.name], "signature": None}
+        else:
+            part_map.setdefault(base, {"bones": [], "signature": None})["bones"].append(bone.name)
+    return part_map
+
+def write_part_map(armature, part_map):
+    armature[PART_MAP_PROP] = json.dumps(part_map)
+
+def update_armature_incremental(armature_obj, objects, bone_length=0.1, placement='ORIGIN',
+                                part_source='OBJECTS', split_material=False, split_uv=False):
+    """Bring an existing QGS armature in line with objects, touching only the parts that changed.
+
+    Parts are matched to objects by name through the armature's part map. Objects that are
+    new or whose signature changed get bones, vertex groups and a modifier; parts whose
+    object is gone or no longer in objects lose their bones, groups and modifier. Every
+    other bone stays as it is, with its parent and constraints, and a re-detected loose
+    part that keeps its bone name keeps its bone too.
+    Returns (changed objects, counts).
+    """
+    armature = armature_obj.data
+    part_map = read_part_map(armature)
+    wanted = {obj.name: obj for obj in objects}
+    signatures = {
+        name: part_signature(obj, part_source, placement, split_material, split_uv) for name, obj in wanted.items()
+    }
+    stale = [name for name in part_map if name not in wanted]
+    changed = [obj for name, obj in wanted.items()
+               if name not in part_map or part_map[name]["signature"] != signatures[name]]
+    counts = {
+        "parts_kept": len(objects) - len(changed),
+        "parts_changed": len(changed),
+        "parts_removed": len(stale),
+        "bones_added": 0,
+        "bones_removed": 0,
+    }
+    if not stale and not changed:
+        return changed, counts
+
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Dropped objects lose their groups and modifier; changed ones only their old groups.
+    old_bones = set()
+    for name in stale + [obj.name for obj in changed]:
+        entry = part_map.get(name)
+        if entry is None:
+            continue
+        old_bones.update(entry["bones"])
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.type != 'MESH':
+            continue
+        for bone_name in entry["bones"]:
+            group = obj.vertex_groups.get(bone_name)
+            if group is not None:
+                obj.vertex_groups.remove(group)
+        if name not in wanted:
+            for mod in [m for m in obj.modifiers if m.type == 'ARMATURE' and m.name == "QGS_Armature"
+                        and m.object == armature_obj]:
+                obj.modifiers.remove(mod)
+        qgs_change_index.refresh_object(obj)
+
+    if part_source == 'LOOSE':
+        bone_names, heads, tails, assignments = loose_part_bones(
+            changed, bone_length, placement, split_material, split_uv
+        )
+        part_bones = {obj.name: [] for obj in changed}
+        for obj, vertex_parts, names in assignments:
+            part_bones[obj.name] = names
+    else:
+        if changed:
+            set_origin_to_center_of_mass(changed)
+            # Moving the origin changes the transform and the vertex positions; store the result.
+            signatures.update((obj.name, part_signature(obj, part_source, placement)) for obj in changed)
+        heads, tails = part_bone_ends(changed, bone_length, placement)
+        bone_names = ["QGS_" + obj.name for obj in changed]
+        part_bones = {obj.name: [name] for obj, name in zip(changed, bone_names)}
+
+    # Bones are created in world space; the armature may have been moved since.
+    to_armature = np.array(armature_obj.matrix_world.inverted_safe(), dtype=np.float64)
+    heads = heads @ to_armature[:3, :3].T + to_armature[:3, 3]
+    tails = tails @ to_armature[:3, :3].T + to_armature[:3, 3]
+    removed = old_bones.difference(bone_names)
+
+    bpy.context.view_layer.objects.active = armature_obj
+    with armature_edit_session(armature_obj) as edit_bones:
+        lookup = {bone.name: bone for bone in edit_bones}
+        for name in removed:
+            bone = lookup.pop(name, None)
+            if bone is not None:
+                # Blender hands the children of a removed bone to its parent.
+                edit_bones.remove(bone)
+                counts["bones_removed"] += 1
+        for name, head, tail in zip(bone_names, heads.tolist(), tails.tolist()):
+            bone = lookup.get(name)
+            if bone is None:
+                bone = edit_bones.new(name)
+                bone.use_connect = False
+                counts["bones_added"] += 1
+            bone.head = head
+            bone.tail = tail
+
+    if removed:
+        for pose_bone in armature_obj.pose.bones:
+            for con in [c for c in pose_bone.constraints if c.name == "QGS_ChildOf" and c.subtarget in removed]:
+                pose_bone.constraints.remove(con)
+
+    if part_source == 'LOOSE':
+        assign_loose_part_groups(assignments)
+    elif changed:
+        create_vertex_groups_from_selection(changed)
+    missing_modifier = []
+    for obj in objects:
+        modifier = next((m for m in obj.modifiers if m.type == 'ARMATURE' and m.name == "QGS_Armature"), None)
+        if modifier is None:
+            missing_modifier.append(obj)
+        elif modifier.object != armature_obj:
+            modifier.object = armature_obj
+    add_armature_modifier(armature_obj, missing_modifier)
+
+    for name in stale:
+        del part_map[name]
+    for obj in changed:
+        part_map[obj.name] = {"bones": part_bones[obj.name], "signature": signatures[obj.name]}
+    write_part_map(armature, part_map)
+    logger.info("Armature '%s' updated: %s", armature_obj.name, counts)
+    return changed, counts
+
+# ------------------ Smooth Weights ------------------
+
+def segment_distances(points, heads, tails):
+    """Distance from each point to the matching segment; all arguments broadcast to (..., 3)."""
+    segments = tails - heads
+    length_sq = np.einsum('...i,...i->...', segments, segments)
+    t = np.einsum('...i,...i->...', points - heads, segments) / np.where(length_sq > 0.0, length_sq, 1.0)
+    closest = heads + segments * np.clip(t, 0.0, 1.0)[..., np.newaxis]
+    return np.linalg.norm(points - closest, axis=-1)
+
+# Candidate (point, bone) pairs evaluated per batch, to bound memory on large meshes.
+SMOOTH_WEIGHT_BATCH = 1 << 21
+
+def compute_smooth_weights(points, heads, tails, falloff, max_influences=4):
+    """Distance-falloff weights from points to bone segments, in vectorized batches.
+
+    Every point follows its nearest bone plus any bone at most falloff further away,
+    weighted (1 - extra distance / falloff)^2; the max_influences strongest are kept and
+    normalized to sum to 1. Candidate bones are first pruned per grid cell with distance
+    bounds, so the work grows with the number of nearby bones rather than all of them.
+    Returns (point, bone, weight) arrays.
+    """
+    falloff = max(falloff, 1e-9)
+    if not len(points) or not len(heads):
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    low = points.min(axis=0)
+    cell = max(falloff, float((points.max(axis=0) - low).max()) / 64.0, 1e-6)
+    cell_index = np.floor((points - low) / cell).astype(np.int64)
+    dims = cell_index.max(axis=0) + 1
+    cells, point_cell = np.unique(np.ravel_multi_index(cell_index.T, dims), return_inverse=True)
+    point_cell = point_cell.ravel()
+
+    # Per cell and bone: a lower bound (cell box to segment bounds) and an upper bound
+    # (centre to segment plus half the cell diagonal) on the distance of any point in it.
+    seg_low = np.minimum(heads, tails)
+    seg_high = np.maximum(heads, tails)
+    cand_cells, cand_bones = [], []
+    for first in range(0, len(cells), 1024):
+        chunk = np.arange(first, min(first + 1024, len(cells)))
+        box_low = low + np.stack(np.unravel_index(cells[chunk], dims), axis=1) * cell
+        box_high = box_low + cell
+        gap = np.maximum(0.0, np.maximum(box_low[:, None] - seg_high[None], seg_low[None] - box_high[:, None]))
+        lower = np.linalg.norm(gap, axis=2)
+        centers = (box_low + box_high) / 2.0
+        upper = segment_distances(centers[:, None], heads[None], tails[None]) + cell * math.sqrt(3.0) / 2.0
+        rows, bones = np.nonzero(lower <= upper.min(axis=1, keepdims=True) + falloff)
+        cand_cells.append(chunk[rows])
+        cand_bones.append(bones)
+    cand_cell = np.concatenate(cand_cells)
+    cand_bone = np.concatenate(cand_bones)
+    cand_count = np.bincount(cand_cell, minlength=len(cells))
+    cand_start = np.cumsum(cand_count) - cand_count
+
+    # (point, candidate bone) pairs grouped by point, evaluated a batch of points at a time.
+    points32 = points.astype(np.float32)
+    heads32 = heads.astype(np.float32)
+    segments = (tails - heads).astype(np.float32)
+    length_sq = np.einsum('ij,ij->i', segments, segments)
+    inv_length_sq = np.where(length_sq > 0.0, 1.0 / np.maximum(length_sq, 1e-30), 0.0).astype(np.float32)
+    order = np.argsort(point_cell, kind='stable')
+    per_point = cand_count[point_cell[order]]
+    pair_end = np.cumsum(per_point)
+    kept_points, kept_bones, kept_weights = [], [], []
+    begin = 0
+    while begin < len(order):
+        end = max(int(np.searchsorted(pair_end, pair_end[begin] - per_point[begin] + SMOOTH_WEIGHT_BATCH)), begin + 1)
+        batch = order[begin:end]
+        counts = per_point[begin:end]
+        group_start = np.cumsum(counts) - counts
+        offsets = np.arange(int(counts.sum())) - np.repeat(group_start, counts)
+        pair_point = np.repeat(batch, counts)
+        pair_bone = cand_bone[np.repeat(cand_start[point_cell[batch]], counts) + offsets]
+        offset = points32[pair_point] - heads32[pair_bone]
+        segment = segments[pair_bone]
+        t = np.clip(np.einsum('ij,ij->i', offset, segment) * inv_length_sq[pair_bone], 0.0, 1.0)
+        offset -= segment * t[:, np.newaxis]
+        distance = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+        nearest = np.minimum.reduceat(distance, group_start)
+        weight = np.clip(1.0 - (distance - np.repeat(nearest, counts)) / falloff, 0.0, 1.0) ** 2
+        keep = weight > 0.0
+        kept_points.append(pair_point[keep])
+        kept_bones.append(pair_bone[keep])
+        kept_weights.append(weight[keep])
+        begin = end
+    pair_point = np.concatenate(kept_points)
+    pair_bone = np.concatenate(kept_bones)
+    weight = np.concatenate(kept_weights)
+
+    # Pairs are still grouped by point; only points over the influence cap need ranking.
+    influence_count = np.bincount(pair_point, minlength=len(points))
+    crowded = influence_count[pair_point] > max_influences
+    if crowded.any():
+        index = np.flatnonzero(crowded)
+        crowded_point = pair_point[index]
+        first = np.ones(len(index), dtype=bool)
+        first[1:] = crowded_point[1:] != crowded_point[:-1]
+        group = np.cumsum(first) - 1
+        # One float sort key: the group in the integer part, strongest weight first within it.
+        ranked = index[np.argsort(group + (1.0 - weight[index]) * 0.5)]
+        starts = np.flatnonzero(first)
+        rank = np.arange(len(ranked)) - np.repeat(starts, np.diff(np.append(starts, len(ranked))))
+        crowded[ranked[rank < max_influences]] = False
+        keep = ~crowded
+        pair_point, pair_bone, weight = pair_point[keep], pair_bone[keep], weight[keep]
+    weight /= np.bincount(pair_point, weights=weight, minlength=len(points))[pair_point]
+    return pair_point.astype(np.int32), pair_bone.astype(np.int32), weight.astype(np.float32)
+
+def apply_smooth_weights(objects, armature_obj, falloff, max_influences=4):
+    """Replace the QGS vertex groups of objects with smooth weights to every bone of armature_obj.
+
+    Weights are rounded to 1/255 steps, what game engines store anyway, so each group is
+    written with one call per distinct weight instead of one per vertex.
+    """
+    bones = armature_obj.data.bones
+    bone_count = len(bones)
+    matrix = np.array(armature_obj.matrix_world, dtype=np.float64)
+    ends = {}
+    for key in ("head_local", "tail_local"):
+        values = np.empty(bone_count * 3, dtype=np.float32)
+        bones.foreach_get(key, values)
+        ends[key] = values.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    bone_names = [bone.name for bone in bones]
+
+    for obj in objects:
+        mesh = obj.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        world = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        verts, bone_index, weights = compute_smooth_weights(
+            world, ends["head_local"], ends["tail_local"], falloff, max_influences
+        )
+        weights = np.round(weights * 255.0) / 255.0
+        nonzero = weights > 0.0
+        verts, bone_index, weights = verts[nonzero], bone_index[nonzero], weights[nonzero]
+
+        for group in [group for group in obj.vertex_groups if group.name.startswith("QGS_")]:
+            obj.vertex_groups.remove(group)
+        groups = [None] * bone_count
+        for index in np.unique(bone_index).tolist():
+            groups[index] = obj.vertex_groups.new(name=bone_names[index])
+        add_vertex_weights(groups, verts, bone_index, weights)
+        qgs_change_index.refresh_object(obj)
+    logger.info("Smooth weights (falloff %s, %s influences) applied to %s mesh(es).", falloff, max_influences, len(objects))
 
 class ArmatureAndVertexGroupsOperator(bpy.types.Operator):
     bl_idname = "object.armature_and_vertex_groups"
@@ -280,10 +1518,86 @@ class ArmatureAndVertexGroupsOperator(bpy.types.Operator):
         max=100.0
     )
 
-    def draw(self, context):
-        layout = self.layout
-        layout.prop(self, "armature_name")
-        layout.prop(self, "bone_length")
+    bone_placement: bpy.props.EnumProperty(
+        name="Bone Placement",
+        description="How each bone is positioned on its part",
+        items=[
+            ('ORIGIN', "Origin +Z", "Place bones at the part origin pointing up with the given bone length"),
+            ('PCA', "Principal Axis", "Align bones to each part's principal axis, sized to its extent"),
+        ],
+        default='ORIGIN'
+    )
+
+    part_source: bpy.props.EnumProperty(
+        name="Parts",
+        description="What counts as one rigid part",
+        items=[
+            ('OBJECTS', "Selected Objects", "One bone per selected mesh object"),
+            ('LOOSE', "Loose Parts", "One bone per connected part of each selected mesh, without separating it"),
+        ],
+        default='OBJECTS'
+    )
+
+    split_by_material: bpy.props.BoolProperty(
+        name="Split by Material",
+        description="Loose parts also break where the material changes",
+        default=False
+    )
+
+    split_by_uv_island: bpy.props.BoolProperty(
+        name="Split by UV Island",
+        description="Loose parts also break along UV seams of the active UV map",
+        default=False
+    )
+
+    incremental: bpy.props.BoolProperty(
+        name="Update Existing",
+        description="Only add and remove the parts that changed since the armature was built, "
+                    "keeping its bone hierarchy and constraints",
+        default=False
+    )
+
+    weighting: bpy.props.EnumProperty(
+        name="Weighting",
+        description="How vertices are weighted to the bones",
+        items=[
+            ('RIGID', "Rigid", "Every vertex follows only its own part's bone"),
+            ('SMOOTH', "Smooth", "Blend vertices near part boundaries between bones by distance"),
+        ],
+        default='RIGID'
+    )
+
+    falloff_distance: bpy.props.FloatProperty(
+        name="Falloff",
+        description="How much further than the nearest bone another bone may be and still get weight",
+        default=0.05,
+        min=0.0,
+        max=10.0,
+        subtype='DISTANCE'
+    )
+
+    max_influences: bpy.props.IntProperty(
+        name="Max Influences",
+        description="Bones per vertex at most, as limited by most game engines",
+        default=4,
+        min=1,
+        max=8
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "armature_name")
+        layout.prop(self, "incremental")
+        layout.prop(self, "part_source")
+        if self.part_source == 'LOOSE':
+            layout.prop(self, "split_by_material")
+            layout.prop(self, "split_by_uv_island")
+        layout.prop(self, "bone_placement")
+        layout.prop(self, "bone_length")
+        layout.prop(self, "weighting")
+        if self.weighting == 'SMOOTH':
+            layout.prop(self, "falloff_distance")
+            layout.prop(self, "max_influences")
 
     def execute(self, context):
         selected_meshes = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
@@ -291,22 +1605,170 @@ class ArmatureAndVertexGroupsOperator(bpy.types.Operator):
             self.report({'ERROR'}, "No object selected. Please select at least one object.")
             return {'CANCELLED'}
 
-        remove_existing_vertex_groups_modifiers_and_armature()
+        timer = OperatorTimer(self.bl_idname)
+        if self.incremental:
+            armature_obj = find_qgs_armature(self.armature_name)
+            if armature_obj is not None:
+                return self.execute_incremental(timer, armature_obj, selected_meshes)
+            logger.info("No armature '%s' to update, building a new one.", self.armature_name)
 
-        if set_origin_to_center_of_mass() == {'CANCELLED'}:
+        with timer.stage("cleanup"):
+            counts = remove_existing_vertex_groups_modifiers_and_armature()
+        logger.debug("Removed existing QGS items: %s", counts)
+
+        if self.part_source == 'LOOSE':
+            with timer.stage("loose_parts"):
+                armature_obj, part_count = create_armature_from_loose_parts(
+                    self.armature_name, self.bone_length, self.bone_placement,
+                    self.split_by_material, self.split_by_uv_island,
+                )
+            if armature_obj is None:
+                self.report({'ERROR'}, "The selected meshes have no geometry to rig.")
+                timer.finish('CANCELLED')
+                return {'CANCELLED'}
+            if self.weighting == 'SMOOTH':
+                with timer.stage("weights"):
+                    apply_smooth_weights(selected_meshes, armature_obj, self.falloff_distance, self.max_influences)
+            with timer.stage("modifier"):
+                add_armature_modifier(armature_obj)
+            self.report({'INFO'}, f"Rigged {part_count} loose part(s).")
+            timer.finish()
+            return {'FINISHED'}
+
+        with timer.stage("origin"):
+            result = set_origin_to_center_of_mass()
+        if result == {'CANCELLED'}:
+            timer.finish('CANCELLED')
             return {'CANCELLED'}
 
-        armature_obj = create_armature_and_bones(self.armature_name, self.bone_length)
+        with timer.stage("armature"):
+            armature_obj = create_armature_and_bones(self.armature_name, self.bone_length, self.bone_placement)
         if armature_obj is None:
+            timer.finish('CANCELLED')
             return {'CANCELLED'}
 
-        create_vertex_groups_from_selection()
-        add_armature_modifier(armature_obj)
+        with timer.stage("vgroups"):
+            create_vertex_groups_from_selection()
+        if self.weighting == 'SMOOTH':
+            with timer.stage("weights"):
+                apply_smooth_weights(selected_meshes, armature_obj, self.falloff_distance, self.max_influences)
+        with timer.stage("modifier"):
+            add_armature_modifier(armature_obj)
+        timer.finish()
+        return {'FINISHED'}
+
+    def execute_incremental(self, timer, armature_obj, selected_meshes):
+        with timer.stage("incremental"):
+            changed, counts = update_armature_incremental(
+                armature_obj, selected_meshes, self.bone_length, self.bone_placement,
+                self.part_source, self.split_by_material, self.split_by_uv_island,
+            )
+        if self.weighting == 'SMOOTH' and changed:
+            with timer.stage("weights"):
+                apply_smooth_weights(changed, armature_obj, self.falloff_distance, self.max_influences)
+        self.report({'INFO'}, (
+            f"Updated '{armature_obj.name}': {counts['parts_changed']} part(s) added or changed, "
+            f"{counts['parts_removed']} removed, {counts['parts_kept']} unchanged."
+        ))
+        timer.finish()
         return {'FINISHED'}
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self)
 
+# ------------------ Parent Change Journal ------------------
+
+PARENT_JOURNAL_PROP = "QGS_parent_journal"
+PARENT_JOURNAL_DEPTH = 32
+
+class ParentChangeJournal:
+    """Undo/redo history of batched bone parent edits for one armature.
+
+    Stored as JSON on the armature data so it is saved with the file and follows Blender's
+    own undo. Each transaction records the affected bone names with their parent before and
+    after the edit ("" for no parent), so a whole batch is replayed in one pass.
+    """
+
+    def __init__(self, armature):
+        self.armature = armature
+        data = json.loads(armature.get(PARENT_JOURNAL_PROP, "{}"))
+        self.undo_stack = data.get("undo", [])
+        self.redo_stack = data.get("redo", [])
+
+    def save(self):
+        self.armature[PARENT_JOURNAL_PROP] = json.dumps({"undo": self.undo_stack, "redo": self.redo_stack})
+
+    def record(self, label, bones, old, new):
+        """Push a new transaction; this discards anything that could have been redone."""
+        self.undo_stack.append({"label": label, "bones": bones, "old": old, "new": new})
+        del self.undo_stack[:-PARENT_JOURNAL_DEPTH]
+        self.redo_stack.clear()
+        self.save()
+
+    def undo(self, edit_bones):
+        """Revert the last transaction. Returns (transaction, bones changed) or (None, 0)."""
+        if not self.undo_stack:
+            return None, 0
+        transaction = self.undo_stack.pop()
+        changed = apply_parent_changes(edit_bones, transaction["bones"], transaction["old"])
+        self.redo_stack.append(transaction)
+        self.save()
+        return transaction, changed
+
+    def redo(self, edit_bones):
+        """Re-apply the last undone transaction. Returns (transaction, bones changed) or (None, 0)."""
+        if not self.redo_stack:
+            return None, 0
+        transaction = self.redo_stack.pop()
+        changed = apply_parent_changes(edit_bones, transaction["bones"], transaction["new"])
+        self.undo_stack.append(transaction)
+        self.save()
+        return transaction, changed
+
+def apply_parent_changes(edit_bones, names, parents):
+    """Set the parent of each named edit bone ("" clears it). Bones renamed or deleted since are skipped."""
+    lookup = {bone.name: bone for bone in edit_bones}
+    changed = 0
+    for name, parent_name in zip(names, parents):
+        bone = lookup.get(name)
+        if bone is None:
+            continue
+        bone.parent = lookup.get(parent_name) if parent_name else None
+        changed += 1
+    return changed
+
+@contextmanager
+def armature_edit_session(obj):
+    """Enter Edit Mode on obj for the duration of the block, then return to the previous mode."""
+    previous_mode = obj.mode
+    if previous_mode != 'EDIT':
+        bpy.ops.object.mode_set(mode='EDIT')
+    try:
+        yield obj.data.edit_bones
+    finally:
+        if previous_mode != 'EDIT':
+            bpy.ops.object.mode_set(mode=previous_mode)
+
+def revert_legacy_parent_props(edit_bones):
+    """Undo one level stored by older versions in the QGS_old_parent/QGS_removed_parent bone properties."""
+    lookup = {bone.name: bone for bone in edit_bones}
+    reversed_count = 0
+    for bone in lookup.values():
+        if not bone.select:
+            continue
+        old_parent_name = None
+        for key in ("QGS_old_parent", "QGS_removed_parent"):
+            if key in bone:
+                old_parent_name = bone[key]
+                del bone[key]
+                break
+        if old_parent_name is None:
+            continue
+        bone.parent = lookup.get(old_parent_name)
+        if bone.parent:
+            reversed_count += 1
+    return reversed_count
+
 class AutoParentSelectedBonesOperator(bpy.types.Operator):
     bl_idname = "armature.auto_parent_selected_bones"
     bl_label = "Auto-Parent Selected Bones"
@@ -316,25 +1778,24 @@ class AutoParentSelectedBonesOperator(bpy.types.Operator):
         if not obj or obj.type != 'ARMATURE':
             self.report({'ERROR'}, "Active object is not an armature.")
             return {'CANCELLED'}
-        bpy.ops.object.mode_set(mode='EDIT')
-        arm = obj.data
-        selected_bones = [bone for bone in arm.edit_bones if bone.select]
-        if len(selected_bones) < 2:
-            self.report({'ERROR'}, "Select at least two bones.")
-            bpy.ops.object.mode_set(mode='POSE')
-            return {'CANCELLED'}
-        active_bone = arm.edit_bones.active
-        if not active_bone:
-            self.report({'ERROR'}, "No active bone found. Please select an active bone.")
-            bpy.ops.object.mode_set(mode='POSE')
-            return {'CANCELLED'}
-        for bone in selected_bones:
-            if bone != active_bone:
-                old_parent = bone.parent.name if bone.parent else ""
-                bone["QGS_old_parent"] = old_parent
-                bone.parent = active_bone
-        bpy.ops.object.mode_set(mode='POSE')
-        self.report({'INFO'}, f"Selected bones parented to '{active_bone.name}' (old parents stored).")
+        with armature_edit_session(obj) as edit_bones:
+            selected_bones = [bone for bone in edit_bones if bone.select]
+            if len(selected_bones) < 2:
+                self.report({'ERROR'}, "Select at least two bones.")
+                return {'CANCELLED'}
+            active_bone = edit_bones.active
+            if not active_bone:
+                self.report({'ERROR'}, "No active bone found. Please select an active bone.")
+                return {'CANCELLED'}
+            active_name = active_bone.name
+            names, old = [], []
+            for bone in selected_bones:
+                if bone != active_bone:
+                    names.append(bone.name)
+                    old.append(bone.parent.name if bone.parent else "")
+                    bone.parent = active_bone
+            ParentChangeJournal(obj.data).record("Auto-Parent", names, old, [active_name] * len(names))
+        self.report({'INFO'}, f"{len(names)} bone(s) parented to '{active_name}' (change can be reversed).")
         return {'FINISHED'}
 
 class RemoveParentSelectedBonesOperator(bpy.types.Operator):
@@ -346,22 +1807,23 @@ class RemoveParentSelectedBonesOperator(bpy.types.Operator):
         if not obj or obj.type != 'ARMATURE':
             self.report({'ERROR'}, "Active object is not an armature.")
             return {'CANCELLED'}
-        bpy.ops.object.mode_set(mode='EDIT')
-        arm = obj.data
-        removed_count = 0
-        for bone in arm.edit_bones:
-            if bone.select and bone.parent:
-                bone["QGS_removed_parent"] = bone.parent.name
-                bone.parent = None
-                removed_count += 1
-        bpy.ops.object.mode_set(mode='POSE')
-        if removed_count:
-            self.report({'INFO'}, f"Removed parent from {removed_count} bone(s) (old parent stored).")
+        with armature_edit_session(obj) as edit_bones:
+            names, old = [], []
+            for bone in edit_bones:
+                if bone.select and bone.parent:
+                    names.append(bone.name)
+                    old.append(bone.parent.name)
+                    bone.parent = None
+            if names:
+                ParentChangeJournal(obj.data).record("Remove Parent", names, old, [""] * len(names))
+        if names:
+            self.report({'INFO'}, f"Removed parent from {len(names)} bone(s) (change can be reversed).")
         else:
             self.report({'INFO'}, "No parents found to remove.")
         return {'FINISHED'}
 
 class ReverseAutoParentChangeOperator(bpy.types.Operator):
+    """Undo the last Auto-Parent or Remove Parent batch on the active armature."""
     bl_idname = "armature.reverse_auto_parent"
     bl_label = "Reverse Auto-Parent/Remove Change"
 
@@ -370,30 +1832,49 @@ class ReverseAutoParentChangeOperator(bpy.types.Operator):
         if not obj or obj.type != 'ARMATURE':
             self.report({'ERROR'}, "Active object is not an armature.")
             return {'CANCELLED'}
-        bpy.ops.object.mode_set(mode='EDIT')
-        arm = obj.data
-        reversed_count = 0
-        for bone in arm.edit_bones:
-            if bone.select:
-                old_parent_name = None
-                if "QGS_old_parent" in bone:
-                    old_parent_name = bone["QGS_old_parent"]
-                    del bone["QGS_old_parent"]
-                elif "QGS_removed_parent" in bone:
-                    old_parent_name = bone["QGS_removed_parent"]
-                    del bone["QGS_removed_parent"]
-                if old_parent_name and old_parent_name in arm.edit_bones:
-                    bone.parent = arm.edit_bones[old_parent_name]
-                    reversed_count += 1
-                elif old_parent_name is not None:
-                    bone.parent = None
-        bpy.ops.object.mode_set(mode='POSE')
+        journal = ParentChangeJournal(obj.data)
+        with armature_edit_session(obj) as edit_bones:
+            if journal.undo_stack:
+                transaction, reversed_count = journal.undo(edit_bones)
+                label = transaction["label"]
+            else:
+                reversed_count = revert_legacy_parent_props(edit_bones)
+                label = "stored"
         if reversed_count:
-            self.report({'INFO'}, f"Reversed changes on {reversed_count} bone(s).")
+            self.report({'INFO'}, f"Reversed {label} change on {reversed_count} bone(s).")
             return {'FINISHED'}
         else:
-            self.report({'INFO'}, "No stored original parent found on selected bones.")
+            self.report({'INFO'}, "No parent change left to reverse.")
+            return {'CANCELLED'}
+
+class RedoAutoParentChangeOperator(bpy.types.Operator):
+    """Re-apply the last reversed Auto-Parent or Remove Parent batch on the active armature."""
+    bl_idname = "armature.redo_auto_parent"
+    bl_label = "Redo Auto-Parent/Remove Change"
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'ARMATURE':
+            self.report({'ERROR'}, "Active object is not an armature.")
+            return {'CANCELLED'}
+        journal = ParentChangeJournal(obj.data)
+        if not journal.redo_stack:
+            self.report({'INFO'}, "No reversed parent change to redo.")
             return {'CANCELLED'}
+        with armature_edit_session(obj) as edit_bones:
+            transaction, changed = journal.redo(edit_bones)
+        self.report({'INFO'}, f"Redid {transaction['label']} change on {changed} bone(s).")
+        return {'FINISHED'}
+
+def child_of_inverse_matrix(armature_obj, target_bone):
+    """The inverse matrix Set Inverse would store on a bone Child Of constraint targeting target_bone.
+
+    Matches bpy.ops.constraint.childof_set_inverse for world-space constraints with every
+    channel enabled: the inverse of the target's world matrix, followed by the armature's
+    world matrix so the owner keeps its current pose.
+    """
+    world = armature_obj.matrix_world
+    return (world @ target_bone.matrix).inverted_safe() @ world
 
 class AddChildOfConstraintOperator(bpy.types.Operator):
     """Add a Child-of Constraint to all selected bones (except the active one),
@@ -421,6 +1902,8 @@ class AddChildOfConstraintOperator(bpy.types.Operator):
             self.report({'ERROR'}, "No active pose bone selected.")
             return {'CANCELLED'}
         set_inverse = context.scene.set_inverse_child_of
+        # Every new constraint targets the same bone, so Set Inverse stores the same matrix on all of them.
+        inverse_matrix = child_of_inverse_matrix(obj, active_bone) if set_inverse else None
         for bone in selected_bones:
             if bone != active_bone:
                 constraint = bone.constraints.new('CHILD_OF')
@@ -428,52 +1911,1455 @@ class AddChildOfConstraintOperator(bpy.types.Operator):
                 constraint.target = obj
                 constraint.subtarget = active_bone.name
                 if set_inverse:
-                    obj.data.bones.active = obj.data.bones.get(bone.name)
-                    bpy.ops.constraint.childof_set_inverse(
-                        constraint=constraint.name,
-                        owner='BONE',
-                    )
+                    constraint.inverse_matrix = inverse_matrix
         self.report({'INFO'}, f"Child-of constraint added to {len(selected_bones)-1} bone(s). Set Inverse: {set_inverse}")
         return {'FINISHED'}
 
-class RemoveChildOfConstraintOperator(bpy.types.Operator):
-    """Remove the Child-of Constraint from the active bone."""
-    bl_idname = "armature.remove_child_of_constraint"
-    bl_label = "Remove Child-of Constraint"
+class RemoveChildOfConstraintOperator(bpy.types.Operator):
+    """Remove the Child-of Constraint from the active bone."""
+    bl_idname = "armature.remove_child_of_constraint"
+    bl_label = "Remove Child-of Constraint"
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'ARMATURE':
+            self.report({'ERROR'}, "Active object is not an armature.")
+            return {'CANCELLED'}
+        if context.mode != 'POSE':
+            self.report({'ERROR'}, "Armature must be in Pose Mode.")
+            return {'CANCELLED'}
+        selected_bones = context.selected_pose_bones
+        if not selected_bones:
+            self.report({'ERROR'}, "No bone selected. Please select at least one bone.")
+            return {'CANCELLED'}
+        active_bone = context.active_pose_bone
+        if not active_bone:
+            self.report({'ERROR'}, "No active pose bone selected.")
+            return {'CANCELLED'}
+        constraint = None
+        for con in active_bone.constraints:
+            if con.name == "QGS_ChildOf":
+                constraint = con
+                break
+        if constraint:
+            active_bone.constraints.remove(constraint)
+            self.report({'INFO'}, f"Child-of constraint removed from bone '{active_bone.name}'.")
+        else:
+            self.report({'INFO'}, "No Child-of constraint named 'QGS_ChildOf' found on the active bone.")
+        return {'FINISHED'}
+
+# ------------------ Child Of Baking ------------------
+
+# Blender's Euler orders as (first, second, third axis applied, parity), from its rotOrders table.
+EULER_ORDER_AXES = {
+    'XYZ': (0, 1, 2, False),
+    'XZY': (0, 2, 1, True),
+    'YXZ': (1, 0, 2, True),
+    'YZX': (1, 2, 0, False),
+    'ZXY': (2, 0, 1, False),
+    'ZYX': (2, 1, 0, True),
+}
+
+def euler_to_matrix(angles, order='XYZ'):
+    """(..., 3) Euler angles to (..., 3, 3) rotation matrices; 'XYZ' rotates about X first."""
+    matrix = None
+    for axis_name in order:
+        axis = "XYZ".index(axis_name)
+        angle = angles[..., axis]
+        cos, sin = np.cos(angle), np.sin(angle)
+        i, j = (axis + 1) % 3, (axis + 2) % 3
+        step = np.zeros(angle.shape + (3, 3))
+        step[..., axis, axis] = 1.0
+        step[..., i, i] = cos
+        step[..., j, j] = cos
+        step[..., i, j] = -sin
+        step[..., j, i] = sin
+        matrix = step if matrix is None else step @ matrix
+    return matrix
+
+def matrix_to_euler(matrix, order='XYZ'):
+    """(..., 3, 3) rotation matrices to Euler angles, picking the smaller of the two solutions like Blender."""
+    first, second = euler_solutions(matrix, order)
+    return np.where((np.abs(first).sum(axis=-1) > np.abs(second).sum(axis=-1))[..., np.newaxis], second, first)
+
+def euler_solutions(matrix, order='XYZ'):
+    """Both Euler angle triples that give each of the (..., 3, 3) rotation matrices."""
+    i, j, k, parity = EULER_ORDER_AXES[order]
+    cy = np.hypot(matrix[..., i, i], matrix[..., j, i])
+    first = np.empty(matrix.shape[:-1])
+    second = np.empty(matrix.shape[:-1])
+    first[..., i] = np.arctan2(matrix[..., k, j], matrix[..., k, k])
+    first[..., j] = np.arctan2(-matrix[..., k, i], cy)
+    first[..., k] = np.arctan2(matrix[..., j, i], matrix[..., i, i])
+    second[..., i] = np.arctan2(-matrix[..., k, j], -matrix[..., k, k])
+    second[..., j] = np.arctan2(-matrix[..., k, i], -cy)
+    second[..., k] = np.arctan2(-matrix[..., j, i], -matrix[..., i, i])
+    gimbal = cy <= 16.0 * np.finfo(np.float32).eps
+    first[..., i] = np.where(gimbal, np.arctan2(-matrix[..., j, k], matrix[..., j, j]), first[..., i])
+    first[..., k] = np.where(gimbal, 0.0, first[..., k])
+    second[gimbal] = first[gimbal]
+    return (-first, -second) if parity else (first, second)
+
+def continuous_eulers(matrix, order='XYZ'):
+    """(frames, ..., 3, 3) rotations to Euler angles where each frame takes the solution, shifted
+    by whole turns, closest to the previous one (like Matrix.to_euler with compat)."""
+    solutions = euler_solutions(matrix, order)
+    eulers = np.empty(matrix.shape[:-1])
+    eulers[0] = matrix_to_euler(matrix[0], order)
+    for f in range(1, len(matrix)):
+        previous = eulers[f - 1]
+        best = None
+        for solution in solutions:
+            shifted = solution[f] + 2.0 * np.pi * np.round((previous - solution[f]) / (2.0 * np.pi))
+            if best is None:
+                best = shifted
+            else:
+                closer = np.abs(shifted - previous).sum(axis=-1) < np.abs(best - previous).sum(axis=-1)
+                best = np.where(closer[..., np.newaxis], shifted, best)
+        eulers[f] = best
+    return eulers
+
+def quaternion_to_matrix(quaternions):
+    """(..., 4) quaternions (w, x, y, z), normalized first like pose channels, to (..., 3, 3) matrices."""
+    norm = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(np.where(norm > 0.0, quaternions / np.where(norm > 0.0, norm, 1.0), [1.0, 0.0, 0.0, 0.0]), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+def matrix_to_quaternion(matrix):
+    """(..., 3, 3) rotation matrices to unit quaternions (w, x, y, z), using the most stable of the four forms."""
+    m = matrix
+    trace = m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2]
+    case = np.argmax(np.stack([trace, m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]], axis=-1), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        candidates = []
+        s = np.sqrt(np.maximum(trace + 1.0, 0.0)) * 2.0
+        candidates.append((0.25 * s, (m[..., 2, 1] - m[..., 1, 2]) / s,
+                           (m[..., 0, 2] - m[..., 2, 0]) / s, (m[..., 1, 0] - m[..., 0, 1]) / s))
+        s = np.sqrt(np.maximum(1.0 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2], 0.0)) * 2.0
+        candidates.append(((m[..., 2, 1] - m[..., 1, 2]) / s, 0.25 * s,
+                           (m[..., 0, 1] + m[..., 1, 0]) / s, (m[..., 0, 2] + m[..., 2, 0]) / s))
+        s = np.sqrt(np.maximum(1.0 + m[..., 1, 1] - m[..., 0, 0] - m[..., 2, 2], 0.0)) * 2.0
+        candidates.append(((m[..., 0, 2] - m[..., 2, 0]) / s, (m[..., 0, 1] + m[..., 1, 0]) / s,
+                           0.25 * s, (m[..., 1, 2] + m[..., 2, 1]) / s))
+        s = np.sqrt(np.maximum(1.0 + m[..., 2, 2] - m[..., 0, 0] - m[..., 1, 1], 0.0)) * 2.0
+        candidates.append(((m[..., 1, 0] - m[..., 0, 1]) / s, (m[..., 0, 2] + m[..., 2, 0]) / s,
+                           (m[..., 1, 2] + m[..., 2, 1]) / s, 0.25 * s))
+    quaternions = np.choose(case[..., np.newaxis], [np.stack(c, axis=-1) for c in candidates])
+    quaternions /= np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return np.where(quaternions[..., :1] < 0.0, -quaternions, quaternions)
+
+def quaternion_to_axis_angle(quaternions):
+    """(..., 4) unit quaternions to Blender's (angle, x, y, z) axis-angle channels."""
+    angle = 2.0 * np.arccos(np.clip(quaternions[..., 0], -1.0, 1.0))
+    sin_half = np.sqrt(np.maximum(1.0 - quaternions[..., 0] ** 2, 0.0))
+    axis = np.where(
+        (sin_half > 1e-8)[..., np.newaxis],
+        quaternions[..., 1:] / np.where(sin_half > 1e-8, sin_half, 1.0)[..., np.newaxis],
+        [0.0, 1.0, 0.0],
+    )
+    return np.concatenate([angle[..., np.newaxis], axis], axis=-1)
+
+def axis_angle_to_quaternion(axis_angles):
+    axis = axis_angles[..., 1:]
+    norm = np.linalg.norm(axis, axis=-1, keepdims=True)
+    axis = np.where(norm > 0.0, axis / np.where(norm > 0.0, norm, 1.0), [0.0, 1.0, 0.0])
+    half = axis_angles[..., :1] / 2.0
+    return np.concatenate([np.cos(half), axis * np.sin(half)], axis=-1)
+
+def continuous_quaternions(quaternions):
+    """Flip the sign of (frames, ..., 4) quaternions so consecutive frames stay in the same hemisphere."""
+    dots = np.einsum('f...i,f...i->f...', quaternions[1:], quaternions[:-1])
+    flips = np.cumprod(np.where(dots < 0.0, -1.0, 1.0), axis=0)
+    quaternions[1:] *= flips[..., np.newaxis]
+    return quaternions
+
+# Pose channel that stores each rotation mode, with its number of components.
+ROTATION_MODE_CHANNELS = {'QUATERNION': ("rotation_quaternion", 4), 'AXIS_ANGLE': ("rotation_axis_angle", 4)}
+
+def rotation_channel(mode):
+    return ROTATION_MODE_CHANNELS.get(mode, ("rotation_euler", 3))
+
+def rotation_values_to_matrix(values, mode):
+    if mode == 'QUATERNION':
+        return quaternion_to_matrix(values)
+    if mode == 'AXIS_ANGLE':
+        return quaternion_to_matrix(axis_angle_to_quaternion(values))
+    return euler_to_matrix(values, mode)
+
+def matrix_to_rotation_values(rotation, mode):
+    """(frames, ..., 3, 3) rotations to the channel values of mode, continuous over the frames."""
+    if mode == 'QUATERNION':
+        return continuous_quaternions(matrix_to_quaternion(rotation))
+    if mode == 'AXIS_ANGLE':
+        return quaternion_to_axis_angle(continuous_quaternions(matrix_to_quaternion(rotation)))
+    return continuous_eulers(rotation, mode)
+
+def compose_basis(location, rotation, scale):
+    """Pose channel matrices (translation @ rotation @ scale) from (..., 3) and (..., 3, 3) arrays."""
+    basis = np.zeros(location.shape[:-1] + (4, 4))
+    basis[..., :3, :3] = rotation * scale[..., np.newaxis, :]
+    basis[..., :3, 3] = location
+    basis[..., 3, 3] = 1.0
+    return basis
+
+def decompose_basis(basis):
+    """Split (..., 4, 4) matrices into location, rotation and scale like Matrix.decompose()."""
+    location = basis[..., :3, 3].copy()
+    scale = np.linalg.norm(basis[..., :3, :3], axis=-2)
+    scale[..., 0] *= np.where(np.linalg.det(basis[..., :3, :3]) < 0.0, -1.0, 1.0)
+    rotation = basis[..., :3, :3] / np.where(scale != 0.0, scale, 1.0)[..., np.newaxis, :]
+    return location, rotation, scale
+
+def read_matrices(collection, prop):
+    """(n, 4, 4) array of a matrix property over an RNA collection."""
+    values = np.empty(len(collection) * 16, dtype=np.float32)
+    collection.foreach_get(prop, values)
+    # RNA matrices are flattened column by column.
+    return values.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+def write_fcurve_samples(action, data_path, index, group, frames, values):
+    """Key values at frames on one F-curve in a single bulk write, replacing keys inside the range."""
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    points = fcurve.keyframe_points
+    if len(points):
+        co = np.empty(len(points) * 2, dtype=np.float32)
+        points.foreach_get("co", co)
+        inside = np.flatnonzero((co[0::2] >= frames[0] - 0.5) & (co[0::2] <= frames[-1] + 0.5))
+        for point_index in inside[::-1].tolist():
+            points.remove(points[point_index], fast=True)
+    existing = len(points)
+    points.add(len(frames))
+    co = np.empty((existing + len(frames)) * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    co[existing * 2::2] = frames
+    co[existing * 2 + 1::2] = values
+    points.foreach_set("co", co)
+    fcurve.update()
+
+def is_analytic_child_of(constraint, armature_obj):
+    """True for a Child Of constraint with the add-on's settings: full influence on every channel."""
+    return (
+        constraint.target == armature_obj
+        and constraint.subtarget in armature_obj.pose.bones
+        and constraint.influence == 1.0
+        and constraint.owner_space == 'WORLD' and constraint.target_space == 'WORLD'
+        and all(getattr(constraint, f"use_{kind}_{axis}") for kind in ("location", "rotation", "scale") for axis in "xyz")
+    )
+
+def is_qgs_child_of(constraint):
+    return constraint.type == 'CHILD_OF' and constraint.name.startswith("QGS_ChildOf") and not constraint.mute
+
+def bone_rest_relative(armature_obj):
+    """Parent index and rest matrix relative to the parent's rest of every pose bone, in pose bone order."""
+    pose_bones = armature_obj.pose.bones
+    index = {pose_bone.name: i for i, pose_bone in enumerate(pose_bones)}
+    rest = np.empty((len(pose_bones), 4, 4))
+    rest[[index[bone.name] for bone in armature_obj.data.bones]] = read_matrices(armature_obj.data.bones, "matrix_local")
+    parents = np.array([index[pose_bone.parent.name] if pose_bone.parent else -1 for pose_bone in pose_bones],
+                       dtype=np.int64).reshape(-1)
+    relative = rest.copy()
+    has_parent = parents >= 0
+    relative[has_parent] = np.linalg.inv(rest[parents[has_parent]]) @ rest[has_parent]
+    return parents, relative
+
+def bake_blockers(armature_obj):
+    """Why evaluate_pose_matrices cannot reproduce this armature's pose, or "" when it can."""
+    if armature_obj.parent is not None or len(armature_obj.constraints):
+        return "the armature object is parented or constrained"
+    animation = armature_obj.animation_data
+    if animation is not None:
+        if any(track.strips and not track.mute for track in animation.nla_tracks):
+            return "the armature has NLA strips"
+        if len(animation.drivers):
+            return "the armature has drivers"
+        if animation.action is not None and any(
+            not fcurve.data_path.startswith("pose.bones[") for fcurve in animation.action.fcurves
+        ):
+            return "the armature object itself is animated"
+    for pose_bone in armature_obj.pose.bones:
+        if not pose_bone.bone.use_inherit_rotation or pose_bone.bone.inherit_scale != 'FULL':
+            return f"bone '{pose_bone.name}' does not fully inherit its parent's transform"
+        for constraint in pose_bone.constraints:
+            if constraint.mute:
+                continue
+            if not is_qgs_child_of(constraint) or not is_analytic_child_of(constraint, armature_obj):
+                return f"bone '{pose_bone.name}' has constraint '{constraint.name}'"
+    return ""
+
+def evaluate_pose_matrices(armature_obj, frames, owners):
+    """Pose matrices (frames, bones, 4, 4) straight from the action and the QGS_ChildOf constraints.
+
+    Channel F-curves are evaluated only for the owners and the bones they depend on, then
+    every bone is posed level by level after its parent and its Child Of targets, with each
+    constraint applied as target @ inverse @ owner on pose matrices (the stored inverse
+    already holds the armature's world matrix, see child_of_inverse_matrix). The scene is
+    never evaluated. Returns None when the bones depend on each other in a cycle.
+    """
+    pose_bones = armature_obj.pose.bones
+    count = len(pose_bones)
+    names = [pose_bone.name for pose_bone in pose_bones]
+    index = {name: i for i, name in enumerate(names)}
+    parents, relative = bone_rest_relative(armature_obj)
+    constraints = {
+        i: [(index[con.subtarget], np.array(con.inverse_matrix, dtype=np.float64))
+            for con in pose_bones[i].constraints if is_qgs_child_of(con)]
+        for i in range(count) if any(is_qgs_child_of(con) for con in pose_bones[i].constraints)
+    }
+    dependencies = [({int(parents[i])} if parents[i] >= 0 else set()) for i in range(count)]
+    for i, items in constraints.items():
+        dependencies[i].update(target for target, _ in items)
+
+    needed = set()
+    stack = list(owners)
+    while stack:
+        i = stack.pop()
+        if i not in needed:
+            needed.add(i)
+            stack.extend(dependencies[i])
+
+    frame_count = len(frames)
+    channels = {}
+    for prop, size in (("location", 3), ("rotation_quaternion", 4), ("rotation_euler", 3),
+                       ("rotation_axis_angle", 4), ("scale", 3)):
+        values = np.empty(count * size, dtype=np.float32)
+        pose_bones.foreach_get(prop, values)
+        channels[prop] = np.repeat(values.reshape(1, count, size).astype(np.float64), frame_count, axis=0)
+    action = armature_obj.animation_data.action if armature_obj.animation_data else None
+    if action is not None:
+        paths = {f'pose.bones["{bpy.utils.escape_identifier(names[i])}"]': i for i in needed}
+        frame_list = frames.tolist()
+        for fcurve in action.fcurves:
+            path, _, prop = fcurve.data_path.rpartition(".")
+            bone = paths.get(path)
+            if bone is None or fcurve.mute or prop not in channels or fcurve.array_index >= channels[prop].shape[2]:
+                continue
+            channels[prop][:, bone, fcurve.array_index] = [fcurve.evaluate(frame) for frame in frame_list]
+
+    modes = [pose_bone.rotation_mode for pose_bone in pose_bones]
+    rotation = np.empty((frame_count, count, 3, 3))
+    for mode in set(modes):
+        members = [i for i, bone_mode in enumerate(modes) if bone_mode == mode]
+        prop, _ = rotation_channel(mode)
+        rotation[:, members] = rotation_values_to_matrix(channels[prop][:, members], mode)
+    local = relative @ compose_basis(channels["location"], rotation, channels["scale"])
+
+    pose = np.empty_like(local)
+    done = np.zeros(count, dtype=bool)
+    remaining = needed
+    while remaining:
+        level = np.array(sorted(i for i in remaining if all(done[d] for d in dependencies[i])), dtype=np.int64)
+        if not len(level):
+            return None
+        parented = level[parents[level] >= 0]
+        roots = level[parents[level] < 0]
+        pose[:, roots] = local[:, roots]
+        pose[:, parented] = pose[:, parents[parented]] @ local[:, parented]
+        for i in level.tolist():
+            for target, inverse in constraints.get(i, ()):
+                pose[:, i] = pose[:, target] @ inverse @ pose[:, i]
+        done[level] = True
+        remaining = remaining.difference(level.tolist())
+    return pose
+
+def sample_pose_matrices(armature_obj, frames):
+    """Evaluated pose matrices (frames, bones, 4, 4), with one scene update per frame."""
+    scene = bpy.context.scene
+    current = scene.frame_current
+    pose_bones = armature_obj.pose.bones
+    pose = np.empty((len(frames), len(pose_bones), 4, 4))
+    try:
+        for f, frame in enumerate(frames.tolist()):
+            scene.frame_set(int(frame))
+            pose[f] = read_matrices(pose_bones, "matrix")
+    finally:
+        scene.frame_set(current)
+    return pose
+
+def bake_child_of_constraints(armature_obj, frame_start, frame_end, bone_names=None, remove_constraints=True):
+    """Bake the QGS_ChildOf constraints of armature_obj to a keyframe on every frame of the range.
+
+    The constrained pose comes from evaluate_pose_matrices unless bake_blockers finds
+    something it cannot reproduce; then the scene is evaluated once per frame instead.
+    Each owner's channels are written with one bulk F-curve write per channel, and its
+    constraints are removed, or muted so the baked motion is not applied twice.
+    Returns a dict with the number of baked bones and frames and the method used.
+    """
+    pose_bones = armature_obj.pose.bones
+    owners = [
+        i for i, pose_bone in enumerate(pose_bones)
+        if (bone_names is None or pose_bone.name in bone_names) and any(map(is_qgs_child_of, pose_bone.constraints))
+    ]
+    if not owners or frame_end < frame_start:
+        return {"bones": 0, "frames": 0, "method": None}
+    frames = np.arange(frame_start, frame_end + 1, dtype=np.float64)
+
+    reason = bake_blockers(armature_obj)
+    pose = None if reason else evaluate_pose_matrices(armature_obj, frames, owners)
+    method = 'ANALYTIC'
+    if pose is None:
+        logger.info("Baking by evaluating every frame: %s.", reason or "bones depend on each other in a cycle")
+        pose = sample_pose_matrices(armature_obj, frames)
+        method = 'SAMPLED'
+
+    parents, relative = bone_rest_relative(armature_obj)
+    owner_index = np.array(owners, dtype=np.int64)
+    space = np.repeat(relative[owner_index][np.newaxis], len(frames), axis=0)
+    parented = np.flatnonzero(parents[owner_index] >= 0)
+    space[:, parented] = pose[:, parents[owner_index[parented]]] @ space[:, parented]
+    location, rotation, scale = decompose_basis(np.linalg.inv(space) @ pose[:, owner_index])
+
+    animation = armature_obj.animation_data or armature_obj.animation_data_create()
+    if animation.action is None:
+        animation.action = bpy.data.actions.new(name=armature_obj.name + "Action")
+    action = animation.action
+    for column, i in enumerate(owners):
+        pose_bone = pose_bones[i]
+        prop, _ = rotation_channel(pose_bone.rotation_mode)
+        path = f'pose.bones["{bpy.utils.escape_identifier(pose_bone.name)}"]'
+        for channel, values in (
+            ("location", location[:, column]),
+            (prop, matrix_to_rotation_values(rotation[:, column], pose_bone.rotation_mode)),
+            ("scale", scale[:, column]),
+        ):
+            for axis in range(values.shape[1]):
+                write_fcurve_samples(action, f"{path}.{channel}", axis, pose_bone.name, frames, values[:, axis])
+        for constraint in [con for con in pose_bone.constraints if is_qgs_child_of(con)]:
+            if remove_constraints:
+                pose_bone.constraints.remove(constraint)
+            else:
+                constraint.mute = True
+    logger.info("Baked %s bone(s) over %s frame(s) (%s).", len(owners), len(frames), method.lower())
+    return {"bones": len(owners), "frames": len(frames), "method": method}
+
+class BakeChildOfConstraintsOperator(bpy.types.Operator):
+    """Bake the QGS_ChildOf constraints to keyframes so the rig plays back and exports without them."""
+    bl_idname = "armature.bake_child_of_constraints"
+    bl_label = "Bake Child-of Constraints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    frame_start: bpy.props.IntProperty(name="Start Frame", default=1, min=0)
+    frame_end: bpy.props.IntProperty(name="End Frame", default=250, min=0)
+
+    only_selected: bpy.props.BoolProperty(
+        name="Only Selected",
+        description="Bake only the selected bones instead of every bone with a QGS_ChildOf constraint",
+        default=False
+    )
+
+    remove_constraints: bpy.props.BoolProperty(
+        name="Remove Constraints",
+        description="Remove the baked constraints; when off they are muted so the motion is not applied twice",
+        default=True
+    )
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'ARMATURE':
+            self.report({'ERROR'}, "Active object is not an armature.")
+            return {'CANCELLED'}
+        if self.frame_end < self.frame_start:
+            self.report({'ERROR'}, "End frame is before the start frame.")
+            return {'CANCELLED'}
+        bone_names = {bone.name for bone in obj.data.bones if bone.select} if self.only_selected else None
+
+        timer = OperatorTimer(self.bl_idname)
+        with timer.stage("bake"):
+            result = bake_child_of_constraints(obj, self.frame_start, self.frame_end, bone_names, self.remove_constraints)
+        if not result["bones"]:
+            self.report({'INFO'}, "No QGS_ChildOf constraints to bake.")
+            timer.finish('CANCELLED')
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Baked {result['bones']} bone(s) over {result['frames']} frame(s).")
+        timer.finish()
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+# ------------------ Weapon Action Generator ------------------
+
+WEAPON_ACTION_KINDS = [
+    ('RECOIL', "Recoil", "Every root bone kicks back and up, then settles on a damped spring"),
+    ('BOLT', "Bolt Cycle", "Slide/bolt bones travel back and return while the trigger is pulled and released"),
+    ('MAGAZINE', "Magazine Drop", "Magazine bones fall out under gravity, tumbling as they go"),
+]
+
+# Forward axis choices; "up" is always +Z.
+WEAPON_FORWARD_AXES = {'X': (1.0, 0.0, 0.0), '-X': (-1.0, 0.0, 0.0), 'Y': (0.0, 1.0, 0.0), '-Y': (0.0, -1.0, 0.0)}
+
+GRAVITY = 9.81  # m/s^2
+
+def find_role_bones(armature_obj, keywords):
+    """Pose bones whose name contains any of the comma-separated keywords (case-insensitive)."""
+    words = [word.strip().lower() for word in keywords.split(",") if word.strip()]
+    return [pose_bone for pose_bone in armature_obj.pose.bones if any(word in pose_bone.name.lower() for word in words)]
+
+def smoothstep(x):
+    x = np.clip(x, 0.0, 1.0)
+    return x * x * (3.0 - 2.0 * x)
+
+def recoil_motion(fps, kick_distance, muzzle_rise, spring_frequency, spring_damping):
+    """Per-frame (kick back distance, rise angle) of one shot, until the spring has settled to 1%."""
+    duration = math.log(100.0) / max(spring_damping, 1e-3)
+    times = np.arange(int(math.ceil(duration * fps)) + 1) / fps
+    spring = np.exp(-spring_damping * times) * np.sin(2.0 * np.pi * spring_frequency * times)
+    spring /= max(float(np.abs(spring).max()), 1e-9)
+    return kick_distance * spring, muzzle_rise * spring
+
+def bolt_motion(frame_count, bolt_travel, trigger_angle):
+    """Per-frame (bolt distance back, trigger angle) of one cycle: a fast stroke, a short hold and the return."""
+    phase = np.linspace(0.0, 1.0, max(int(frame_count), 2))
+    stroke = np.where(phase < 0.55, smoothstep(phase / 0.4), 1.0 - smoothstep((phase - 0.55) / 0.45))
+    pull = np.where(phase < 0.6, smoothstep(phase / 0.2), 1.0 - smoothstep((phase - 0.6) / 0.2))
+    return bolt_travel * stroke, trigger_angle * pull
+
+def magazine_motion(fps, drop_distance, drop_tumble, release_frames=2):
+    """Per-frame (fall distance, tumble angle) of a magazine dropping free after release_frames."""
+    fall_time = math.sqrt(2.0 * max(drop_distance, 1e-4) / GRAVITY)
+    times = np.arange(int(math.ceil(fall_time * fps)) + release_frames + 1) / fps - release_frames / fps
+    fall = np.minimum(0.5 * GRAVITY * np.maximum(times, 0.0) ** 2, drop_distance)
+    return fall, drop_tumble * fall / max(drop_distance, 1e-4)
+
+def write_bone_motion(action, pose_bone, frames, offsets, rotations, pivot=None):
+    """Key armature-space motion on a bone's own channels: one bulk write per channel.
+
+    offsets are (frames, 3) translations and rotations (frames, 3) rotation vectors (axis
+    times angle), both in armature space. Rotations turn around the bone's rest head, or
+    around the armature-space point pivot if given; the change of pivot becomes part of
+    the location keys, so bones sharing a pivot move as one rigid body.
+    """
+    rest = np.array(pose_bone.bone.matrix_local.to_3x3(), dtype=np.float64)
+    path = f'pose.bones["{bpy.utils.escape_identifier(pose_bone.name)}"]'
+    channels = []
+    rotation = None
+    if rotations.any():
+        angles = np.linalg.norm(rotations, axis=1)
+        axis_angles = np.concatenate([angles[:, np.newaxis], rotations], axis=1)
+        rotation = quaternion_to_matrix(axis_angle_to_quaternion(axis_angles))
+        if pivot is not None:
+            # Turning about pivot = turning about the head, then moving the head by (R - I)(head - pivot).
+            lever = np.array(pose_bone.bone.head_local, dtype=np.float64) - pivot
+            offsets = offsets + rotation @ lever - lever
+    if offsets.any():
+        channels.append(("location", offsets @ rest))
+    if rotation is not None:
+        prop, _ = rotation_channel(pose_bone.rotation_mode)
+        channels.append((prop, matrix_to_rotation_values(rest.T @ rotation @ rest, pose_bone.rotation_mode)))
+    for channel, values in channels:
+        for axis in range(values.shape[1]):
+            write_fcurve_samples(action, f"{path}.{channel}", axis, pose_bone.name, frames, values[:, axis])
+
+def new_weapon_action(name):
+    """An empty action called name, reusing (and clearing) one left by an earlier run."""
+    action = bpy.data.actions.get(name)
+    if action is None:
+        action = bpy.data.actions.new(name)
+    else:
+        action.fcurves.clear()
+    action.id_root = 'OBJECT'
+    # Variants are not assigned to anything; keep them when the file is saved.
+    action.use_fake_user = True
+    return action
+
+def generate_weapon_actions(armature_obj, kinds, params, variants=1, jitter=0.0, seed=0, forward='-Y', fps=24.0,
+                            slide_keywords="slide,bolt", trigger_keywords="trigger", magazine_keywords="mag",
+                            grip_keywords="grip"):
+    """Create variants of the recoil, bolt cycle and magazine drop actions of armature_obj.
+
+    params holds the motion parameters (see GenerateWeaponActionsOperator); each variant
+    scales every one of them by a random factor in [1 - jitter, 1 + jitter], reproducibly
+    for a given seed. Actions are named "<armature>_<Kind>_<variant>" and replace earlier
+    ones of the same name. Recoil turns every root bone about one shared pivot: the head
+    of the first grip bone, or the armature origin. Returns (actions, kinds skipped
+    because no bone has the role).
+    """
+    forward = np.array(WEAPON_FORWARD_AXES[forward])
+    lateral = np.cross(forward, [0.0, 0.0, 1.0])
+    roles = {
+        'RECOIL': [pose_bone for pose_bone in armature_obj.pose.bones if pose_bone.parent is None],
+        'BOLT': find_role_bones(armature_obj, slide_keywords) + find_role_bones(armature_obj, trigger_keywords),
+        'MAGAZINE': find_role_bones(armature_obj, magazine_keywords),
+    }
+    triggers = {pose_bone.name for pose_bone in find_role_bones(armature_obj, trigger_keywords)}
+    grips = find_role_bones(armature_obj, grip_keywords)
+    recoil_pivot = np.array(grips[0].bone.head_local, dtype=np.float64) if grips else np.zeros(3)
+    skipped = [kind for kind in kinds if not roles[kind]]
+    rng = np.random.default_rng(seed)
+    actions = []
+    for variant in range(variants):
+        p = {key: value * (1.0 + rng.uniform(-jitter, jitter)) if jitter else value for key, value in params.items()}
+        for kind in kinds:
+            if kind in skipped:
+                continue
+            if kind == 'RECOIL':
+                back, rise = recoil_motion(fps, p["kick_distance"], p["muzzle_rise"],
+                                           p["spring_frequency"], p["spring_damping"])
+                motions = {pose_bone.name: (back, rise, 0.0) for pose_bone in roles[kind]}
+            elif kind == 'BOLT':
+                back, pull = bolt_motion(round(p["bolt_frames"]), p["bolt_travel"], p["trigger_angle"])
+                motions = {
+                    pose_bone.name: (np.zeros_like(back), -pull, 0.0) if pose_bone.name in triggers else (back, 0.0, 0.0)
+                    for pose_bone in roles[kind]
+                }
+            else:
+                fall, tumble = magazine_motion(fps, p["drop_distance"], p["drop_tumble"])
+                motions = {pose_bone.name: (np.zeros_like(fall), tumble, fall) for pose_bone in roles[kind]}
+
+            action = new_weapon_action(f"{armature_obj.name}_{kind.title()}_{variant:03d}")
+            for name, (back, turn, fall) in motions.items():
+                frames = np.arange(1, len(back) + 1, dtype=np.float64)
+                offsets = -np.outer(back, forward) - np.outer(np.broadcast_to(fall, back.shape), [0.0, 0.0, 1.0])
+                rotations = np.outer(np.broadcast_to(turn, back.shape), lateral)
+                write_bone_motion(action, armature_obj.pose.bones[name], frames, offsets, rotations,
+                                  recoil_pivot if kind == 'RECOIL' else None)
+            actions.append(action)
+    logger.info("Generated %s weapon action(s) for '%s'; no bones for %s.", len(actions), armature_obj.name, skipped or "none")
+    return actions, skipped
+
+class GenerateWeaponActionsOperator(bpy.types.Operator):
+    """Generate recoil, bolt cycle and magazine drop actions for the active QGS armature."""
+    bl_idname = "armature.generate_weapon_actions"
+    bl_label = "Generate Weapon Actions"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    kinds: bpy.props.EnumProperty(
+        name="Actions",
+        items=WEAPON_ACTION_KINDS,
+        options={'ENUM_FLAG'},
+        default={'RECOIL', 'BOLT', 'MAGAZINE'}
+    )
+
+    forward_axis: bpy.props.EnumProperty(
+        name="Forward",
+        description="Armature axis the barrel points along",
+        items=[(axis, axis, "") for axis in WEAPON_FORWARD_AXES],
+        default='-Y'
+    )
+
+    variants: bpy.props.IntProperty(
+        name="Variants",
+        description="Number of versions of each action, with jittered parameters",
+        default=1,
+        min=1,
+        max=1000
+    )
+
+    jitter: bpy.props.FloatProperty(
+        name="Jitter",
+        description="Largest relative change applied to each parameter in a variant",
+        default=0.0,
+        min=0.0,
+        max=0.9,
+        subtype='FACTOR'
+    )
+
+    seed: bpy.props.IntProperty(name="Seed", default=0, min=0)
+
+    kick_distance: bpy.props.FloatProperty(name="Kick", default=0.03, min=0.0, subtype='DISTANCE')
+    muzzle_rise: bpy.props.FloatProperty(name="Muzzle Rise", default=math.radians(4.0), subtype='ANGLE')
+    spring_frequency: bpy.props.FloatProperty(
+        name="Spring Frequency", description="Oscillations per second as the recoil settles",
+        default=4.0, min=0.1, max=100.0
+    )
+    spring_damping: bpy.props.FloatProperty(
+        name="Spring Damping", description="How fast the recoil oscillation dies out, per second",
+        default=8.0, min=0.1, max=200.0
+    )
+    bolt_travel: bpy.props.FloatProperty(name="Bolt Travel", default=0.05, min=0.0, subtype='DISTANCE')
+    bolt_frames: bpy.props.IntProperty(name="Bolt Frames", default=8, min=2, max=240)
+    trigger_angle: bpy.props.FloatProperty(name="Trigger Pull", default=math.radians(20.0), subtype='ANGLE')
+    drop_distance: bpy.props.FloatProperty(name="Drop Distance", default=0.4, min=0.0, subtype='DISTANCE')
+    drop_tumble: bpy.props.FloatProperty(name="Tumble", default=math.radians(25.0), subtype='ANGLE')
+
+    slide_keywords: bpy.props.StringProperty(
+        name="Slide Bones", description="Comma-separated words that mark slide or bolt bones", default="slide,bolt"
+    )
+    trigger_keywords: bpy.props.StringProperty(
+        name="Trigger Bones", description="Comma-separated words that mark trigger bones", default="trigger"
+    )
+    magazine_keywords: bpy.props.StringProperty(
+        name="Magazine Bones", description="Comma-separated words that mark magazine bones", default="mag"
+    )
+    grip_keywords: bpy.props.StringProperty(
+        name="Grip Bones",
+        description="Comma-separated words that mark the grip bone recoil turns about (none: armature origin)",
+        default="grip"
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "kinds")
+        layout.prop(self, "forward_axis")
+        row = layout.row(align=True)
+        row.prop(self, "variants")
+        row.prop(self, "jitter")
+        row.prop(self, "seed")
+        if 'RECOIL' in self.kinds:
+            layout.label(text="Recoil")
+            layout.prop(self, "kick_distance")
+            layout.prop(self, "muzzle_rise")
+            layout.prop(self, "spring_frequency")
+            layout.prop(self, "spring_damping")
+            layout.prop(self, "grip_keywords")
+        if 'BOLT' in self.kinds:
+            layout.label(text="Bolt Cycle")
+            layout.prop(self, "bolt_travel")
+            layout.prop(self, "bolt_frames")
+            layout.prop(self, "trigger_angle")
+            layout.prop(self, "slide_keywords")
+            layout.prop(self, "trigger_keywords")
+        if 'MAGAZINE' in self.kinds:
+            layout.label(text="Magazine Drop")
+            layout.prop(self, "drop_distance")
+            layout.prop(self, "drop_tumble")
+            layout.prop(self, "magazine_keywords")
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'ARMATURE':
+            self.report({'ERROR'}, "Active object is not an armature.")
+            return {'CANCELLED'}
+        if not self.kinds:
+            self.report({'ERROR'}, "No action type chosen.")
+            return {'CANCELLED'}
+        params = {
+            name: getattr(self, name) for name in (
+                "kick_distance", "muzzle_rise", "spring_frequency", "spring_damping", "bolt_travel",
+                "bolt_frames", "trigger_angle", "drop_distance", "drop_tumble",
+            )
+        }
+        render = context.scene.render
+
+        timer = OperatorTimer(self.bl_idname)
+        with timer.stage("generate"):
+            actions, skipped = generate_weapon_actions(
+                obj, [kind for kind, _, _ in WEAPON_ACTION_KINDS if kind in self.kinds], params,
+                self.variants, self.jitter, self.seed, self.forward_axis, render.fps / render.fps_base,
+                self.slide_keywords, self.trigger_keywords, self.magazine_keywords, self.grip_keywords,
+            )
+        if not actions:
+            self.report({'WARNING'}, "No bones match the chosen actions.")
+            timer.finish('CANCELLED')
+            return {'CANCELLED'}
+        message = f"Generated {len(actions)} action(s)."
+        if skipped:
+            message += f" No bones for: {', '.join(kind.title() for kind in skipped)}."
+        self.report({'INFO'}, message)
+        timer.finish()
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+# ------------------ Incremental Export ------------------
+
+EXPORT_FORMATS = {'GLB': ".glb", 'GLTF': ".gltf", 'FBX': ".fbx"}
+EXPORT_MANIFEST_NAME = "qgs_export_manifest.json"
+EXPORT_RESULT_MARKER = "QGS_EXPORT_RESULT "
+EXPORT_ASSET_TIMEOUT = 600.0  # seconds a background Blender may spend on one asset
+
+# Run inside each background Blender: load this file as a plain module (no registration
+# needed to export) and hand it the job file. Arguments after "--": add-on path, job path.
+EXPORT_WORKER_SCRIPT = (
+    "import importlib.util, sys\n"
+    "argv = sys.argv[sys.argv.index('--') + 1:]\n"
+    "spec = importlib.util.spec_from_file_location('qgs_export_worker', argv[0])\n"
+    "module = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(module)\n"
+    "module.run_export_job(argv[1])\n"
+)
+
+def export_settings(file_format):
+    """Exporter keyword arguments for file_format; also hashed, so changing them re-exports."""
+    if file_format == 'FBX':
+        return {
+            "object_types": ['ARMATURE', 'MESH'],
+            "add_leaf_bones": False,
+            "bake_anim": True,
+            "bake_anim_use_all_actions": True,
+            "bake_anim_use_nla_strips": False,
+        }
+    return {
+        "export_format": 'GLB' if file_format == 'GLB' else 'GLTF_SEPARATE',
+        "export_animations": True,
+        "export_skins": True,
+        "export_apply": False,
+    }
+
+def action_bone_names(action):
+    """Names of the pose bones an action animates."""
+    names = set()
+    for fcurve in action.fcurves:
+        path = fcurve.data_path
+        if path.startswith('pose.bones["'):
+            end = path.find('"]', 12)
+            if end > 0:
+                names.add(path[12:end])
+    return names
+
+def collect_export_assets(scene):
+    """Each QGS armature in scene as (armature, meshes, actions).
+
+    Meshes are the ones deformed through a QGS_Armature modifier. Actions are the assigned
+    and NLA actions plus every action that animates one of the armature's bones, since the
+    exporters pick those up as well.
+    """
+    armatures = [obj for obj in scene.objects if obj.type == 'ARMATURE' and obj.get("QGS", False)]
+    meshes = {armature.name: [] for armature in armatures}
+    for obj in scene.objects:
+        if obj.type != 'MESH':
+            continue
+        for mod in obj.modifiers:
+            if mod.type == 'ARMATURE' and mod.name == "QGS_Armature" and mod.object and mod.object.name in meshes:
+                meshes[mod.object.name].append(obj)
+                break
+    action_bones = {action.name: action_bone_names(action) for action in bpy.data.actions}
+
+    assets = []
+    for armature in armatures:
+        actions = set()
+        animation = armature.animation_data
+        if animation:
+            if animation.action:
+                actions.add(animation.action.name)
+            actions.update(strip.action.name for track in animation.nla_tracks
+                           for strip in track.strips if strip.action)
+        bone_names = set(armature.data.bones.keys())
+        actions.update(name for name, bones in action_bones.items() if bones & bone_names)
+        assets.append((
+            armature,
+            sorted(meshes[armature.name], key=lambda obj: obj.name),
+            [bpy.data.actions[name] for name in sorted(actions)],
+        ))
+    return assets
+
+def _hash_array(digest, label, values):
+    values = np.ascontiguousarray(values)
+    digest.update(f"{label}:{values.dtype.str}:{values.shape};".encode("utf-8"))
+    digest.update(values.tobytes())
+
+def _json_value(value):
+    """JSON fallback for RNA values: IDs by name, arrays, vectors and ID properties as lists."""
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+    if isinstance(value, set):
+        return sorted(value)
+    for method in ("to_dict", "to_list"):
+        if hasattr(value, method):
+            return getattr(value, method)()
+    try:
+        return list(value)
+    except TypeError:
+        return repr(value)
+
+def _hash_json(digest, label, value):
+    digest.update(f"{label}:".encode("utf-8"))
+    digest.update(json.dumps(value, sort_keys=True, default=_json_value).encode("utf-8"))
+
+# Runtime state and editor layout that changes without changing what gets exported.
+RNA_HASH_SKIP = {
+    "rna_type", "users", "tag", "session_uid", "is_evaluated", "original", "is_runtime_data", "use_extra_user",
+    "preview", "is_editmode", "execution_time", "is_active", "show_expanded", "select", "location", "width",
+    "height", "dimensions",
+}
+
+def rna_values(struct):
+    """Every non-collection RNA property of struct plus its ID properties, for hashing."""
+    values = {
+        prop.identifier: getattr(struct, prop.identifier, None)
+        for prop in struct.bl_rna.properties
+        if prop.identifier not in RNA_HASH_SKIP and prop.type != 'COLLECTION'
+    }
+    # Geometry Nodes inputs and similar settings live in ID properties.
+    try:
+        values.update({f"[{key}]": struct[key] for key in struct.keys()})
+    except TypeError:
+        pass
+    return values
+
+def _hash_shape_keys(digest, mesh):
+    keys = mesh.shape_keys
+    if keys is None:
+        return
+    _hash_json(digest, "shape_keys", [keys.use_relative, [[
+        block.name, block.relative_key.name, block.value, block.slider_min, block.slider_max,
+        block.mute, block.vertex_group, block.interpolation,
+    ] for block in keys.key_blocks]])
+    for block in keys.key_blocks:
+        co = np.empty(len(block.data) * 3, dtype=np.float32)
+        block.data.foreach_get("co", co)
+        _hash_array(digest, "shape_key_co", co)
+
+def _hash_material(digest, material, seen):
+    """Hash a material's settings and its node trees (node groups included) once per fingerprint."""
+    if material is None or material.name_full in seen:
+        _hash_json(digest, "material", material.name_full if material else "")
+        return
+    seen.add(material.name_full)
+    _hash_json(digest, "material", rna_values(material))
+    trees = [material.node_tree] if material.use_nodes and material.node_tree else []
+    while trees:
+        tree = trees.pop()
+        if tree.name_full in seen:
+            continue
+        seen.add(tree.name_full)
+        nodes = []
+        for node in tree.nodes:
+            inputs = [[socket.identifier, getattr(socket, "default_value", None)] for socket in node.inputs]
+            nodes.append([rna_values(node), inputs])
+            if getattr(node, "node_tree", None) is not None:
+                trees.append(node.node_tree)
+            image = getattr(node, "image", None)
+            if image is not None and image.name_full not in seen:
+                seen.add(image.name_full)
+                path = bpy.path.abspath(image.filepath) if image.filepath else ""
+                stat = os.stat(path) if path and os.path.isfile(path) else None
+                nodes.append([image.name_full, image.source, path, list(image.size),
+                              image.packed_file.size if image.packed_file else 0,
+                              [stat.st_size, stat.st_mtime] if stat else None])
+        links = [[link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier,
+                  link.is_muted] for link in tree.links]
+        _hash_json(digest, "node_tree", [tree.name_full, nodes, links])
+
+def fingerprint_asset(armature_obj, meshes, actions, settings):
+    """Digest of everything an export of this asset depends on.
+
+    Bulk data (bone rest and pose matrices, mesh arrays, shape keys, keyframes) is read
+    with foreach_get and hashed as raw arrays; names, modifier and material settings are
+    hashed as JSON. Images count by path, size and file modification time, not by pixels.
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=20)
+    _hash_json(digest, "settings", [bpy.app.version_string, settings])
+
+    bones = armature_obj.data.bones
+    _hash_json(digest, "armature", [
+        armature_obj.name,
+        [bone.name for bone in bones],
+        [bone.parent.name if bone.parent else "" for bone in bones],
+    ])
+    _hash_array(digest, "matrix_world", np.array(armature_obj.matrix_world, dtype=np.float32))
+    for prop, width in (("head_local", 3), ("tail_local", 3), ("matrix_local", 16)):
+        values = np.empty(len(bones) * width, dtype=np.float32)
+        bones.foreach_get(prop, values)
+        _hash_array(digest, prop, values)
+    deform = np.empty(len(bones), dtype=bool)
+    bones.foreach_get("use_deform", deform)
+    _hash_array(digest, "use_deform", deform)
+    pose_bones = armature_obj.pose.bones
+    _hash_array(digest, "matrix_basis", read_matrices(pose_bones, "matrix_basis"))
+    _hash_json(digest, "constraints", [
+        [pose_bone.name, constraint.name, constraint.type, constraint.mute, getattr(constraint, "subtarget", "")]
+        for pose_bone in pose_bones for constraint in pose_bone.constraints
+    ])
+
+    seen = set()
+    for obj in meshes:
+        _hash_json(digest, "mesh", [obj.name, [rna_values(mod) for mod in obj.modifiers]])
+        _hash_array(digest, "matrix_world", np.array(obj.matrix_world, dtype=np.float32))
+        group_names = [group.name for group in obj.vertex_groups]
+        digest.update(MeshArrays.from_mesh(obj.data, group_names).content_hash().encode("utf-8"))
+        _hash_shape_keys(digest, obj.data)
+        for slot in obj.material_slots:
+            _hash_json(digest, "slot", slot.link)
+            _hash_material(digest, slot.material, seen)
+
+    for action in actions:
+        _hash_json(digest, "action", [action.name, list(action.frame_range)])
+        for fcurve in action.fcurves:
+            count = len(fcurve.keyframe_points)
+            _hash_json(digest, "fcurve", [fcurve.data_path, fcurve.array_index, fcurve.mute, count])
+            keys = np.empty((3, count * 2), dtype=np.float32)
+            for row, prop in enumerate(("co", "handle_left", "handle_right")):
+                fcurve.keyframe_points.foreach_get(prop, keys[row])
+            _hash_array(digest, "keys", keys)
+    return digest.hexdigest()
+
+def read_export_manifest(directory):
+    path = os.path.join(directory, EXPORT_MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {"assets": {}}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable export manifest '%s': %s", path, e)
+        return {"assets": {}}
+    manifest.setdefault("assets", {})
+    return manifest
+
+def write_export_manifest(directory, manifest):
+    path = os.path.join(directory, EXPORT_MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def export_asset(armature_name, mesh_names, filepath, file_format):
+    """Export one armature and its meshes from the open file; returns a result dict."""
+    start = time.perf_counter()
+    result = {"name": armature_name}
+    try:
+        view_layer = bpy.context.view_layer
+        wanted = {armature_name, *mesh_names}
+        missing = wanted.difference(obj.name for obj in view_layer.objects)
+        if missing:
+            raise RuntimeError(f"Not in the view layer: {', '.join(sorted(missing))}")
+        if view_layer.objects.active and view_layer.objects.active.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for obj in view_layer.objects:
+            obj.select_set(obj.name in wanted)
+        view_layer.objects.active = bpy.data.objects[armature_name]
+        settings = export_settings(file_format)
+        if file_format == 'FBX':
+            outcome = bpy.ops.export_scene.fbx(filepath=filepath, use_selection=True, **settings)
+        else:
+            outcome = bpy.ops.export_scene.gltf(filepath=filepath, use_selection=True, **settings)
+        if outcome != {'FINISHED'}:
+            raise RuntimeError(f"Exporter returned {sorted(outcome)}")
+        result["status"] = "ok"
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def run_export_job(job_path):
+    """Entry point of a background export worker: export every asset of the job file."""
+    with open(job_path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    for asset in job["assets"]:
+        result = export_asset(asset["armature"], asset["meshes"], asset["filepath"], job["format"])
+        print(EXPORT_RESULT_MARKER + json.dumps(result), flush=True)
+
+def split_export_jobs(assets, jobs):
+    """Spread assets over at most jobs lists, largest first onto the lightest list."""
+    buckets = [[] for _ in range(min(jobs, len(assets)))]
+    loads = [0] * len(buckets)
+    for asset in sorted(assets, key=lambda asset: asset["cost"], reverse=True):
+        index = loads.index(min(loads))
+        buckets[index].append(asset)
+        loads[index] += asset["cost"]
+    return buckets
+
+def _run_export_worker(blend_path, job_path, threads, timeout):
+    """Run one background Blender on job_path and collect the results it prints.
+
+    timeout applies per asset: the worker is killed when no asset finishes within timeout
+    seconds of the previous one, and results printed before the kill are kept.
+    """
+    import subprocess
+    import threading
+
+    command = [
+        bpy.app.binary_path, "-b", "--factory-startup", "--threads", str(threads), blend_path,
+        "--python-expr", EXPORT_WORKER_SCRIPT, "--", os.path.abspath(__file__), job_path,
+    ]
+    try:
+        # stderr goes into the same pipe so a chatty worker cannot block on a full buffer.
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+        )
+    except OSError as e:
+        return [], f"Could not start Blender: {e}"
+    progress = threading.Event()
+    killed = threading.Event()
+
+    def watchdog():
+        while process.poll() is None:
+            if not progress.wait(timeout):
+                killed.set()
+                process.kill()
+                return
+            progress.clear()
+
+    threading.Thread(target=watchdog, daemon=True).start()
+    results = []
+    tail = []
+    with process.stdout:
+        for line in process.stdout:
+            if line.startswith(EXPORT_RESULT_MARKER):
+                results.append(json.loads(line[len(EXPORT_RESULT_MARKER):]))
+                progress.set()
+            elif line.strip():
+                tail = (tail + [line.strip()])[-5:]
+    process.wait()
+    progress.set()  # let the watchdog see that the process has exited
+    if killed.is_set():
+        return results, f"Killed after {timeout:g} s without finishing an asset."
+    return results, f"Exit code {process.returncode}: " + " | ".join(tail)
+
+def export_assets_parallel(blend_path, assets, file_format, jobs, timeout=EXPORT_ASSET_TIMEOUT):
+    """Export assets from blend_path in up to jobs background Blender processes.
+
+    Assets are grouped per process so each Blender startup is paid once per group rather
+    than once per asset. timeout is per asset, so large groups are not cut short; assets
+    a killed process had already exported keep their results. Returns one result dict per
+    asset.
+    """
+    import concurrent.futures
+    import shutil
+    import tempfile
+
+    buckets = split_export_jobs(assets, jobs)
+    threads = max(1, (os.cpu_count() or 1) // max(1, len(buckets)))
+    job_dir = tempfile.mkdtemp(prefix="qgs_export_")
+    results = {}
+    try:
+        job_paths = []
+        for index, bucket in enumerate(buckets):
+            job_path = os.path.join(job_dir, f"job_{index}.json")
+            with open(job_path, "w", encoding="utf-8") as f:
+                json.dump({"format": file_format, "assets": bucket}, f)
+            job_paths.append(job_path)
+        # Threads are enough here: each one only waits on its own Blender process.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(buckets)) as pool:
+            futures = {
+                pool.submit(_run_export_worker, blend_path, job_path, threads, timeout): bucket
+                for bucket, job_path in zip(buckets, job_paths)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                worker_results, error = future.result()
+                for result in worker_results:
+                    results[result["name"]] = result
+                for asset in futures[future]:
+                    results.setdefault(asset["armature"], {
+                        "name": asset["armature"], "status": "failed", "error": error, "seconds": 0.0,
+                    })
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return [results[asset["armature"]] for asset in assets]
+
+def export_filenames(names, manifest_assets, extension):
+    """Armature name -> output file name, unique within the export directory.
+
+    bpy.path.clean_name maps different names (QGS_Gun.001, QGS_Gun_001) to the same file,
+    and file systems may ignore case, so clashes get a numbered suffix. An armature keeps
+    the file its manifest entry already uses, and files listed for other armatures (for
+    example ones exported from another .blend) are never taken over.
+    """
+    claimed = {entry.get("file", "").lower(): name for name, entry in manifest_assets.items()}
+    used = set()
+    filenames = {}
+    for name in sorted(names):
+        previous = manifest_assets.get(name, {}).get("file", "")
+        if previous.endswith(extension) and previous.lower() not in used:
+            filename = previous
+        else:
+            stem = bpy.path.clean_name(name)
+            filename = stem + extension
+            suffix = 1
+            while filename.lower() in used or claimed.get(filename.lower(), name) != name:
+                filename = f"{stem}_{suffix:03d}{extension}"
+                suffix += 1
+        used.add(filename.lower())
+        filenames[name] = filename
+    return filenames
+
+def export_changed_assets(scene, directory, file_format='GLB', jobs=0, force=False, timer=None):
+    """Export the QGS assets of scene whose fingerprint differs from the manifest in directory.
+
+    Unchanged assets with an existing output file are skipped. With more than one changed
+    asset and jobs != 1 the exports run in background Blender processes on a saved copy of
+    the file. Returns the run summary that is also stored in the manifest.
+    """
+    timer = timer or OperatorTimer("export_changed_assets")
+    run_start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_export_manifest(directory)
+    settings = export_settings(file_format)
+    extension = EXPORT_FORMATS[file_format]
+
+    pending = []
+    skipped = 0
+    hash_seconds = {}
+    with timer.stage("hash"):
+        assets = collect_export_assets(scene)
+        filenames = export_filenames([armature.name for armature, _, _ in assets], manifest["assets"], extension)
+        for armature, meshes, actions in assets:
+            start = time.perf_counter()
+            fingerprint = fingerprint_asset(armature, meshes, actions, [file_format, settings])
+            hash_seconds[armature.name] = time.perf_counter() - start
+            filename = filenames[armature.name]
+            previous = manifest["assets"].get(armature.name, {})
+            if (not force and previous.get("hash") == fingerprint and previous.get("file") == filename
+                    and os.path.exists(os.path.join(directory, filename))):
+                skipped += 1
+                continue
+            pending.append({
+                "armature": armature.name,
+                "meshes": [obj.name for obj in meshes],
+                "actions": len(actions),
+                "filepath": os.path.join(directory, filename),
+                "file": filename,
+                "hash": fingerprint,
+                "cost": sum(len(obj.data.vertices) for obj in meshes) + len(armature.data.bones),
+            })
+    logger.info("Export: %d asset(s) changed, %d unchanged", len(pending), skipped)
+
+    if jobs <= 0:
+        jobs = max(1, (os.cpu_count() or 1) // 2)
+    jobs = min(jobs, len(pending))
+    results = []
+    if jobs > 1:
+        with timer.stage("snapshot"):
+            # Workers read the file from disk, so unsaved edits go into a temporary copy.
+            blend_path = bpy.data.filepath
+            snapshot_dir = None
+            if not blend_path or bpy.data.is_dirty:
+                import tempfile
+                snapshot_dir = tempfile.mkdtemp(prefix="qgs_export_")
+                blend_path = os.path.join(snapshot_dir, "snapshot.blend")
+                bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, check_existing=False)
+        try:
+            with timer.stage("export"):
+                results = export_assets_parallel(blend_path, pending, file_format, jobs)
+        finally:
+            if snapshot_dir:
+                import shutil
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+    elif pending:
+        view_layer = bpy.context.view_layer
+        selected = [obj for obj in view_layer.objects if obj.select_get()]
+        active = view_layer.objects.active
+        # export_asset leaves the active object's mode for Object mode; go back to it after.
+        active_mode = active.mode if active else 'OBJECT'
+        with timer.stage("export"):
+            results = [export_asset(asset["armature"], asset["meshes"], asset["filepath"], file_format)
+                       for asset in pending]
+        for obj in view_layer.objects:
+            obj.select_set(obj in selected)
+        view_layer.objects.active = active
+        if active and active.mode != active_mode:
+            bpy.ops.object.mode_set(mode=active_mode)
+
+    failures = []
+    for asset, result in zip(pending, results):
+        if result["status"] != "ok":
+            failures.append({"name": asset["armature"], "error": result.get("error", "")})
+            logger.error("Export of '%s' failed: %s", asset["armature"], result.get("error", ""))
+            continue
+        manifest["assets"][asset["armature"]] = {
+            "hash": asset["hash"],
+            "file": asset["file"],
+            "format": file_format,
+            "meshes": len(asset["meshes"]),
+            "actions": asset["actions"],
+            "hash_seconds": hash_seconds[asset["armature"]],
+            "export_seconds": result["seconds"],
+            "exported_at": time.time(),
+        }
+    summary = {
+        "finished_at": time.time(),
+        "blend": bpy.data.filepath,
+        "format": file_format,
+        "assets": len(pending) + skipped,
+        "exported": len(pending) - len(failures),
+        "skipped": skipped,
+        "failures": failures,
+        "jobs": jobs,
+        "hash_seconds": timer.stages.get("hash", 0.0),
+        "snapshot_seconds": timer.stages.get("snapshot", 0.0),
+        "export_seconds": timer.stages.get("export", 0.0),
+        "total_seconds": time.perf_counter() - run_start,
+    }
+    manifest["last_run"] = summary
+    write_export_manifest(directory, manifest)
+    return summary
+
+class ExportRiggedAssetsOperator(bpy.types.Operator):
+    """Export every QGS armature with its meshes and actions, skipping assets unchanged since the last export."""
+    bl_idname = "object.export_qgs_assets"
+    bl_label = "Export Rigged Assets"
+    bl_options = {'REGISTER'}
+
+    directory: bpy.props.StringProperty(
+        name="Directory",
+        description="Output folder; also holds the export manifest",
+        subtype='DIR_PATH',
+        default="//export"
+    )
+
+    file_format: bpy.props.EnumProperty(
+        name="Format",
+        items=[
+            ('GLB', "glTF Binary", "One .glb file per armature"),
+            ('GLTF', "glTF Separate", ".gltf with separate .bin and textures"),
+            ('FBX', "FBX", "One .fbx file per armature"),
+        ],
+        default='GLB'
+    )
+
+    jobs: bpy.props.IntProperty(
+        name="Processes",
+        description="Background Blender processes exporting at once (0: half the cores, 1: export here)",
+        default=0,
+        min=0,
+        max=64
+    )
+
+    force: bpy.props.BoolProperty(
+        name="Export All",
+        description="Export every asset even if it is unchanged since the last export",
+        default=False
+    )
 
     def execute(self, context):
-        obj = context.active_object
-        if not obj or obj.type != 'ARMATURE':
-            self.report({'ERROR'}, "Active object is not an armature.")
-            return {'CANCELLED'}
-        if context.mode != 'POSE':
-            self.report({'ERROR'}, "Armature must be in Pose Mode.")
+        if self.directory.startswith("//") and not bpy.data.filepath:
+            self.report({'ERROR'}, "Save the file first or choose an absolute export directory.")
             return {'CANCELLED'}
-        selected_bones = context.selected_pose_bones
-        if not selected_bones:
-            self.report({'ERROR'}, "No bone selected. Please select at least one bone.")
+        directory = bpy.path.abspath(self.directory)
+        timer = OperatorTimer(self.bl_idname)
+        try:
+            summary = export_changed_assets(
+                context.scene, directory, self.file_format, self.jobs, self.force, timer
+            )
+        except OSError as e:
+            self.report({'ERROR'}, f"Export failed: {e}")
+            timer.finish('CANCELLED')
             return {'CANCELLED'}
-        active_bone = context.active_pose_bone
-        if not active_bone:
-            self.report({'ERROR'}, "No active pose bone selected.")
+        if not summary["assets"]:
+            self.report({'WARNING'}, "No QGS armatures to export.")
+            timer.finish('CANCELLED')
             return {'CANCELLED'}
-        constraint = None
-        for con in active_bone.constraints:
-            if con.name == "QGS_ChildOf":
-                constraint = con
-                break
-        if constraint:
-            active_bone.constraints.remove(constraint)
-            self.report({'INFO'}, f"Child-of constraint removed from bone '{active_bone.name}'.")
+        message = f"Exported {summary['exported']} asset(s), {summary['skipped']} unchanged."
+        if summary["failures"]:
+            message += f" {len(summary['failures'])} failed; see the console."
+            self.report({'WARNING'}, message)
         else:
-            self.report({'INFO'}, "No Child-of constraint named 'QGS_ChildOf' found on the active bone.")
+            self.report({'INFO'}, message)
+        timer.finish()
         return {'FINISHED'}
 
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+# ------------------ Bone Transform Engine ------------------
+
+BONE_TRANSFORM_SPACES = [
+    ('LOCAL', "Local", "Each bone's own axes"),
+    ('ARMATURE', "Armature", "The armature object's axes"),
+    ('GLOBAL', "Global", "World axes"),
+    ('CUSTOM', "Custom", "The scene's active custom transform orientation"),
+]
+
+def bone_space_basis(context, obj, space):
+    """3x3 array whose columns are the axes of space in armature coordinates (None for LOCAL)."""
+    if space == 'LOCAL':
+        return None
+    if space == 'ARMATURE':
+        return np.identity(3)
+    world_to_armature = np.array(obj.matrix_world.to_3x3().inverted_safe())
+    if space == 'GLOBAL':
+        return world_to_armature
+    orientation = context.scene.transform_orientation_slots[0].custom_orientation
+    if orientation is None:
+        return None
+    return world_to_armature @ np.array(orientation.matrix)
+
+class EditBoneArrays:
+    """Heads, tails and selection of an armature's edit bones, read and written in one batch.
+
+    Transforms pivot on the heads and only move the tails of the selected, visible and
+    unlocked bones (the same set as context.selected_editable_bones): a bone counts as
+    hidden when it is hidden itself or when every bone collection it belongs to is.
+    """
+
+    def __init__(self, edit_bones):
+        self.edit_bones = edit_bones
+        count = len(edit_bones)
+        self.heads = self._read("head", count, 3, np.float32)
+        self.tails = self._read("tail", count, 3, np.float32)
+        self.mask = (
+            self._read("select", count, 1, bool)
+            & ~self._read("hide", count, 1, bool)
+            & ~self._read("lock", count, 1, bool)
+        )
+        # Collection visibility has no foreach_get; only the bones still in the mask are checked.
+        for index in np.flatnonzero(self.mask):
+            collections = edit_bones[int(index)].collections
+            if len(collections) and not any(
+                getattr(coll, "is_visible_effectively", coll.is_visible) for coll in collections
+            ):
+                self.mask[index] = False
+
+    def _read(self, prop, count, components, dtype):
+        values = np.empty(count * components, dtype=dtype)
+        self.edit_bones.foreach_get(prop, values)
+        return values.reshape(count, components) if components > 1 else values
+
+    @property
+    def selected_count(self):
+        return int(self.mask.sum())
+
+    def local_axes(self):
+        """(n, 3, 3) rotation of each selected bone; columns are its X, Y and Z axes."""
+        matrices = self._read("matrix", len(self.edit_bones), 16, np.float32)[self.mask]
+        # RNA matrices are flattened column by column.
+        return matrices.reshape(-1, 4, 4).transpose(0, 2, 1)[:, :3, :3].astype(np.float64)
+
+    def transform(self, mode, axis, amount, basis=None):
+        """Apply one operation to every selected bone vector at once.
+
+        mode is 'ROTATE' (amount in radians), 'SCALE' (amount is the factor along axis) or
+        'ALIGN' (point the bone along axis, amount is +1 or -1). basis comes from
+        bone_space_basis; None uses each bone's local axes.
+        """
+        heads = self.heads[self.mask].astype(np.float64)
+        vectors = self.tails[self.mask] - heads
+        bases = self.local_axes() if basis is None else basis[np.newaxis]
+        index = "XYZ".index(axis)
+        if mode == 'ALIGN':
+            directions = bases[:, :, index]
+            directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+            vectors = directions * (amount * np.linalg.norm(vectors, axis=1))[:, np.newaxis]
+        else:
+            if mode == 'ROTATE':
+                operation = np.array(mathutils.Matrix.Rotation(amount, 3, axis))
+            else:
+                operation = np.identity(3)
+                operation[index, index] = amount
+            matrices = bases @ operation @ np.linalg.inv(bases)
+            vectors = (matrices @ vectors[:, :, np.newaxis])[:, :, 0]
+        self.tails[self.mask] = heads + vectors
+
+    def write(self):
+        """Store the tails and move the heads of connected children along with their parents."""
+        self.edit_bones.foreach_set("tail", self.tails.ravel())
+        for index in np.flatnonzero(self.mask):
+            bone = self.edit_bones[int(index)]
+            for child in bone.children:
+                if child.use_connect:
+                    child.head = bone.tail
+
 class RotateBoneOperator(bpy.types.Operator):
+    """Rotate, scale or align the selected bones around their heads"""
     bl_idname = "armature.rotate_bones_edit"
     bl_label = "Rotate Bones Around Head"
     bl_options = {'REGISTER', 'UNDO'}
 
+    # Fixed axis and direction of the preset subclasses below; None uses the axis property.
+    preset_axis = None
+    preset_reverse = False
+
+    mode: bpy.props.EnumProperty(
+        items=[
+            ('ROTATE', "Rotate", "Rotate the bones by the scene's rotation angle"),
+            ('SCALE', "Scale", "Scale the bones along the axis"),
+            ('ALIGN', "Align", "Point the bones along the axis, keeping their length"),
+        ],
+        default='ROTATE'
+    )
+
     axis: bpy.props.EnumProperty(
         items=[('X', 'X Axis', ''), ('Y', 'Y Axis', ''), ('Z', 'Z Axis', '')],
         default='X'
@@ -481,79 +3367,854 @@ class RotateBoneOperator(bpy.types.Operator):
 
     reverse: bpy.props.BoolProperty(default=False)
 
+    space: bpy.props.EnumProperty(items=BONE_TRANSFORM_SPACES, default='ARMATURE')
+
+    factor: bpy.props.FloatProperty(name="Factor", default=2.0, min=0.001)
+
     def execute(self, context):
         obj = context.active_object
         if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
             self.report({'ERROR'}, "Must be in Edit Mode with an armature selected.")
             return {'CANCELLED'}
 
-        angle = context.scene.qgs_rotation_angle
-        if self.reverse:
-            angle = -angle
-
-        angle_rad = math.radians(angle)
-
-        for bone in context.selected_editable_bones:
-            head_pos = bone.head.copy()
-            tail_pos = bone.tail.copy()
-            vec = tail_pos - head_pos
+        axis = self.preset_axis or self.axis
+        reverse = self.reverse if self.preset_axis is None else self.preset_reverse
+        basis = bone_space_basis(context, obj, self.space)
+        if basis is None and self.space == 'CUSTOM':
+            self.report({'ERROR'}, "No custom transform orientation is active.")
+            return {'CANCELLED'}
 
-            rot_matrix = mathutils.Matrix.Rotation(angle_rad, 3, self.axis)
-            rotated_vec = rot_matrix @ vec
+        bones = EditBoneArrays(obj.data.edit_bones)
+        if not bones.selected_count:
+            self.report({'INFO'}, "No editable bones selected.")
+            return {'CANCELLED'}
 
-            bone.tail = bone.head + rotated_vec
+        if self.mode == 'ROTATE':
+            angle = -context.scene.qgs_rotation_angle if reverse else context.scene.qgs_rotation_angle
+            amount = math.radians(angle)
+            message = f"Bone tails rotated {angle}° around {axis}-axis."
+        elif self.mode == 'SCALE':
+            amount = 1.0 / self.factor if reverse else self.factor
+            message = f"Bones scaled by {amount:g} along {axis}-axis."
+        else:
+            amount = -1.0 if reverse else 1.0
+            message = f"Bones aligned to {'-' if reverse else '+'}{axis}-axis."
 
-        self.report({'INFO'}, f"Bone tails rotated {angle}° around {self.axis}-axis.")
+        bones.transform(self.mode, axis, amount, basis)
+        bones.write()
+        obj.data.update_tag()
+        self.report({'INFO'}, f"{message} ({bones.selected_count} bone(s), {self.space.lower()} space)")
         return {'FINISHED'}
 
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "mode")
+        layout.prop(self, "space")
+        if self.preset_axis is None:
+            layout.prop(self, "axis")
+            layout.prop(self, "reverse")
+        if self.mode == 'SCALE':
+            layout.prop(self, "factor")
+
 class RotateBonesXOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_x"
     bl_label = "Rotate Head 90° X"
-    def execute(self, context):
-        self.axis = 'X'
-        self.reverse = False
-        return super().execute(context)
+    preset_axis = 'X'
 
 class RotateBonesYOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_y"
     bl_label = "Rotate Bone 90° Y"
-    def execute(self, context):
-        self.axis = 'Y'
-        self.reverse = False
-        return super().execute(context)
+    preset_axis = 'Y'
 
 class RotateBonesZOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_z"
     bl_label = "Rotate Bone 90° Z"
-    def execute(self, context):
-        self.axis = 'Z'
-        self.reverse = False
-        return super().execute(context)
-    
+    preset_axis = 'Z'
+
 class RotateBonesXReverseOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_x_reverse"
     bl_label = "Rotate Bone -X"
-    def execute(self, context):
-        self.axis = 'X'
-        self.reverse = True
-        return super().execute(context)
+    preset_axis = 'X'
+    preset_reverse = True
 
 class RotateBonesYReverseOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_y_reverse"
     bl_label = "Rotate Bone -Y"
-    def execute(self, context):
-        self.axis = 'Y'
-        self.reverse = True
-        return super().execute(context)
+    preset_axis = 'Y'
+    preset_reverse = True
 
 class RotateBonesZReverseOperator(RotateBoneOperator):
     bl_idname = "armature.rotate_bones_z_reverse"
     bl_label = "Rotate Bone -Z"
-    def execute(self, context):
-        self.axis = 'Z'
-        self.reverse = True
-        return super().execute(context)
-    
+    preset_axis = 'Z'
+    preset_reverse = True
+
+# ------------------ Mesh Array Engine ------------------
+
+# Value key, component count and NumPy dtype used with foreach_get/foreach_set per attribute type.
+_ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ("value", 1, "float32"),
+    'INT': ("value", 1, "int32"),
+    'INT8': ("value", 1, "int32"),
+    'BOOLEAN': ("value", 1, "bool"),
+    'FLOAT2': ("vector", 2, "float32"),
+    'INT32_2D': ("value", 2, "int32"),
+    'FLOAT_VECTOR': ("vector", 3, "float32"),
+    'FLOAT_COLOR': ("color", 4, "float32"),
+    'BYTE_COLOR': ("color", 4, "float32"),
+    'QUATERNION': ("value", 4, "float32"),
+}
+
+def read_vertex_group_weights(mesh):
+    """Return (vertex, group, weight) arrays for every non-zero deform weight of mesh."""
+    verts = []
+    groups = []
+    weights = []
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh)
+        deform_layer = bm.verts.layers.deform.active
+        if deform_layer is not None:
+            for v in bm.verts:
+                items = v[deform_layer].items()
+                if not items:
+                    continue
+                index = v.index
+                for group_index, weight in items:
+                    if weight > 0:
+                        verts.append(index)
+                        groups.append(group_index)
+                        weights.append(weight)
+    finally:
+        bm.free()
+    return (
+        np.array(verts, dtype=np.int32),
+        np.array(groups, dtype=np.int32),
+        np.array(weights, dtype=np.float32),
+    )
+
+def add_vertex_weights(groups, verts, group_indices, values):
+    """Assign (vertex, group index, weight) triples to the vertex groups in groups.
+
+    One group.add call per distinct (group, weight) pair; rigid parts need just one per group.
+    """
+    if not len(verts):
+        return
+    order = np.lexsort((values, group_indices))
+    sorted_verts = verts[order]
+    sorted_groups = group_indices[order]
+    sorted_values = values[order]
+    changes = (sorted_groups[1:] != sorted_groups[:-1]) | (sorted_values[1:] != sorted_values[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(changes) + 1))
+    ends = np.append(starts[1:], len(order))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        groups[int(sorted_groups[start])].add(sorted_verts[start:end].tolist(), float(sorted_values[start]), 'REPLACE')
+
+class MeshArrays:
+    """Flat NumPy copy of a mesh: topology, generic attributes, UVs, custom normals,
+    materials, shape keys and (optionally) vertex group weights.
+
+    Lets the add-on split, merge and rebuild meshes with foreach_get/foreach_set
+    instead of mode switches and mesh operators.
+    """
+
+    def __init__(self):
+        self.co = np.empty((0, 3), dtype=np.float32)
+        self.edge_verts = np.empty((0, 2), dtype=np.int32)
+        self.loop_vert = np.empty(0, dtype=np.int32)
+        self.loop_edge = np.empty(0, dtype=np.int32)
+        self.loop_start = np.empty(0, dtype=np.int32)
+        self.loop_total = np.empty(0, dtype=np.int32)
+        # (name, data_type, domain, array of shape (n, components))
+        self.attributes = []
+        self.uv_names = []
+        self.active_uv = -1
+        self.custom_normals = None
+        self.materials = []
+        self.group_names = []
+        self.weight_verts = np.empty(0, dtype=np.int32)
+        self.weight_groups = np.empty(0, dtype=np.int32)
+        self.weight_values = np.empty(0, dtype=np.float32)
+        # [name, relative key, value, slider min, slider max, mute, vertex group, interpolation]
+        # per key block, and the block positions as an array of shape (blocks, vertices, 3).
+        self.shape_keys = []
+        self.shape_key_co = np.empty((0, 0, 3), dtype=np.float32)
+        self.shape_key_use_relative = True
+
+    @property
+    def vertex_count(self):
+        return len(self.co)
+
+    @property
+    def face_count(self):
+        return len(self.loop_start)
+
+    @classmethod
+    def from_mesh(cls, mesh, group_names=None):
+        """Read mesh in one batch. Pass the owner's vertex group names to include weights."""
+        arrays = cls()
+        v_count = len(mesh.vertices)
+        e_count = len(mesh.edges)
+        l_count = len(mesh.loops)
+        f_count = len(mesh.polygons)
+
+        arrays.co = np.empty(v_count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", arrays.co)
+        arrays.co.shape = (v_count, 3)
+        arrays.edge_verts = np.empty(e_count * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", arrays.edge_verts)
+        arrays.edge_verts.shape = (e_count, 2)
+        arrays.loop_vert = np.empty(l_count, dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", arrays.loop_vert)
+        arrays.loop_edge = np.empty(l_count, dtype=np.int32)
+        mesh.loops.foreach_get("edge_index", arrays.loop_edge)
+        arrays.loop_start = np.empty(f_count, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_start", arrays.loop_start)
+        arrays.loop_total = np.empty(f_count, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", arrays.loop_total)
+
+        domain_sizes = {'POINT': v_count, 'EDGE': e_count, 'CORNER': l_count, 'FACE': f_count}
+        for attr in mesh.attributes:
+            if attr.name.startswith(".") or attr.name == "position":
+                continue
+            layout = _ATTRIBUTE_LAYOUTS.get(attr.data_type)
+            size = domain_sizes.get(attr.domain)
+            if layout is None or size is None:
+                continue
+            key, components, dtype = layout
+            values = np.empty(size * components, dtype=dtype)
+            attr.data.foreach_get(key, values)
+            arrays.attributes.append((attr.name, attr.data_type, attr.domain, values.reshape(size, components)))
+
+        arrays.uv_names = [uv.name for uv in mesh.uv_layers]
+        arrays.active_uv = mesh.uv_layers.active_index if mesh.uv_layers else -1
+
+        if mesh.has_custom_normals:
+            if hasattr(mesh, "calc_normals_split"):
+                mesh.calc_normals_split()
+            normals = np.empty(l_count * 3, dtype=np.float32)
+            mesh.loops.foreach_get("normal", normals)
+            arrays.custom_normals = normals.reshape(l_count, 3)
+
+        arrays.materials = list(mesh.materials)
+
+        if mesh.shape_keys is not None and mesh.shape_keys.key_blocks:
+            blocks = mesh.shape_keys.key_blocks
+            arrays.shape_key_use_relative = mesh.shape_keys.use_relative
+            arrays.shape_keys = [
+                [block.name, block.relative_key.name, block.value, block.slider_min, block.slider_max,
+                 block.mute, block.vertex_group, block.interpolation]
+                for block in blocks
+            ]
+            arrays.shape_key_co = np.empty((len(blocks), v_count, 3), dtype=np.float32)
+            for i, block in enumerate(blocks):
+                block.data.foreach_get("co", arrays.shape_key_co[i].ravel())
+
+        if group_names is not None:
+            arrays.group_names = list(group_names)
+            arrays.weight_verts, arrays.weight_groups, arrays.weight_values = read_vertex_group_weights(mesh)
+        return arrays
+
+    _ARRAY_FIELDS = (
+        "co", "edge_verts", "loop_vert", "loop_edge", "loop_start", "loop_total",
+        "weight_verts", "weight_groups", "weight_values",
+    )
+
+    def to_arrays(self):
+        """Flatten into a dict of NumPy arrays (metadata as a JSON string), e.g. for np.savez."""
+        data = {name: getattr(self, name) for name in self._ARRAY_FIELDS}
+        for i, (_, _, _, values) in enumerate(self.attributes):
+            data[f"attribute_{i}"] = values
+        if self.custom_normals is not None:
+            data["custom_normals"] = self.custom_normals
+        meta = {
+            "attributes": [[name, data_type, domain] for name, data_type, domain, _ in self.attributes],
+            "uv_names": self.uv_names,
+            "active_uv": self.active_uv,
+            "materials": [material.name if material else None for material in self.materials],
+            "group_names": self.group_names,
+        }
+        # Only present when there are shape keys, so other meshes keep their content hash.
+        if self.shape_keys:
+            data["shape_key_co"] = self.shape_key_co
+            meta["shape_keys"] = self.shape_keys
+            meta["shape_key_use_relative"] = self.shape_key_use_relative
+        data["meta"] = np.array(json.dumps(meta))
+        return data
+
+    @classmethod
+    def from_arrays(cls, data):
+        """Inverse of to_arrays(); materials are looked up by name in the current file."""
+        arrays = cls()
+        for name in cls._ARRAY_FIELDS:
+            setattr(arrays, name, np.asarray(data[name]))
+        meta = json.loads(str(data["meta"]))
+        arrays.attributes = [
+            (name, data_type, domain, np.asarray(data[f"attribute_{i}"]))
+            for i, (name, data_type, domain) in enumerate(meta["attributes"])
+        ]
+        if "custom_normals" in data:
+            arrays.custom_normals = np.asarray(data["custom_normals"])
+        arrays.uv_names = meta["uv_names"]
+        arrays.active_uv = meta["active_uv"]
+        arrays.materials = [bpy.data.materials.get(name) if name else None for name in meta["materials"]]
+        arrays.group_names = meta["group_names"]
+        if "shape_key_co" in data:
+            arrays.shape_key_co = np.asarray(data["shape_key_co"])
+            arrays.shape_keys = meta["shape_keys"]
+            arrays.shape_key_use_relative = meta["shape_key_use_relative"]
+        return arrays
+
+    @classmethod
+    def concatenate(cls, parts, matrices=None):
+        """Merge several MeshArrays into one, the way Object > Join does.
+
+        matrices holds one 4x4 array per part (None to keep a part as is) that moves it into
+        the space of the result. Attributes and UV maps are matched by name and zero-filled
+        where a part lacks them; materials and vertex groups are merged by identity and name
+        and their indices remapped. Parts without custom normals get zero normals, which
+        Blender treats as "keep the automatic normal".
+        """
+        if matrices is None:
+            matrices = [None] * len(parts)
+        result = cls()
+
+        group_lookup = {}
+        materials = []
+        material_maps = []
+        for part in parts:
+            for name in part.group_names:
+                group_lookup.setdefault(name, len(group_lookup))
+            material_map = []
+            for material in part.materials:
+                if material not in materials:
+                    materials.append(material)
+                material_map.append(materials.index(material))
+            material_maps.append(material_map)
+
+        cos, edges, loop_verts, loop_edges, loop_starts, normals = [], [], [], [], [], []
+        weight_verts, weight_groups = [], []
+        has_normals = any(part.custom_normals is not None for part in parts)
+        v_offset = e_offset = l_offset = 0
+        for part, matrix in zip(parts, matrices):
+            co = part.co
+            part_normals = part.custom_normals
+            if matrix is not None:
+                matrix = np.asarray(matrix, dtype=np.float64)
+                linear = matrix[:3, :3]
+                co = (co @ linear.T + matrix[:3, 3]).astype(np.float32)
+                if part_normals is not None:
+                    # Normals transform with the inverse transpose of the linear part.
+                    part_normals = part_normals @ np.linalg.inv(linear)
+                    lengths = np.linalg.norm(part_normals, axis=1, keepdims=True)
+                    part_normals = (part_normals / np.where(lengths > 0, lengths, 1.0)).astype(np.float32)
+            cos.append(co)
+            edges.append(part.edge_verts + v_offset)
+            loop_verts.append(part.loop_vert + v_offset)
+            loop_edges.append(part.loop_edge + e_offset)
+            loop_starts.append(part.loop_start + l_offset)
+            if has_normals:
+                normals.append(part_normals if part_normals is not None else np.zeros((len(part.loop_vert), 3), dtype=np.float32))
+            group_remap = np.array([group_lookup[name] for name in part.group_names], dtype=np.int32)
+            weight_verts.append(part.weight_verts + v_offset)
+            weight_groups.append(group_remap[part.weight_groups])
+            v_offset += part.vertex_count
+            e_offset += len(part.edge_verts)
+            l_offset += len(part.loop_vert)
+
+        result.co = np.concatenate(cos).astype(np.float32)
+        result.edge_verts = np.concatenate(edges).astype(np.int32).reshape(-1, 2)
+        result.loop_vert = np.concatenate(loop_verts).astype(np.int32)
+        result.loop_edge = np.concatenate(loop_edges).astype(np.int32)
+        result.loop_start = np.concatenate(loop_starts).astype(np.int32)
+        result.loop_total = np.concatenate([part.loop_total for part in parts]).astype(np.int32)
+        if has_normals:
+            result.custom_normals = np.concatenate(normals)
+        result.group_names = list(group_lookup)
+        result.weight_verts = np.concatenate(weight_verts).astype(np.int32)
+        result.weight_groups = np.concatenate(weight_groups).astype(np.int32)
+        result.weight_values = np.concatenate([part.weight_values for part in parts]).astype(np.float32)
+        result.materials = materials
+
+        attribute_specs = {}
+        for part in parts:
+            for name, data_type, domain, _ in part.attributes:
+                attribute_specs.setdefault(name, (data_type, domain))
+        if len(materials) > 1:
+            attribute_specs.setdefault("material_index", ('INT', 'FACE'))
+        for name, (data_type, domain) in attribute_specs.items():
+            _, components, dtype = _ATTRIBUTE_LAYOUTS[data_type]
+            chunks = []
+            for part, material_map in zip(parts, material_maps):
+                values = next(
+                    (v for n, t, d, v in part.attributes if n == name and t == data_type and d == domain), None
+                )
+                if values is None:
+                    size = {
+                        'POINT': part.vertex_count, 'EDGE': len(part.edge_verts),
+                        'CORNER': len(part.loop_vert), 'FACE': part.face_count,
+                    }[domain]
+                    values = np.zeros((size, components), dtype=dtype)
+                if name == "material_index" and material_map:
+                    lookup = np.array(material_map, dtype=values.dtype)
+                    values = lookup[np.clip(values, 0, len(lookup) - 1)]
+                chunks.append(values)
+            result.attributes.append((name, data_type, domain, np.concatenate(chunks)))
+
+        for part in parts:
+            for uv_name in part.uv_names:
+                if uv_name not in result.uv_names:
+                    result.uv_names.append(uv_name)
+        first = parts[0] if parts else None
+        if first is not None and first.active_uv >= 0:
+            result.active_uv = result.uv_names.index(first.uv_names[first.active_uv])
+        elif result.uv_names:
+            result.active_uv = 0
+        return result
+
+    def content_hash(self):
+        """Digest of the geometry and metadata; identical meshes hash the same."""
+        import hashlib
+
+        digest = hashlib.blake2b(digest_size=20)
+        data = self.to_arrays()
+        for name in sorted(data):
+            values = np.ascontiguousarray(data[name])
+            digest.update(f"{name}:{values.dtype.str}:{values.shape};".encode("utf-8"))
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def dominant_vertex_groups(self):
+        """Per vertex, the index of its highest-weighted group (-1 when unassigned)."""
+        dominant = np.full(self.vertex_count, -1, dtype=np.int32)
+        if not len(self.weight_verts):
+            return dominant
+        order = np.lexsort((self.weight_groups, -self.weight_values, self.weight_verts))
+        sorted_verts = self.weight_verts[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_verts[1:] != sorted_verts[:-1]
+        dominant[sorted_verts[first]] = self.weight_groups[order][first]
+        return dominant
+
+    def face_groups(self, vertex_groups=None):
+        """Per face, the group most of its corners belong to (-1 when none of them is assigned)."""
+        if vertex_groups is None:
+            vertex_groups = self.dominant_vertex_groups()
+        result = np.full(self.face_count, -1, dtype=np.int32)
+        corner_groups = vertex_groups[self.loop_vert]
+        corner_faces = np.repeat(np.arange(self.face_count, dtype=np.int64), self.loop_total)
+        assigned = corner_groups >= 0
+        if not assigned.any():
+            return result
+        stride = max(len(self.group_names), int(corner_groups.max()) + 1)
+        keys, counts = np.unique(corner_faces[assigned] * stride + corner_groups[assigned], return_counts=True)
+        faces = keys // stride
+        groups = keys % stride
+        order = np.lexsort((groups, -counts, faces))
+        faces = faces[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = faces[1:] != faces[:-1]
+        result[faces[first]] = groups[order][first]
+        return result
+
+    def loose_edges(self):
+        used = np.zeros(len(self.edge_verts), dtype=bool)
+        used[self.loop_edge] = True
+        return ~used
+
+    def loose_verts(self):
+        used = np.zeros(self.vertex_count, dtype=bool)
+        used[self.edge_verts.ravel()] = True
+        used[self.loop_vert] = True
+        return ~used
+
+    def subset(self, face_mask, edge_mask=None, vert_mask=None):
+        """Return the part of the mesh made of the masked faces plus any extra masked
+        (loose) edges and vertices. Shared edges and vertices are duplicated, like mesh.separate."""
+        face_index = np.flatnonzero(face_mask)
+        totals = self.loop_total[face_index]
+        new_starts = np.cumsum(totals) - totals
+        loop_index = np.repeat(self.loop_start[face_index] - new_starts, totals) + np.arange(totals.sum())
+
+        keep_edges = np.zeros(len(self.edge_verts), dtype=bool)
+        keep_edges[self.loop_edge[loop_index]] = True
+        if edge_mask is not None:
+            keep_edges |= edge_mask
+        keep_verts = np.zeros(self.vertex_count, dtype=bool)
+        keep_verts[self.edge_verts[keep_edges].ravel()] = True
+        keep_verts[self.loop_vert[loop_index]] = True
+        if vert_mask is not None:
+            keep_verts |= vert_mask
+
+        vert_remap = np.cumsum(keep_verts, dtype=np.int32) - 1
+        edge_remap = np.cumsum(keep_edges, dtype=np.int32) - 1
+
+        part = MeshArrays()
+        part.co = self.co[keep_verts]
+        part.edge_verts = vert_remap[self.edge_verts[keep_edges]]
+        part.loop_vert = vert_remap[self.loop_vert[loop_index]]
+        part.loop_edge = edge_remap[self.loop_edge[loop_index]]
+        part.loop_start = new_starts.astype(np.int32)
+        part.loop_total = totals
+        selectors = {'POINT': keep_verts, 'EDGE': keep_edges, 'FACE': face_index, 'CORNER': loop_index}
+        part.attributes = [
+            (name, data_type, domain, values[selectors[domain]])
+            for name, data_type, domain, values in self.attributes
+        ]
+        part.uv_names = list(self.uv_names)
+        part.active_uv = self.active_uv
+        if self.custom_normals is not None:
+            part.custom_normals = self.custom_normals[loop_index]
+        part.materials = list(self.materials)
+        part.group_names = list(self.group_names)
+        weighted = keep_verts[self.weight_verts]
+        part.weight_verts = vert_remap[self.weight_verts[weighted]]
+        part.weight_groups = self.weight_groups[weighted]
+        part.weight_values = self.weight_values[weighted]
+        if self.shape_keys:
+            part.shape_keys = [list(block) for block in self.shape_keys]
+            part.shape_key_co = self.shape_key_co[:, keep_verts]
+            part.shape_key_use_relative = self.shape_key_use_relative
+        return part
+
+    def to_mesh(self, name):
+        """Create a new mesh data-block from the arrays."""
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(self.vertex_count)
+        mesh.vertices.foreach_set("co", self.co.ravel())
+        mesh.edges.add(len(self.edge_verts))
+        mesh.edges.foreach_set("vertices", self.edge_verts.ravel())
+        mesh.loops.add(len(self.loop_vert))
+        mesh.loops.foreach_set("vertex_index", self.loop_vert)
+        mesh.loops.foreach_set("edge_index", self.loop_edge)
+        mesh.polygons.add(self.face_count)
+        mesh.polygons.foreach_set("loop_start", self.loop_start)
+        if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+            mesh.polygons.foreach_set("loop_total", self.loop_total)
+
+        for uv_name in self.uv_names:
+            mesh.uv_layers.new(name=uv_name, do_init=False)
+        if self.active_uv >= 0 and self.uv_names:
+            mesh.uv_layers.active_index = self.active_uv
+        for attr_name, data_type, domain, values in self.attributes:
+            attr = mesh.attributes.get(attr_name)
+            if attr is None or attr.data_type != data_type or attr.domain != domain:
+                attr = mesh.attributes.new(attr_name, data_type, domain)
+            attr.data.foreach_set(_ATTRIBUTE_LAYOUTS[data_type][0], values.ravel())
+
+        for material in self.materials:
+            mesh.materials.append(material)
+
+        mesh.update()
+        if self.custom_normals is not None:
+            if hasattr(mesh, "use_auto_smooth"):
+                mesh.use_auto_smooth = True
+            mesh.normals_split_custom_set(self.custom_normals)
+        return mesh
+
+    def apply_vertex_groups(self, obj):
+        """Recreate the stored vertex groups and weights on obj (whose data was built by to_mesh)."""
+        obj.vertex_groups.clear()
+        groups = [obj.vertex_groups.new(name=name) for name in self.group_names]
+        add_vertex_weights(groups, self.weight_verts, self.weight_groups, self.weight_values)
+        return groups
+
+    def apply_shape_keys(self, obj):
+        """Recreate the stored shape keys on obj (whose data was built by to_mesh).
+
+        Call after apply_vertex_groups, since key blocks can be limited to a vertex group.
+        """
+        if not self.shape_keys:
+            return
+        blocks = []
+        for (name, _, _, _, _, _, _, _), co in zip(self.shape_keys, self.shape_key_co):
+            block = obj.shape_key_add(name=name, from_mix=False)
+            block.data.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+            blocks.append(block)
+        key_blocks = obj.data.shape_keys.key_blocks
+        for block, (_, relative, value, slider_min, slider_max, mute, group, interpolation) in zip(blocks, self.shape_keys):
+            block.relative_key = key_blocks.get(relative, key_blocks[0])
+            block.slider_min = slider_min
+            block.slider_max = slider_max
+            block.value = value
+            block.mute = mute
+            block.vertex_group = group
+            block.interpolation = interpolation
+        obj.data.shape_keys.use_relative = self.shape_key_use_relative
+
+class MeshSnapshot:
+    """Compact NumPy copy of an object's mesh and placement, taken before separation.
+
+    Only a small record (names, placement, content key) lives in the .blend; the
+    geometry goes to the BackupStore and is loaded lazily when a restore needs it.
+    Restoring rebuilds the object straight from the arrays, so the cost does not depend
+    on how many pieces the mesh was split into.
+    """
+
+    def __init__(self, object_name, mesh_name, matrix_world, collection_names, key=None, arrays=None, pieces=()):
+        self.object_name = object_name
+        self.mesh_name = mesh_name
+        self.matrix_world = matrix_world
+        self.collection_names = collection_names
+        self.key = key
+        self.pieces = list(pieces)
+        self._arrays = arrays
+
+    @classmethod
+    def capture(cls, obj):
+        return cls(
+            obj.name,
+            obj.data.name,
+            [value for row in obj.matrix_world for value in row],
+            [coll.name for coll in obj.users_collection],
+            arrays=MeshArrays.from_mesh(obj.data, [vg.name for vg in obj.vertex_groups]),
+        )
+
+    @property
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = get_backup_store().load(self.key)
+        return self._arrays
+
+    def release(self):
+        """Drop the in-memory arrays; they are reloaded from the store if needed."""
+        if self.key is not None:
+            self._arrays = None
+
+    def to_record(self):
+        return {
+            "object": self.object_name,
+            "mesh": self.mesh_name,
+            "matrix_world": self.matrix_world,
+            "collections": self.collection_names,
+            "key": self.key,
+            "pieces": self.pieces,
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(
+            record["object"],
+            record["mesh"],
+            record["matrix_world"],
+            record["collections"],
+            key=record["key"],
+            pieces=record.get("pieces", ()),
+        )
+
+    def restore(self, scene):
+        """Create a new object from the snapshot, linked where the original was."""
+        arrays = self.arrays
+        mesh = arrays.to_mesh(self.mesh_name)
+        mesh.name = self.mesh_name
+        obj = bpy.data.objects.new(self.object_name, mesh)
+        obj.name = self.object_name
+        arrays.apply_vertex_groups(obj)
+        arrays.apply_shape_keys(obj)
+        obj.matrix_world = mathutils.Matrix([self.matrix_world[i:i + 4] for i in range(0, 16, 4)])
+        collections = [bpy.data.collections.get(name) for name in self.collection_names]
+        collections = [coll for coll in collections if coll is not None] or [scene.collection]
+        for coll in collections:
+            coll.objects.link(obj)
+        return obj
+
+# ------------------ Backup Store ------------------
+
+BACKUP_DIR_ENV = "QGS_BACKUP_DIR"
+DEFAULT_BACKUP_CACHE_MB = 2048
+
+class BackupStore:
+    """Compressed mesh backups on disk, one .npz file per content hash.
+
+    Identical meshes are stored once. When the directory grows past max_bytes the least
+    recently used files are evicted, except the ones still referenced by open scenes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def save(self, arrays):
+        """Store arrays (if not already present) and return their key."""
+        key = arrays.content_hash()
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return key
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays.to_arrays())
+        os.replace(tmp_path, path)
+        self.evict(protected={key} | referenced_backup_keys())
+        return key
+
+    def load(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Backup '{key}' is no longer in the cache at '{self.directory}'")
+        os.utime(path)
+        with np.load(path, allow_pickle=False) as data:
+            return MeshArrays.from_arrays({name: data[name] for name in data.files})
+
+    def evict(self, protected=()):
+        """Remove least recently used backups until the store fits in max_bytes."""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".npz")]
+        except OSError:
+            return 0
+        entries = []
+        total = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path, name[:-4]))
+            total += stat.st_size
+        removed = 0
+        for _, size, path, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in protected:
+                continue
+            os.remove(path)
+            total -= size
+            removed += 1
+            logger.debug("Evicted backup '%s' from the cache.", key)
+        return removed
+
+def get_backup_store():
+    prefs = get_addon_preferences()
+    directory = bpy.path.abspath(prefs.backup_dir) if prefs and prefs.backup_dir else os.environ.get(BACKUP_DIR_ENV, "")
+    if not directory:
+        directory = bpy.utils.user_resource('CONFIG', path=os.path.join("quick_gun_setup", "backups"), create=True)
+    max_mb = prefs.backup_cache_mb if prefs else DEFAULT_BACKUP_CACHE_MB
+    return BackupStore(directory, max_mb * 1024 * 1024)
+
+# Set on every piece of a separation (and on what is left of the original) to the key of
+# the backup it came from, so Delete All finds the pieces even after they were renamed or joined.
+BACKUP_KEY_PROP = "QGS_backup_key"
+
+def get_scene_backups(scene):
+    """The MeshSnapshot records stored on scene, oldest first."""
+    return [MeshSnapshot.from_record(record) for record in json.loads(scene.get("QGS_backups", "[]"))]
+
+def referenced_backup_keys():
+    return {snapshot.key for scene in bpy.data.scenes for snapshot in get_scene_backups(scene)}
+
+def push_scene_backup(scene, snapshot):
+    """Write the snapshot's geometry to the store (unless already saved) and append its record to the scene."""
+    if snapshot.key is None:
+        snapshot.key = get_backup_store().save(snapshot.arrays)
+    records = json.loads(scene.get("QGS_backups", "[]"))
+    records.append(snapshot.to_record())
+    scene["QGS_backups"] = json.dumps(records)
+
+def pop_scene_backups(scene):
+    """Remove and return every backup record of the scene, oldest first."""
+    snapshots = get_scene_backups(scene)
+    if "QGS_backups" in scene:
+        del scene["QGS_backups"]
+    return snapshots
+
+def set_scene_backups(scene, snapshots):
+    """Replace the backup records of the scene with snapshots."""
+    if snapshots:
+        scene["QGS_backups"] = json.dumps([snapshot.to_record() for snapshot in snapshots])
+    elif "QGS_backups" in scene:
+        del scene["QGS_backups"]
+
+def separate_by_vertex_groups(obj, arrays=None):
+    """Split obj into one new object per occupied vertex group, reading the mesh once.
+
+    Every face goes to the group most of its corners are dominantly weighted to; loose
+    edges and vertices follow their own dominant group. Shape keys are carried over to
+    every piece, as mesh.separate does. Pass arrays if the mesh was already read. Returns the new objects (in vertex group order) and the MeshArrays of
+    the unassigned remainder (None if nothing is left).
+    """
+    group_names = [vg.name for vg in obj.vertex_groups]
+    if arrays is None:
+        arrays = MeshArrays.from_mesh(obj.data, group_names)
+    vertex_groups = arrays.dominant_vertex_groups()
+    face_groups = arrays.face_groups(vertex_groups)
+
+    loose_edges = arrays.loose_edges()
+    edge_groups = vertex_groups[arrays.edge_verts[:, 0]]
+    edge_groups = np.where(edge_groups >= 0, edge_groups, vertex_groups[arrays.edge_verts[:, 1]])
+    edge_groups[~loose_edges] = -2
+    loose_verts = arrays.loose_verts()
+    vert_groups = np.where(loose_verts, vertex_groups, -2)
+
+    collections = list(obj.users_collection)
+    new_objects = []
+    for group_index, group_name in enumerate(group_names):
+        face_mask = face_groups == group_index
+        edge_mask = edge_groups == group_index
+        vert_mask = vert_groups == group_index
+        if not (face_mask.any() or edge_mask.any() or vert_mask.any()):
+            continue
+        part = arrays.subset(face_mask, edge_mask, vert_mask)
+        new_obj = obj.copy()
+        new_obj.data = part.to_mesh(group_name)
+        part.apply_vertex_groups(new_obj)
+        part.apply_shape_keys(new_obj)
+        for coll in collections:
+            coll.objects.link(new_obj)
+        new_obj.name = group_name
+        new_objects.append(new_obj)
+
+    remainder_faces = face_groups == -1
+    remainder_edges = edge_groups == -1
+    remainder_verts = vert_groups == -1
+    remainder = None
+    if remainder_faces.any() or remainder_edges.any() or remainder_verts.any():
+        remainder = arrays.subset(remainder_faces, remainder_edges, remainder_verts)
+    return new_objects, remainder
+
+def merge_mesh_objects(target, others):
+    """Join others into target without bpy.ops, reading and writing each mesh in one batch.
+
+    Needs no view layer, selection or active object, so it also works in background mode.
+    target keeps its object settings and gets a new mesh holding everything in its local
+    space; the other objects and any meshes left without users are removed.
+    """
+    objects = [target] + [obj for obj in others if obj != target]
+    target_inverse = np.linalg.inv(np.array(target.matrix_world))
+    parts = []
+    matrices = []
+    for obj in objects:
+        group_names = [vg.name for vg in obj.vertex_groups] if obj.vertex_groups else None
+        parts.append(MeshArrays.from_mesh(obj.data, group_names))
+        matrices.append(None if obj == target else target_inverse @ np.array(obj.matrix_world))
+    merged = MeshArrays.concatenate(parts, matrices)
+
+    old_meshes = {obj.data for obj in objects}
+    mesh_name = target.data.name
+    target.data = merged.to_mesh(mesh_name)
+    merged.apply_vertex_groups(target)
+    if len(objects) > 1:
+        bpy.data.batch_remove(objects[1:])
+    orphans = [mesh for mesh in old_meshes if mesh.users == 0]
+    if orphans:
+        bpy.data.batch_remove(orphans)
+    target.data.name = mesh_name
+    return target
+
+def join_mesh_objects(context, target, others):
+    """Join others into target, falling back to bpy.ops.object.join for meshes with shape keys,
+    which MeshArrays does not carry. Returns the joined object."""
+    objects = [target] + list(others)
+    if not any(obj.data.shape_keys for obj in objects):
+        return merge_mesh_objects(target, others)
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in objects:
+        obj.select_set(True)
+    context.view_layer.objects.active = target
+    bpy.ops.object.join()
+    return context.active_object
+
 # ------------------ Join and Separate Operators ------------------
 
 class JoinObjectsOperator(bpy.types.Operator):
@@ -566,112 +4227,199 @@ class JoinObjectsOperator(bpy.types.Operator):
         if len(selected_meshes) < 2:
             self.report({'INFO'}, "Need at least two mesh objects to join.")
             return {'CANCELLED'}
+        timer = OperatorTimer(self.bl_idname)
         new_name = context.scene.join_objects_name
-        context.view_layer.objects.active = selected_meshes[0]
-        bpy.ops.object.join()
-        joined_obj = context.active_object
+        if context.object and context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for o in selected_meshes[1:]:
+            qgs_change_index.discard_object(o)
+        with timer.stage("join"):
+            joined_obj = join_mesh_objects(context, selected_meshes[0], selected_meshes[1:])
         if joined_obj:
+            context.view_layer.objects.active = joined_obj
+            joined_obj.select_set(True)
             joined_obj.name = new_name
             if joined_obj.data:
                 joined_obj.data.name = new_name
             joined_obj["QGS"] = True
-            print(f"DEBUG: Marked joined object '{joined_obj.name}' as QGS.")
+            qgs_change_index.refresh_object(joined_obj)
+            logger.debug("Marked joined object '%s' as QGS.", joined_obj.name)
             self.report({'INFO'}, f"Joined objects into '{new_name}' (QGS flagged).")
         else:
             self.report({'INFO'}, "No joined object found.")
+        timer.finish()
         return {'FINISHED'}
 
 class SeparateVertexGroupsOperator(bpy.types.Operator):
     """
     Separates the active mesh into separate objects based on its vertex groups,
     guaranteeing exactly one new object per group.
-    Also creates a non-physical backup of the mesh data.
+    Also stores a compressed backup of the mesh data in the backup cache.
     """
     bl_idname = "object.separate_vertex_groups"
     bl_label = "Separate Vertex Groups"
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        print("DEBUG: Starting SeparateVertexGroupsOperator...")
+        logger.debug("Starting SeparateVertexGroupsOperator...")
 
         original_obj = context.active_object
         if not original_obj or original_obj.type != 'MESH':
             self.report({'INFO'}, "Active object is not a mesh.")
-            print("DEBUG: Cancelled because active object is not a mesh.")
+            logger.debug("Cancelled because active object is not a mesh.")
             return {'CANCELLED'}
 
         if not original_obj.vertex_groups:
             self.report({'INFO'}, "Active mesh has no vertex groups.")
-            print("DEBUG: Cancelled because mesh has no vertex groups.")
+            logger.debug("Cancelled because mesh has no vertex groups.")
             return {'CANCELLED'}
 
-        backup_mesh = original_obj.data.copy()
-        backup_mesh.name = "BACKUP_" + original_obj.data.name
-        bpy.context.scene["QGS_backup_mesh_name"] = backup_mesh.name
-        print(f"DEBUG: Backup mesh data created with name '{backup_mesh.name}'.")
+        timer = OperatorTimer(self.bl_idname)
+        if original_obj.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
 
-        main_obj_name = original_obj.name
-        vgroup_names = [vg.name for vg in original_obj.vertex_groups]
+        with timer.stage("snapshot"):
+            snapshot = MeshSnapshot.capture(original_obj)
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        # Write the backup before touching any data: without it the original could not be restored.
+        with timer.stage("backup"):
+            try:
+                snapshot.key = get_backup_store().save(snapshot.arrays)
+            except OSError as e:
+                self.report({'ERROR'}, f"Could not write mesh backup; nothing was separated: {e}")
+                timer.finish('CANCELLED')
+                return {'CANCELLED'}
 
-        for vg_name in vgroup_names:
-            bpy.ops.mesh.select_all(action='DESELECT')
-            idx = original_obj.vertex_groups.find(vg_name)
-            if idx == -1:
-                continue
-            original_obj.vertex_groups.active_index = idx
-            bpy.ops.object.vertex_group_select()
-            bpy.ops.object.mode_set(mode='OBJECT')
-            selected_verts = [v for v in original_obj.data.vertices if v.select]
-            if not selected_verts:
-                print(f"DEBUG: Group '{vg_name}' has no assigned vertices; skipping.")
-                bpy.ops.object.mode_set(mode='EDIT')
-                continue
-            prev_objs = set(context.scene.objects)
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.separate(type='SELECTED')
-            bpy.ops.object.mode_set(mode='OBJECT')
-            new_objs = [obj for obj in context.scene.objects if obj not in prev_objs and obj.name != main_obj_name]
-            if not new_objs:
-                print(f"DEBUG: No new objects found for group '{vg_name}'.")
-                continue
-            if len(new_objs) == 1:
-                final_obj = new_objs[0]
-                print(f"DEBUG: Group '{vg_name}' => single object '{final_obj.name}'.")
-            else:
-                print(f"DEBUG: Group '{vg_name}' => multiple objects; joining them.")
-                bpy.ops.object.select_all(action='DESELECT')
-                for o in new_objs:
-                    o.select_set(True)
-                context.view_layer.objects.active = new_objs[0]
-                bpy.ops.object.join()
-                final_obj = context.active_object
-                print(f"DEBUG: Joined into final object '{final_obj.name}'.")
-            final_obj.name = vg_name
-            final_obj.data.name = vg_name
+        main_obj_name = original_obj.name
+        with timer.stage("separate"):
+            new_objs, remainder = separate_by_vertex_groups(original_obj, snapshot.arrays)
+        for final_obj in new_objs:
             final_obj["QGS"] = True
-            original_obj = bpy.data.objects.get(main_obj_name)
-            if not original_obj:
-                print("DEBUG: Original object lost during separation.")
-                self.report({'INFO'}, "Original object lost or removed.")
-                return {'CANCELLED'}
-            bpy.ops.object.select_all(action='DESELECT')
-            original_obj.select_set(True)
-            context.view_layer.objects.active = original_obj
-            bpy.ops.object.mode_set(mode='EDIT')
+            final_obj[BACKUP_KEY_PROP] = snapshot.key
+            qgs_change_index.refresh_object(final_obj)
+            logger.debug("Group '%s' => object '%s'.", final_obj.data.name, final_obj.name)
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-        original_obj = bpy.data.objects.get(main_obj_name)
-        if original_obj and len(original_obj.data.vertices) == 0:
-            print(f"DEBUG: Original object '{main_obj_name}' is empty; removing.")
+        snapshot.pieces = [o.name for o in new_objs]
+        push_scene_backup(context.scene, snapshot)
+        snapshot.release()
+        logger.debug("Backup of '%s' stored with key '%s'.", main_obj_name, snapshot.key)
+
+        bpy.ops.object.select_all(action='DESELECT')
+        for final_obj in new_objs:
+            final_obj.select_set(True)
+
+        if remainder is None:
+            logger.debug("Original object '%s' is empty; removing.", main_obj_name)
+            old_mesh = original_obj.data
+            qgs_change_index.discard_object(original_obj)
             bpy.data.objects.remove(original_obj, do_unlink=True)
+            if old_mesh.users == 0:
+                bpy.data.meshes.remove(old_mesh)
+            if new_objs:
+                context.view_layer.objects.active = new_objs[0]
             self.report({'INFO'}, "Original object was empty and removed.")
         else:
+            old_mesh = original_obj.data
+            mesh_name = old_mesh.name
+            original_obj.data = remainder.to_mesh(mesh_name)
+            remainder.apply_vertex_groups(original_obj)
+            remainder.apply_shape_keys(original_obj)
+            original_obj[BACKUP_KEY_PROP] = snapshot.key
+            if old_mesh.users == 0:
+                bpy.data.meshes.remove(old_mesh)
+                original_obj.data.name = mesh_name
+            original_obj.select_set(True)
+            context.view_layer.objects.active = original_obj
+            invalidate_separation_cache(original_obj)
+            qgs_change_index.refresh_object(original_obj)
             self.report({'INFO'}, "Mesh separated by vertex groups.")
-        print("DEBUG: Separation complete.")
+        logger.debug("Separation complete.")
+        timer.finish()
         return {'FINISHED'}
 
+# ------------------ Separation Preview Cache ------------------
+
+# Object session_uid -> (mesh session_uid, vertex group count, vertex count, occupied group indices).
+_separation_group_cache = {}
+
+def _compute_occupied_groups(obj):
+    """Return the indices of vertex groups holding at least one non-zero weight.
+
+    Reads the deform layer once instead of querying every group for every vertex.
+    """
+    occupied = set()
+    group_count = len(obj.vertex_groups)
+    in_edit_mode = obj.mode == 'EDIT'
+    if in_edit_mode:
+        bm = bmesh.from_edit_mesh(obj.data)
+    else:
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+    try:
+        deform_layer = bm.verts.layers.deform.active
+        if deform_layer is None:
+            return occupied
+        for v in bm.verts:
+            for group_index, weight in v[deform_layer].items():
+                if weight > 0:
+                    occupied.add(group_index)
+            if len(occupied) >= group_count:
+                break
+    finally:
+        if not in_edit_mode:
+            bm.free()
+    return occupied
+
+def get_occupied_vertex_groups(obj):
+    """Cached lookup of the vertex group indices of obj that contain geometry."""
+    key = obj.session_uid
+    mesh = obj.data
+    entry = _separation_group_cache.get(key)
+    if (
+        entry is not None
+        and entry[0] == mesh.session_uid
+        and entry[1] == len(obj.vertex_groups)
+        and entry[2] == len(mesh.vertices)
+    ):
+        return entry[3]
+    occupied = _compute_occupied_groups(obj)
+    _separation_group_cache[key] = (mesh.session_uid, len(obj.vertex_groups), len(mesh.vertices), occupied)
+    return occupied
+
+def invalidate_separation_cache(obj=None):
+    """Drop the cached occupancy of obj, or of every object when obj is None."""
+    if obj is None:
+        _separation_group_cache.clear()
+    else:
+        _separation_group_cache.pop(obj.session_uid, None)
+
+@persistent
+def _qgs_depsgraph_update_post(scene, depsgraph):
+    qgs_change_index.sync_depsgraph(depsgraph)
+    if not _separation_group_cache:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        id_orig = update.id.original
+        if isinstance(id_orig, bpy.types.Object):
+            _separation_group_cache.pop(id_orig.session_uid, None)
+        elif isinstance(id_orig, bpy.types.Mesh):
+            mesh_uid = id_orig.session_uid
+            stale = [k for k, entry in _separation_group_cache.items() if entry[0] == mesh_uid]
+            for k in stale:
+                del _separation_group_cache[k]
+
+@persistent
+def _qgs_load_post(*args):
+    _separation_group_cache.clear()
+    qgs_change_index.rebuild()
+
+@persistent
+def _qgs_undo_post(*args):
+    _separation_group_cache.clear()
+    qgs_change_index.mark_dirty()
+
 def is_QGS_mesh(obj):
     if obj.type != 'MESH':
         return False
@@ -687,95 +4435,162 @@ def is_QGS_mesh(obj):
 
 class UnlinkAddonOperator(bpy.types.Operator):
     """Delete all changes made with the add-on.
-       Re-joins QGS-affected meshes (even if only one exists),
-       then restores the original mesh data from backup (if available),
-       removes all QGS-related data, and finally sets location, rotation, scale to default.
+       If separation backups exist, deletes the separated pieces and rebuilds every
+       original object from its backup, placement included. Otherwise re-joins
+       QGS-affected meshes and sets location, rotation, scale to default.
+       Finally removes all QGS-related data.
     """
     bl_idname = "object.unlink_addon"
     bl_label = "Delete All Made By User"
 
     def execute(self, context):
-        print("DEBUG: Running UnlinkAddonOperator (Delete All Made By User)...")
+        logger.debug("Running UnlinkAddonOperator (Delete All Made By User)...")
+        timer = OperatorTimer(self.bl_idname)
 
         obj = context.object
         if obj and obj.type == 'ARMATURE' and obj.mode == 'POSE':
             bpy.ops.object.mode_set(mode='OBJECT')
-            print("DEBUG: Switched from Pose Mode to Object Mode before cleanup.")
+            logger.debug("Switched from Pose Mode to Object Mode before cleanup.")
 
-        if "QGS_backup_mesh_name" in bpy.context.scene:
-            backup_mesh_name = bpy.context.scene["QGS_backup_mesh_name"]
-            if backup_mesh_name in bpy.data.meshes:
-                QGS_meshes = [o for o in list(bpy.data.objects) if is_QGS_mesh(o)]
-                if QGS_meshes:
-                    bpy.ops.object.select_all(action='DESELECT')
-                    for o in QGS_meshes:
-                        o.select_set(True)
-                    context.view_layer.objects.active = QGS_meshes[0]
-                    bpy.ops.object.join()
-                    joined_obj = context.active_object
+        scene = context.scene
+        snapshots = []
+        failed = []
+        # Piece name -> the first snapshot it descends from. An original that was itself a
+        # piece of an earlier separation comes back with that one.
+        roots = {}
+        loaded = {}
+        loaded_keys = set()
+        for snapshot in pop_scene_backups(scene):
+            root = roots.get(snapshot.object_name)
+            if root is None:
+                root = snapshot
+                try:
+                    with timer.stage("load_backups"):
+                        snapshot.arrays
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Backup of '%s' could not be loaded: %s", snapshot.object_name, e)
+                    loaded[id(snapshot)] = False
                 else:
-                    joined_obj = context.active_object
+                    loaded[id(snapshot)] = True
+                    snapshots.append(snapshot)
+            for piece in snapshot.pieces:
+                roots[piece] = root
+            if loaded[id(root)]:
+                loaded_keys.add(snapshot.key)
+            else:
+                failed.append(snapshot)
+        # Pieces of backups that could not be loaded stay, and so do their records. Pieces are
+        # recognised by their backup key; names only count for pieces made before keys were stored.
+        failed_keys = {snapshot.key for snapshot in failed}
+        loaded_keys -= failed_keys
+        kept_names = {piece for snapshot in failed for piece in snapshot.pieces}
+        kept_names.update(snapshot.object_name for snapshot in failed)
 
-                if joined_obj and joined_obj.type == 'MESH':
-                    joined_obj.data = bpy.data.meshes[backup_mesh_name]
-                    joined_obj.name = context.scene.join_objects_name
-                    if joined_obj.data:
-                        joined_obj.data.name = context.scene.join_objects_name
-                    print(f"DEBUG: Restored backup mesh data to '{joined_obj.name}'.")
+        def is_kept_piece(o):
+            key = o.get(BACKUP_KEY_PROP)
+            return key in failed_keys if key else o.name in kept_names
 
-                for o in list(bpy.data.objects):
-                    if o.type == 'MESH' and o.get("QGS", False) and o != joined_obj:
-                        bpy.data.objects.remove(o, do_unlink=True)
-                        print(f"DEBUG: Removed extra QGS object '{o.name}'.")
+        set_scene_backups(scene, failed)
+        if failed:
+            self.report(
+                {'WARNING'},
+                f"{len(failed)} backup(s) could not be loaded and were kept, with their pieces: "
+                + ", ".join(snapshot.object_name for snapshot in failed)
+            )
 
-                del bpy.context.scene["QGS_backup_mesh_name"]
-                remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True)
+        backup_mesh = None
+        if "QGS_backup_mesh_name" in scene:
+            backup_mesh = bpy.data.meshes.get(scene["QGS_backup_mesh_name"])
+            if backup_mesh is None:
+                logger.debug("Backup mesh name not found in bpy.data.meshes.")
+            del scene["QGS_backup_mesh_name"]
 
-                if joined_obj:
-                    bpy.ops.object.select_all(action='DESELECT')
-                    joined_obj.select_set(True)
-                    context.view_layer.objects.active = joined_obj
-                    joined_obj.location = (0, 0, 0)
-                    joined_obj.rotation_euler = (0, 0, 0)
-                    joined_obj.scale = (1, 1, 1)
-                    print("DEBUG: Set final object's location=(0,0,0), rotation=(0,0,0), scale=(1,1,1).")
-
-                self.report(
-                    {'INFO'},
-                    "Backup restored; original mesh data recovered, and transforms set to defaults."
-                )
+        if snapshots or backup_mesh is not None:
+            # The separated pieces are simply deleted; the originals come back from the
+            # snapshots (or the legacy backup mesh), so nothing has to be joined first.
+            with timer.stage("remove_pieces"):
+                QGS_meshes = [
+                    o for o in bpy.data.objects if o.type == 'MESH' and not is_kept_piece(o)
+                    and (o.get(BACKUP_KEY_PROP) in loaded_keys or is_QGS_mesh(o))
+                ]
+                for snapshot in snapshots:
+                    # What is left of an original separated before keys were stored is found by name.
+                    leftover = bpy.data.objects.get(snapshot.object_name)
+                    if (leftover is not None and leftover.type == 'MESH' and BACKUP_KEY_PROP not in leftover
+                            and leftover not in QGS_meshes):
+                        QGS_meshes.append(leftover)
+                piece_meshes = {o.data for o in QGS_meshes}
+                for o in QGS_meshes:
+                    qgs_change_index.discard_object(o)
+                if QGS_meshes:
+                    bpy.data.batch_remove(QGS_meshes)
+                orphans = [m for m in piece_meshes if m.users == 0 and m != backup_mesh]
+                if orphans:
+                    bpy.data.batch_remove(orphans)
+            logger.debug("Removed %s separated QGS mesh object(s).", len(QGS_meshes))
 
-                if context.object and context.object.mode != 'OBJECT':
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                return {'FINISHED'}
-            else:
-                print("DEBUG: Backup mesh name not found in bpy.data.meshes.")
+            with timer.stage("restore"):
+                if snapshots:
+                    restored_objs = [snapshot.restore(scene) for snapshot in snapshots]
+                    if backup_mesh is not None and backup_mesh.users == 0:
+                        bpy.data.meshes.remove(backup_mesh)
+                else:
+                    name = scene.join_objects_name
+                    restored_obj = bpy.data.objects.new(name, backup_mesh)
+                    backup_mesh.name = name
+                    scene.collection.objects.link(restored_obj)
+                    restored_objs = [restored_obj]
+            logger.debug("Restored original mesh(es): %s", [o.name for o in restored_objs])
+
+            with timer.stage("cleanup"):
+                counts = remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True)
+            logger.debug("Removed QGS items: %s", counts)
 
-        QGS_meshes = [o for o in list(bpy.data.objects) if is_QGS_mesh(o)]
+            bpy.ops.object.select_all(action='DESELECT')
+            for restored_obj in restored_objs:
+                qgs_change_index.refresh_object(restored_obj)
+                restored_obj.select_set(True)
+            context.view_layer.objects.active = restored_objs[0]
+            if not snapshots:
+                # A legacy backup carries no placement; fall back to default transforms.
+                restored_obj.location = (0, 0, 0)
+                restored_obj.rotation_euler = (0, 0, 0)
+                restored_obj.scale = (1, 1, 1)
+                logger.debug("Set final object's location=(0,0,0), rotation=(0,0,0), scale=(1,1,1).")
+
+            self.report(
+                {'INFO'},
+                f"Backup restored; original mesh data recovered for {len(restored_objs)} object(s)."
+            )
+            timer.finish()
+            return {'FINISHED'}
+
+        QGS_meshes = [o for o in list(bpy.data.objects) if is_QGS_mesh(o) and not is_kept_piece(o)]
         if QGS_meshes:
-            print(f"DEBUG: Found {len(QGS_meshes)} QGS-affected mesh object(s).")
+            logger.debug("Found %s QGS-affected mesh object(s).", len(QGS_meshes))
             if len(QGS_meshes) > 1:
-                bpy.ops.object.select_all(action='DESELECT')
-                for o in QGS_meshes:
-                    o.select_set(True)
-                context.view_layer.objects.active = QGS_meshes[0]
-                bpy.ops.object.join()
-                joined_obj = context.active_object
+                for o in QGS_meshes[1:]:
+                    qgs_change_index.discard_object(o)
+                with timer.stage("join"):
+                    joined_obj = join_mesh_objects(context, QGS_meshes[0], QGS_meshes[1:])
                 if joined_obj:
                     joined_obj.name = context.scene.join_objects_name
                     if joined_obj.data:
                         joined_obj.data.name = context.scene.join_objects_name
-                    print(f"DEBUG: Rejoined QGS objects into '{joined_obj.name}'.")
+                    logger.debug("Rejoined QGS objects into '%s'.", joined_obj.name)
             else:
                 joined_obj = QGS_meshes[0]
-                print(f"DEBUG: Only one QGS-affected mesh found: '{joined_obj.name}'. No join necessary.")
+                logger.debug("Only one QGS-affected mesh found: '%s'. No join necessary.", joined_obj.name)
             if joined_obj and "QGS" in joined_obj:
                 del joined_obj["QGS"]
+                qgs_change_index.refresh_object(joined_obj)
         else:
-            print("DEBUG: No QGS-affected mesh objects found to rejoin.")
+            logger.debug("No QGS-affected mesh objects found to rejoin.")
             joined_obj = None
 
-        remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True)
+        with timer.stage("cleanup"):
+            counts = remove_existing_vertex_groups_modifiers_and_armature(keep_QGS_mesh=True)
+        logger.debug("Removed QGS items: %s", counts)
 
         if joined_obj:
             bpy.ops.object.select_all(action='DESELECT')
@@ -784,16 +4599,17 @@ class UnlinkAddonOperator(bpy.types.Operator):
             joined_obj.location = (0, 0, 0)
             joined_obj.rotation_euler = (0, 0, 0)
             joined_obj.scale = (1, 1, 1)
-            print("DEBUG: Set final object's location=(0,0,0), rotation=(0,0,0), scale=(1,1,1).")
+            logger.debug("Set final object's location=(0,0,0), rotation=(0,0,0), scale=(1,1,1).")
 
         if context.object and context.object.mode != 'OBJECT':
             bpy.ops.object.mode_set(mode='OBJECT')
 
-        print("DEBUG: Completed removal of QGS items, final object set to default transforms.")
+        logger.debug("Completed removal of QGS items, final object set to default transforms.")
         self.report(
             {'INFO'},
             "All QGS changes removed; mesh rejoined, transforms set to default."
         )
+        timer.finish()
         return {'FINISHED'}
 
 class DialogMessage(bpy.types.Operator):
@@ -811,6 +4627,60 @@ class DialogMessage(bpy.types.Operator):
     def draw(self, context):
         self.layout.label(text=self.message)
 
+# ------------------ Preferences ------------------
+
+class QGSAddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    log_level: bpy.props.EnumProperty(
+        name="Log Level",
+        description="Console messages printed by the add-on",
+        items=[
+            ('OFF', "Off", "Print nothing"),
+            ('ERROR', "Error", "Only errors"),
+            ('WARNING', "Warning", "Errors and warnings"),
+            ('INFO', "Info", "Progress messages"),
+            ('DEBUG', "Debug", "Per-object details and operator stage timings"),
+        ],
+        default='WARNING',
+        update=lambda self, context: apply_log_level(self.log_level),
+    )
+
+    timing_log_path: bpy.props.StringProperty(
+        name="Timing Log",
+        description="If set, append per-stage operator timings to this JSONL file",
+        subtype='FILE_PATH',
+        default=""
+    )
+
+    update_url: bpy.props.StringProperty(
+        name="Update URL",
+        description="Base URL (or local mirror) serving version.txt and __init__.py. Empty uses GitHub",
+        default=""
+    )
+
+    backup_dir: bpy.props.StringProperty(
+        name="Backup Cache",
+        description="Folder for compressed mesh backups made before separating. Empty uses the user config folder",
+        subtype='DIR_PATH',
+        default=""
+    )
+
+    backup_cache_mb: bpy.props.IntProperty(
+        name="Backup Cache Size (MB)",
+        description="Least recently used backups are evicted once the cache grows past this size",
+        default=DEFAULT_BACKUP_CACHE_MB,
+        min=16
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "log_level")
+        layout.prop(self, "timing_log_path")
+        layout.prop(self, "update_url")
+        layout.prop(self, "backup_dir")
+        layout.prop(self, "backup_cache_mb")
+
 # ------------------ Panel ------------------
 
 class ArmatureToolsPanel(bpy.types.Panel):
@@ -826,9 +4696,10 @@ class ArmatureToolsPanel(bpy.types.Panel):
         layout.label(text="Armature Options")
         layout.operator("object.armature_and_vertex_groups", text="Create Armature & Vertex Groups")
 
+        layout.operator("armature.auto_parent_selected_bones", text="Auto-Parent Selected Bones")
         row = layout.row(align=True)
-        row.operator("armature.auto_parent_selected_bones", text="Auto-Parent Selected Bones")
         row.operator("armature.reverse_auto_parent", text="Reverse Auto-Parent/Remove")
+        row.operator("armature.redo_auto_parent", text="Redo")
 
         layout.operator("armature.remove_parent_selected_bones", text="Remove Parent from Selected Bones")
 
@@ -836,6 +4707,9 @@ class ArmatureToolsPanel(bpy.types.Panel):
         row.operator("armature.add_child_of_constraint", text="Add Child-of Constraint")
         layout.prop(context.scene, "set_inverse_child_of", text="Set Inverse")
         row.operator("armature.remove_child_of_constraint", text="Remove Child-of Constraint")
+        layout.operator("armature.bake_child_of_constraints", text="Bake Child-of Constraints")
+        layout.operator("armature.generate_weapon_actions", text="Generate Weapon Actions")
+        layout.operator("object.export_qgs_assets", text="Export Rigged Assets")
         
         layout.label(text="Bone Rotation (Edit Mode)", icon='BONE_DATA')
         row = layout.row(align=True)
@@ -859,19 +4733,7 @@ class ArmatureToolsPanel(bpy.types.Panel):
 
         obj = context.active_object
         if obj and obj.type == 'MESH' and obj.vertex_groups:
-            sep_count = 0
-            for vg in obj.vertex_groups:
-                has_geom = False
-                for v in obj.data.vertices:
-                    try:
-                        w = vg.weight(v.index)
-                    except RuntimeError:
-                        w = 0
-                    if w > 0:
-                        has_geom = True
-                        break
-                if has_geom:
-                    sep_count += 1
+            sep_count = len(get_occupied_vertex_groups(obj))
             if sep_count < 2:
                 sep_count = 0
             layout.label(text=f"Will separate into {sep_count} object(s).")
@@ -888,6 +4750,9 @@ class ArmatureToolsPanel(bpy.types.Panel):
         layout.separator()
         layout.label(text="Online Updater", icon='FILE_REFRESH')
         layout.operator("addon.check_for_update", text="Check for Update", icon='FILE_REFRESH')
+        if update_status["message"]:
+            icon = {'AVAILABLE': 'INFO', 'ERROR': 'ERROR', 'CHECKING': 'TIME'}.get(update_status["state"], 'CHECKMARK')
+            layout.label(text=update_status["message"], icon=icon)
         layout.operator("addon.update_now", text="Update Now", icon='FILE_TICK')
 
 # ------------------ Registration ------------------
@@ -897,8 +4762,12 @@ classes = [
     AutoParentSelectedBonesOperator,
     RemoveParentSelectedBonesOperator,
     ReverseAutoParentChangeOperator,
+    RedoAutoParentChangeOperator,
     AddChildOfConstraintOperator,
     RemoveChildOfConstraintOperator,
+    BakeChildOfConstraintsOperator,
+    GenerateWeaponActionsOperator,
+    ExportRiggedAssetsOperator,
     JoinObjectsOperator,
     UnlinkAddonOperator,
     DialogMessage,
@@ -913,9 +4782,52 @@ classes = [
     ArmatureToolsPanel,
     CheckForUpdateOperator,
     UpdateNowOperator,
+    QGSAddonPreferences,
 ]
 
+# Drawing-only classes; not registered in background (-b) sessions where nothing is drawn.
+ui_classes = {ArmatureToolsPanel}
+
+STARTUP_PROFILE_ENV = "QGS_PROFILE_STARTUP"
+_HEAVY_MODULES = ("numpy", "urllib.request", "http.client", "ssl")
+
+def _report_startup_profile(timer):
+    """Print the import and register() cost, and which heavy modules are already loaded."""
+    record = timer.finish()
+    stages = record["stages"]
+    register_seconds = sum(seconds for name, seconds in stages.items() if name != "import")
+    loaded = [name for name in _HEAVY_MODULES if name in sys.modules]
+    sys.stderr.write(
+        f"QGS startup: import {stages['import'] * 1000.0:.2f} ms, register {register_seconds * 1000.0:.2f} ms "
+        f"({', '.join(f'{name}={seconds * 1000.0:.2f} ms' for name, seconds in stages.items() if name != 'import')}); "
+        f"heavy modules in sys.modules: {', '.join(loaded) or 'none'}\n"
+    )
+
 def register():
+    timer = OperatorTimer("addon.register")
+    timer.stages["import"] = _IMPORT_SECONDS
+
+    with timer.stage("properties"):
+        _register_scene_properties()
+
+    with timer.stage("classes"):
+        skip_ui = bpy.app.background
+        for cls in classes:
+            if skip_ui and cls in ui_classes:
+                continue
+            bpy.utils.register_class(cls)
+    apply_log_level()
+
+    with timer.stage("handlers"):
+        bpy.app.handlers.depsgraph_update_post.append(_qgs_depsgraph_update_post)
+        bpy.app.handlers.load_post.append(_qgs_load_post)
+        bpy.app.handlers.undo_post.append(_qgs_undo_post)
+        bpy.app.handlers.redo_post.append(_qgs_undo_post)
+
+    if os.environ.get(STARTUP_PROFILE_ENV):
+        _report_startup_profile(timer)
+
+def _register_scene_properties():
     bpy.types.Scene.set_inverse_child_of = bpy.props.BoolProperty(
         name="Set Inverse",
         description="If checked, automatically call Set Inverse for each new Child-of constraint",
@@ -934,15 +4846,27 @@ def register():
         max=360.0
     )
 
-    for cls in classes:
-        bpy.utils.register_class(cls)
-
 def unregister():
+    if bpy.app.timers.is_registered(_poll_update_check):
+        bpy.app.timers.unregister(_poll_update_check)
+    if _qgs_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_qgs_depsgraph_update_post)
+    if _qgs_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_qgs_load_post)
+    if _qgs_undo_post in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.remove(_qgs_undo_post)
+    if _qgs_undo_post in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.remove(_qgs_undo_post)
+    _separation_group_cache.clear()
+    qgs_change_index.mark_dirty()
     del bpy.types.Scene.set_inverse_child_of
     del bpy.types.Scene.join_objects_name
     del bpy.types.Scene.qgs_rotation_angle
     for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
+        if cls.is_registered:
+            bpy.utils.unregister_class(cls)
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 if __name__ == "__main__":
     register()
@@ -0,0 +1,412 @@
+"""Headless performance benchmarks for Quick Gun Setup.
+
+Run from a shell with:
+
+    blender -b --factory-startup --python benchmarks/run_benchmarks.py -- --parts 60 --verts 5000
+
+Generates a synthetic weapon assembly (one UV-sphere rod per part), times the add-on's
+main entry points and writes the results as JSON. The per-stage timings recorded by the
+operators themselves (see OperatorTimer) are included for the last repeat.
+
+Joining is also timed with bpy.ops.object.join on the same rigged assembly, as
+"join_bpy_ops", next to the add-on's array-based "join_objects".
+
+The Child Of "Set Inverse" path is timed separately on armatures of --child-of-bones
+sizes, next to the per-bone childof_set_inverse operator calls it replaces; the largest
+difference between the two sets of inverse matrices is reported with it.
+
+Vertex group creation is timed on a --vgroup-verts assembly split into --vgroup-parts
+meshes, next to the per-mesh active object switch, mode_set and vertex index list it
+replaces.
+
+Baking the QGS_ChildOf constraints of a --bake-bones armature over --bake-frames frames
+is timed next to a frame_set/keyframe_insert loop keying the same channels.
+
+Pass --baseline to compare against a stored result file; the run exits with status 1 if
+any entry point is slower than the baseline by more than --threshold. Pass
+--update-baseline to store the current run as the new baseline.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+import bmesh
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_MODULE = "quick_gun_setup"
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="run_benchmarks.py", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--parts", type=int, default=60, help="Number of parts in the synthetic assembly")
+    parser.add_argument("--verts", type=int, default=5000, help="Approximate vertex count per part")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of full pipeline runs")
+    parser.add_argument("--draw-repeat", type=int, default=20, help="Warm panel redraws timed per run")
+    parser.add_argument("--child-of-bones", default="50,200,800",
+                        help="Comma-separated bone counts for the Child Of Set Inverse scaling run")
+    parser.add_argument("--bake-bones", type=int, default=200, help="Bones in the Child Of bake run")
+    parser.add_argument("--bake-frames", type=int, default=250, help="Frames in the Child Of bake run")
+    parser.add_argument("--vgroup-verts", type=int, default=1_000_000,
+                        help="Total vertices of the assembly in the vertex group run")
+    parser.add_argument("--vgroup-parts", type=int, default=200, help="Meshes in the vertex group run")
+    parser.add_argument("--output", default="", help="Write results here instead of stdout")
+    parser.add_argument("--baseline", default="", help="Result file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the --baseline file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown ratio before failing")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Ignore slowdowns smaller than this (seconds)")
+    return parser.parse_args(argv)
+
+def load_addon():
+    """Import the add-on from this checkout and register it."""
+    spec = importlib.util.spec_from_file_location(
+        ADDON_MODULE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_MODULE] = module
+    spec.loader.exec_module(module)
+    module.register()
+    return module
+
+class _LayoutRecorder:
+    """Stands in for UILayout so ArmatureToolsPanel.draw can run without a window."""
+
+    def __getattr__(self, name):
+        return self._call
+
+    def _call(self, *args, **kwargs):
+        return self
+
+def reset_scene(addon):
+    ids = list(bpy.data.objects) + list(bpy.data.meshes) + list(bpy.data.armatures)
+    if ids:
+        bpy.data.batch_remove(ids)
+    scene = bpy.context.scene
+    for key in ("QGS_backup_mesh_name", "QGS_backups"):
+        if key in scene:
+            del scene[key]
+    addon.invalidate_separation_cache()
+    addon.qgs_change_index.mark_dirty()
+
+def build_assembly(part_count, verts_per_part):
+    """Create part_count rod-shaped meshes of roughly verts_per_part vertices each."""
+    segments = max(3, int(round(math.sqrt(verts_per_part))))
+    collection = bpy.context.scene.collection
+    parts = []
+    for i in range(part_count):
+        bm = bmesh.new()
+        bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=segments, radius=0.05 + 0.01 * (i % 5))
+        bmesh.ops.scale(bm, vec=(1.0 + (i % 3), 1.0, 1.0), verts=bm.verts)
+        mesh = bpy.data.meshes.new(f"Part_{i:03d}")
+        bm.to_mesh(mesh)
+        bm.free()
+        mesh.uv_layers.new(name="UVMap")
+        obj = bpy.data.objects.new(f"Part_{i:03d}", mesh)
+        obj.location = (0.2 * i, 0.1 * (i % 4), 0.05 * (i % 7))
+        collection.objects.link(obj)
+        parts.append(obj)
+    return parts
+
+def select_only(objects, active):
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    view_layer.objects.active = active
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def draw_panel(addon):
+    panel = types.SimpleNamespace(layout=_LayoutRecorder())
+    addon.ArmatureToolsPanel.draw(panel, bpy.context)
+
+def run_pipeline(addon, args):
+    """One full Create Armature -> Join -> Separate -> Delete All cycle. Returns seconds per entry point."""
+    timings = {}
+    reset_scene(addon)
+    parts = build_assembly(args.parts, args.verts)
+
+    select_only(parts, parts[0])
+    timings["armature_and_vertex_groups"] = timed(
+        lambda: bpy.ops.object.armature_and_vertex_groups(armature_name="Bench")
+    )
+
+    select_only(parts, parts[0])
+    bpy.context.scene.join_objects_name = "BenchJoined"
+    timings["join_objects"] = timed(lambda: bpy.ops.object.join_objects())
+    joined = bpy.data.objects["BenchJoined"]
+    joined_counts = (len(joined.data.vertices), len(joined.vertex_groups))
+
+    addon.invalidate_separation_cache()
+    addon.qgs_change_index.mark_dirty()
+    timings["panel_draw_cold"] = timed(lambda: draw_panel(addon))
+    warm = [timed(lambda: draw_panel(addon)) for _ in range(args.draw_repeat)]
+    timings["panel_draw_warm"] = statistics.median(warm)
+
+    timings["separate_vertex_groups"] = timed(lambda: bpy.ops.object.separate_vertex_groups())
+    timings["unlink_addon"] = timed(lambda: bpy.ops.object.unlink_addon())
+
+    timings["join_bpy_ops"], *operator_counts = run_join_comparison(addon, args)
+    if tuple(operator_counts) != joined_counts:
+        print(f"WARNING: join_objects produced {joined_counts} (vertices, groups), "
+              f"bpy.ops.object.join {tuple(operator_counts)}", file=sys.stderr)
+    return timings
+
+def build_bone_chain(bone_count):
+    """An armature of bone_count loose bones with a posed, transformed target bone. Returns (object, target name)."""
+    arm = bpy.data.armatures.new("ChildOfBench")
+    obj = bpy.data.objects.new("ChildOfBench", arm)
+    obj.location = (0.5, -0.25, 1.0)
+    obj.rotation_euler = (0.3, 0.0, 0.7)
+    obj.scale = (1.5, 1.5, 1.5)
+    bpy.context.scene.collection.objects.link(obj)
+    select_only([obj], obj)
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(bone_count):
+        bone = arm.edit_bones.new(f"Bone_{i:04d}")
+        bone.head = (0.05 * i, 0.02 * (i % 7), 0.0)
+        bone.tail = (0.05 * i, 0.02 * (i % 7), 0.1)
+    target_name = arm.edit_bones[0].name
+    bpy.ops.object.mode_set(mode='POSE')
+    target = obj.pose.bones[target_name]
+    target.location = (0.1, 0.2, -0.3)
+    target.rotation_quaternion = (0.9, 0.1, 0.3, 0.2)
+    target.scale = (1.0, 2.0, 1.0)
+    bpy.context.view_layer.update()
+    for bone in arm.bones:
+        bone.select = True
+    arm.bones.active = arm.bones[target_name]
+    return obj, target_name
+
+def remove_child_of_constraints(obj):
+    for pbone in obj.pose.bones:
+        for con in [con for con in pbone.constraints if con.type == 'CHILD_OF']:
+            pbone.constraints.remove(con)
+
+def operator_set_inverse(obj, target_name):
+    """The per-bone childof_set_inverse loop the add-on used before."""
+    for pbone in obj.pose.bones:
+        if pbone.name == target_name:
+            continue
+        constraint = pbone.constraints.new('CHILD_OF')
+        constraint.name = "QGS_ChildOf"
+        constraint.target = obj
+        constraint.subtarget = target_name
+        obj.data.bones.active = obj.data.bones[pbone.name]
+        bpy.ops.constraint.childof_set_inverse(constraint=constraint.name, owner='BONE')
+    obj.data.bones.active = obj.data.bones[target_name]
+
+def inverse_matrices(obj):
+    return {
+        pbone.name: [value for row in con.inverse_matrix for value in row]
+        for pbone in obj.pose.bones for con in pbone.constraints if con.type == 'CHILD_OF'
+    }
+
+def run_child_of_scaling(addon, bone_counts):
+    """Time batch Set Inverse against the per-bone operator for each armature size."""
+    scaling = {}
+    bpy.context.scene.set_inverse_child_of = True
+    for bone_count in bone_counts:
+        reset_scene(addon)
+        obj, target_name = build_bone_chain(bone_count)
+        operator_seconds = timed(lambda: operator_set_inverse(obj, target_name))
+        expected = inverse_matrices(obj)
+        remove_child_of_constraints(obj)
+        batch_seconds = timed(lambda: bpy.ops.armature.add_child_of_constraint())
+        actual = inverse_matrices(obj)
+        max_error = max(
+            (abs(a - b) for name, values in expected.items() for a, b in zip(values, actual.get(name, []))),
+            default=0.0,
+        )
+        bpy.ops.object.mode_set(mode='OBJECT')
+        scaling[str(bone_count)] = {
+            "batch": batch_seconds,
+            "operator": operator_seconds,
+            "speedup": operator_seconds / batch_seconds if batch_seconds else None,
+            "max_abs_error": max_error,
+            "constraints_compared": len(expected),
+        }
+    return scaling
+
+def keyframe_insert_bake(obj, owners, frame_count):
+    """The per-frame, per-channel keying loop a bake does without bulk F-curve writes."""
+    scene = bpy.context.scene
+    for frame in range(1, frame_count + 1):
+        scene.frame_set(frame)
+        for pbone in owners:
+            for prop in ("location", "rotation_quaternion", "scale"):
+                pbone.keyframe_insert(prop, frame=frame)
+    scene.frame_set(1)
+
+def run_bake_comparison(addon, bone_count, frame_count):
+    """Time the Child Of bake against keyframe_insert on an armature with an animated target."""
+    reset_scene(addon)
+    bpy.context.scene.set_inverse_child_of = True
+    obj, target_name = build_bone_chain(bone_count)
+    bpy.ops.armature.add_child_of_constraint()
+    target = obj.pose.bones[target_name]
+    for frame, height in ((1, 0.0), (frame_count, 1.0)):
+        target.location = (0.1, 0.2, height)
+        target.keyframe_insert("location", frame=frame)
+    owners = [pbone for pbone in obj.pose.bones if pbone.name != target_name]
+    operator_seconds = timed(lambda: keyframe_insert_bake(obj, owners, frame_count))
+    action = obj.animation_data.action
+    for fcurve in [fc for fc in action.fcurves if fc.group is None or fc.group.name != target_name]:
+        action.fcurves.remove(fcurve)
+    bake_seconds = timed(lambda: bpy.ops.armature.bake_child_of_constraints(frame_start=1, frame_end=frame_count))
+    keyed = sum(len(fc.keyframe_points) for fc in action.fcurves if fc.group is None or fc.group.name != target_name)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return {
+        "bake": bake_seconds,
+        "keyframe_insert": operator_seconds,
+        "speedup": operator_seconds / bake_seconds if bake_seconds else None,
+        "keys_written": keyed,
+    }
+
+def per_vertex_groups(meshes):
+    """The vertex group loop create_vertex_groups_from_selection replaced."""
+    for mesh in meshes:
+        bpy.context.view_layer.objects.active = mesh
+        bpy.ops.object.mode_set(mode='OBJECT')
+        group = mesh.vertex_groups.new(name="QGS_" + mesh.name)
+        group.add([v.index for v in mesh.data.vertices], 1.0, 'REPLACE')
+
+def run_vertex_group_comparison(addon, total_verts, part_count):
+    """Time bulk vertex group creation against the per-vertex list loop on the same meshes."""
+    reset_scene(addon)
+    parts = build_assembly(part_count, max(1, total_verts // part_count))
+    select_only(parts, parts[0])
+    vertices = sum(len(obj.data.vertices) for obj in parts)
+    list_seconds = timed(lambda: per_vertex_groups(parts))
+    for obj in parts:
+        obj.vertex_groups.clear()
+    bulk_seconds = timed(lambda: addon.create_vertex_groups_from_selection(parts))
+    return {
+        "bulk": bulk_seconds,
+        "per_vertex_list": list_seconds,
+        "speedup": list_seconds / bulk_seconds if bulk_seconds else None,
+        "vertices": vertices,
+        "parts": part_count,
+    }
+
+def run_join_comparison(addon, args):
+    """Time bpy.ops.object.join on the same input the pipeline's join_objects step sees."""
+    reset_scene(addon)
+    parts = build_assembly(args.parts, args.verts)
+    select_only(parts, parts[0])
+    bpy.ops.object.armature_and_vertex_groups(armature_name="Bench")
+    meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+    select_only(meshes, meshes[0])
+    seconds = timed(lambda: bpy.ops.object.join())
+    joined = bpy.context.view_layer.objects.active
+    return seconds, len(joined.data.vertices), len(joined.vertex_groups)
+
+def read_stage_timings(path):
+    """Last recorded stage breakdown per operator from a timing JSONL file."""
+    stages = {}
+    if not os.path.exists(path):
+        return stages
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                stages[record["operator"]] = record["stages"]
+    return stages
+
+def compare(results, baseline, threshold, min_delta):
+    comparison = {}
+    regressions = []
+    for name, entry in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median"):
+            continue
+        ratio = entry["median"] / base["median"]
+        comparison[name] = {"baseline_median": base["median"], "ratio": ratio}
+        if ratio > threshold and entry["median"] - base["median"] > min_delta:
+            regressions.append(name)
+    return comparison, regressions
+
+def main():
+    args = parse_args()
+    addon = load_addon()
+
+    fd, timing_log = tempfile.mkstemp(prefix="qgs_bench_", suffix=".jsonl")
+    os.close(fd)
+    os.environ["QGS_TIMING_LOG"] = timing_log
+    backup_dir = tempfile.TemporaryDirectory(prefix="qgs_bench_backups_")
+    os.environ["QGS_BACKUP_DIR"] = backup_dir.name
+    try:
+        runs = [run_pipeline(addon, args) for _ in range(args.repeat)]
+        stages = read_stage_timings(timing_log)
+        bone_counts = [int(count) for count in args.child_of_bones.split(",") if count.strip()]
+        child_of_scaling = run_child_of_scaling(addon, bone_counts)
+        child_of_bake = run_bake_comparison(addon, args.bake_bones, args.bake_frames)
+        vertex_groups = run_vertex_group_comparison(addon, args.vgroup_verts, args.vgroup_parts)
+    finally:
+        os.environ.pop("QGS_TIMING_LOG", None)
+        os.remove(timing_log)
+        os.environ.pop("QGS_BACKUP_DIR", None)
+        backup_dir.cleanup()
+        reset_scene(addon)
+
+    results = {}
+    for name in runs[0]:
+        samples = [run[name] for run in runs]
+        results[name] = {"min": min(samples), "median": statistics.median(samples), "runs": samples}
+    for bone_count, entry in child_of_scaling.items():
+        results[f"child_of_set_inverse_{bone_count}"] = {"min": entry["batch"], "median": entry["batch"], "runs": [entry["batch"]]}
+    results["child_of_bake"] = {"min": child_of_bake["bake"], "median": child_of_bake["bake"], "runs": [child_of_bake["bake"]]}
+    results["vertex_groups_bulk"] = {"min": vertex_groups["bulk"], "median": vertex_groups["bulk"], "runs": [vertex_groups["bulk"]]}
+
+    report = {
+        "blender": bpy.app.version_string,
+        "addon_version": list(addon.bl_info["version"]),
+        "timestamp": time.time(),
+        "config": {"parts": args.parts, "verts_per_part": args.verts, "repeat": args.repeat,
+                   "child_of_bones": bone_counts, "bake_bones": args.bake_bones, "bake_frames": args.bake_frames,
+                   "vgroup_verts": args.vgroup_verts, "vgroup_parts": args.vgroup_parts},
+        "results": results,
+        "stages": stages,
+        "child_of_scaling": child_of_scaling,
+        "child_of_bake": child_of_bake,
+        "vertex_groups": vertex_groups,
+    }
+
+    regressions = []
+    if args.baseline and not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print(f"WARNING: baseline config {baseline.get('config')} differs from {report['config']}", file=sys.stderr)
+        report["comparison"], regressions = compare(results, baseline, args.threshold, args.min_delta)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.update_baseline and args.baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if regressions:
+        print(f"Regressions against baseline: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
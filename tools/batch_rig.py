@@ -0,0 +1,335 @@
+"""Rig whole directories of weapon files with Quick Gun Setup in background Blender processes.
+
+Run from a shell (plain Python, no Blender needed for the coordinator):
+
+    python tools/batch_rig.py assets/weapons --output rigged --jobs 16 --timeout 300
+
+Every .blend, .fbx, .glb and .gltf file found under the inputs is opened or imported in
+its own `blender -b` worker, all of its mesh objects go through Create Armature & Vertex
+Groups (origins, bones, vertex groups, armature modifier) and the result is saved as a
+.blend under --output, mirroring the input layout. Imported files keep their extension in
+the output name (gun.fbx -> gun.fbx.blend), so gun.fbx and gun.blend do not collide. With
+--action-variants, recoil, bolt cycle and magazine drop actions are generated for the new
+armature as well. With --export-format, each rigged file's armatures are also exported
+next to it into <name>_export/; its manifest lets reruns skip assets that did not change.
+
+Progress is appended to a JSONL file as each file finishes; running the same command
+again skips files that already succeeded and have not changed since. A JSON summary
+report is written at the end.
+"""
+
+import argparse
+import concurrent.futures
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_MODULE = "quick_gun_setup"
+INPUT_EXTENSIONS = (".blend", ".fbx", ".glb", ".gltf")
+RESULT_MARKER = "QGS_BATCH_RESULT "
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(prog="batch_rig.py", description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="*", help="Files or directories to rig")
+    parser.add_argument("--output", default="rigged", help="Directory for the rigged .blend files")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Blender processes run at once")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Threads per Blender process (default: cores divided by --jobs)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds before a file's worker is killed")
+    parser.add_argument("--progress", default="", help="Progress file (default: <output>/progress.jsonl)")
+    parser.add_argument("--report", default="", help="Summary report (default: <output>/report.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore earlier progress and rig every file again")
+    parser.add_argument("--armature-name", default="QGS_Armature", help="Name of the created armature")
+    parser.add_argument("--bone-length", type=float, default=0.1, help="Length of the created bones")
+    parser.add_argument("--bone-placement", default="ORIGIN", choices=("ORIGIN", "PCA"),
+                        help="Where bones are placed on their part")
+    parser.add_argument("--loose-parts", action="store_true",
+                        help="Rig the connected parts of each mesh instead of one bone per object")
+    parser.add_argument("--split-by-material", action="store_true", help="With --loose-parts, also split by material")
+    parser.add_argument("--split-by-uv-island", action="store_true", help="With --loose-parts, also split by UV island")
+    parser.add_argument("--smooth-weights", action="store_true",
+                        help="Blend weights between bones near part boundaries instead of rigid weights")
+    parser.add_argument("--falloff", type=float, default=0.05, help="With --smooth-weights, the falloff distance")
+    parser.add_argument("--max-influences", type=int, default=4, help="With --smooth-weights, bones per vertex at most")
+    parser.add_argument("--action-variants", type=int, default=0,
+                        help="Generate this many variants of each weapon action (0: none)")
+    parser.add_argument("--action-jitter", type=float, default=0.15, help="Relative parameter jitter between variants")
+    parser.add_argument("--export-format", default="", choices=("", "GLB", "GLTF", "FBX"),
+                        help="Also export the rigged armatures in this format (default: no export)")
+    # Used internally when this script runs inside a Blender worker.
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--input", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--target", default="", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+# ------------------ Worker (inside Blender) ------------------
+
+def load_addon():
+    """Import the add-on from this checkout and register it."""
+    spec = importlib.util.spec_from_file_location(
+        ADDON_MODULE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_MODULE] = module
+    spec.loader.exec_module(module)
+    module.register()
+    return module
+
+def import_source(bpy, path):
+    """Load a non-.blend input into an empty scene (.blend files are opened by Blender itself)."""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".fbx":
+        bpy.ops.import_scene.fbx(filepath=path)
+    elif extension in (".glb", ".gltf"):
+        bpy.ops.import_scene.gltf(filepath=path)
+
+def rig_current_file(bpy, args):
+    """Run the add-on's setup on every mesh object of the open file. Returns a result dict."""
+    view_layer = bpy.context.view_layer
+    meshes = [obj for obj in view_layer.objects if obj.type == 'MESH']
+    if not meshes:
+        return {"status": "skipped", "error": "No mesh objects found."}
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in view_layer.objects:
+        obj.select_set(obj in meshes)
+    view_layer.objects.active = meshes[0]
+    result = bpy.ops.object.armature_and_vertex_groups(
+        armature_name=args.armature_name,
+        bone_length=args.bone_length,
+        bone_placement=args.bone_placement,
+        part_source='LOOSE' if args.loose_parts else 'OBJECTS',
+        split_by_material=args.split_by_material,
+        split_by_uv_island=args.split_by_uv_island,
+        weighting='SMOOTH' if args.smooth_weights else 'RIGID',
+        falloff_distance=args.falloff,
+        max_influences=args.max_influences,
+    )
+    if result != {'FINISHED'}:
+        return {"status": "failed", "error": f"Create Armature & Vertex Groups returned {sorted(result)}."}
+    name = args.armature_name if args.armature_name.startswith("QGS_") else "QGS_" + args.armature_name
+    armature = bpy.data.objects.get(name)
+    actions = 0
+    if armature and args.action_variants > 0:
+        view_layer.objects.active = armature
+        bpy.ops.armature.generate_weapon_actions(variants=args.action_variants, jitter=args.action_jitter)
+        actions = sum(1 for action in bpy.data.actions if action.name.startswith(armature.name + "_"))
+    return {
+        "status": "ok",
+        "parts": len(meshes),
+        "bones": len(armature.data.bones) if armature else 0,
+        "actions": actions,
+    }
+
+def run_worker(args):
+    import bpy
+
+    start = time.perf_counter()
+    try:
+        # Import before registering: resetting to factory settings would drop the add-on again.
+        if not args.input.lower().endswith(".blend"):
+            import_source(bpy, args.input)
+        addon = load_addon()
+        result = rig_current_file(bpy, args)
+        if result["status"] == "ok":
+            os.makedirs(os.path.dirname(args.target), exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=args.target)
+            if args.export_format:
+                # This worker is already one of many, so export in-process (jobs=1).
+                export = addon.export_changed_assets(
+                    bpy.context.scene, os.path.splitext(args.target)[0] + "_export", args.export_format, jobs=1
+                )
+                result["exported"] = export["exported"]
+                if export["failures"]:
+                    result.update(status="failed", error=f"Export failed: {export['failures'][0]['error']}")
+    except Exception as e:
+        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = time.perf_counter() - start
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+# ------------------ Coordinator ------------------
+
+def find_inputs(paths):
+    """Every supported file under paths as (absolute path, path relative to its input root)."""
+    found = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            found.append((path, os.path.basename(path)))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(INPUT_EXTENSIONS):
+                    full = os.path.join(root, name)
+                    found.append((full, os.path.relpath(full, path)))
+    return found
+
+def file_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def read_progress(path):
+    """Last recorded result per input path."""
+    progress = {}
+    if not os.path.exists(path):
+        return progress
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a partial last line.
+                continue
+            progress[record["input"]] = record
+    return progress
+
+def worker_command(args, source, target, threads):
+    command = [args.blender, "-b", "--factory-startup", "--threads", str(threads)]
+    if source.lower().endswith(".blend"):
+        command.append(source)
+    command += [
+        "--python", os.path.abspath(__file__), "--",
+        "--worker", "--input", source, "--target", target,
+        "--armature-name", args.armature_name,
+        "--bone-length", str(args.bone_length),
+        "--bone-placement", args.bone_placement,
+        "--falloff", str(args.falloff),
+        "--max-influences", str(args.max_influences),
+        "--action-variants", str(args.action_variants),
+        "--action-jitter", str(args.action_jitter),
+    ]
+    if args.export_format:
+        command += ["--export-format", args.export_format]
+    command += [flag for flag, enabled in (
+        ("--loose-parts", args.loose_parts),
+        ("--split-by-material", args.split_by_material),
+        ("--split-by-uv-island", args.split_by_uv_island),
+        ("--smooth-weights", args.smooth_weights),
+    ) if enabled]
+    return command
+
+def target_path(args, relative):
+    """Where the rigged .blend for the input at relative is saved."""
+    if not relative.lower().endswith(".blend"):
+        relative += ".blend"
+    return os.path.join(os.path.abspath(args.output), relative)
+
+def rig_file(args, source, relative, threads):
+    """Run one Blender worker for source and return its result record."""
+    target = target_path(args, relative)
+    record = {"input": source, "output": target, "signature": file_signature(source)}
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(
+            worker_command(args, source, target, threads),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace", timeout=args.timeout,
+        )
+    except subprocess.TimeoutExpired:
+        record.update(status="timeout", error=f"Killed after {args.timeout:g} s.")
+    except OSError as e:
+        record.update(status="failed", error=f"Could not start Blender: {e}")
+    else:
+        results = [line[len(RESULT_MARKER):] for line in completed.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+        if results:
+            record.update(json.loads(results[-1]))
+        else:
+            tail = (completed.stderr or completed.stdout).strip().splitlines()[-5:]
+            record.update(status="failed", error=f"Exit code {completed.returncode}: " + " | ".join(tail))
+    record["wall_seconds"] = time.perf_counter() - start
+    record["finished"] = time.time()
+    return record
+
+def summarize(records, elapsed, jobs):
+    statuses = {}
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    worker_seconds = sum(record.get("wall_seconds", 0.0) for record in records)
+    return {
+        "files": len(records),
+        "statuses": statuses,
+        "elapsed_seconds": elapsed,
+        "worker_seconds": worker_seconds,
+        "jobs": jobs,
+        "failures": [
+            {"input": record["input"], "status": record["status"], "error": record.get("error", "")}
+            for record in records if record["status"] not in ("ok", "skipped")
+        ],
+        "slowest": sorted(
+            ({"input": record["input"], "seconds": record.get("wall_seconds", 0.0)} for record in records),
+            key=lambda entry: entry["seconds"], reverse=True,
+        )[:10],
+    }
+
+def run_coordinator(args):
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        print("No .blend/.fbx/.glb/.gltf files found.", file=sys.stderr)
+        return 1
+    # Parallel workers must never share a target file.
+    targets = {}
+    for source, relative in inputs:
+        targets.setdefault(os.path.normcase(target_path(args, relative)), []).append(source)
+    clashes = [sources for sources in targets.values() if len(sources) > 1]
+    if clashes:
+        for sources in clashes:
+            print("Inputs would write the same output: " + ", ".join(sources), file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    progress_path = args.progress or os.path.join(args.output, "progress.jsonl")
+    report_path = args.report or os.path.join(args.output, "report.json")
+
+    progress = {} if args.restart else read_progress(progress_path)
+    records = {}
+    pending = []
+    for source, relative in inputs:
+        previous = progress.get(source)
+        if previous and previous["status"] in ("ok", "skipped") and previous.get("signature") == file_signature(source):
+            records[source] = previous
+        else:
+            pending.append((source, relative))
+    print(f"{len(inputs)} file(s), {len(inputs) - len(pending)} already done, {len(pending)} to rig "
+          f"with {args.jobs} worker(s).", file=sys.stderr)
+
+    jobs = max(1, args.jobs)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // jobs)
+    start = time.perf_counter()
+    # Threads are enough here: each one only waits on its own Blender process.
+    with open(progress_path, "w" if args.restart else "a", encoding="utf-8") as progress_file, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(rig_file, args, source, relative, threads): source for source, relative in pending}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            record = future.result()
+            records[record["input"]] = record
+            progress_file.write(json.dumps(record) + "\n")
+            progress_file.flush()
+            print(f"[{done}/{len(pending)}] {record['status']:>7} {record['wall_seconds']:7.1f}s {record['input']}",
+                  file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    report = summarize([records[source] for source, _ in inputs], elapsed, jobs)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(json.dumps({key: report[key] for key in ("files", "statuses", "elapsed_seconds")}))
+    return 1 if report["failures"] else 0
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        sys.exit(run_coordinator(args))
+
+if __name__ == "__main__":
+    main()
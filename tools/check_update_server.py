@@ -0,0 +1,142 @@
+"""Check the add-on's cached update check against a local HTTP stand-in server.
+
+Run from a shell with:
+
+    blender -b --factory-startup --python tools/check_update_server.py
+
+Serves version.txt from a throwaway http.server on 127.0.0.1 and drives
+fetch_remote_version through a fresh download (200), a reuse of the cached answer within
+its TTL (no request at all), a conditional request after the TTL expired that the server
+answers with 304 Not Modified, and a new version published after that. Every step checks
+the reported source, the version, the number of requests the server saw and the
+If-None-Match / If-Modified-Since headers they carried. Exits with status 1 on the first
+failed check.
+"""
+
+import http.server
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_MODULE = "quick_gun_setup"
+
+def load_addon():
+    """Import the add-on from this checkout; the update check needs no registration."""
+    spec = importlib.util.spec_from_file_location(
+        ADDON_MODULE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_MODULE] = module
+    spec.loader.exec_module(module)
+    return module
+
+class VersionServer(http.server.ThreadingHTTPServer):
+    """Serves one version.txt with an ETag and Last-Modified, and records every request."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), VersionHandler)
+        self.publish("0.9.0", '"v1"', "Mon, 05 Oct 2026 10:00:00 GMT")
+        self.requests = []
+
+    def publish(self, version, etag, last_modified):
+        self.version = version
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/version.txt"
+
+class VersionHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append({
+            "path": self.path,
+            "if_none_match": self.headers.get("If-None-Match"),
+            "if_modified_since": self.headers.get("If-Modified-Since"),
+        })
+        if self.path != "/version.txt":
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+        body = server.version.encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def check(label, condition, details=""):
+    print(f"{'PASS' if condition else 'FAIL'} {label}" + (f": {details}" if details and not condition else ""))
+    if not condition:
+        raise SystemExit(1)
+
+def expire(cache_path, ttl):
+    """Age the cached answer so that it is just past its TTL."""
+    with open(cache_path, encoding="utf-8") as f:
+        cache = json.load(f)
+    cache["checked_at"] -= ttl + 1.0
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+def run_checks(addon, server, cache_path):
+    fetch = addon.fetch_remote_version
+    ttl = addon.UPDATE_CHECK_TTL
+
+    version, source = fetch(server.url, cache_path, timeout=5.0)
+    check("first check downloads the version (200)", (version, source) == ("0.9.0", 'network'), (version, source))
+    check("first check is unconditional", len(server.requests) == 1 and server.requests[0]["if_none_match"] is None,
+          server.requests)
+
+    version, source = fetch(server.url, cache_path, timeout=5.0)
+    check("check within the TTL reuses the cache", (version, source) == ("0.9.0", 'cache'), (version, source))
+    check("check within the TTL sends no request", len(server.requests) == 1, server.requests)
+
+    expire(cache_path, ttl)
+    version, source = fetch(server.url, cache_path, timeout=5.0)
+    check("check after the TTL is answered with 304", (version, source) == ("0.9.0", 'not-modified'),
+          (version, source))
+    last = server.requests[-1]
+    check("check after the TTL is conditional",
+          len(server.requests) == 2 and last["if_none_match"] == '"v1"'
+          and last["if_modified_since"] == "Mon, 05 Oct 2026 10:00:00 GMT", server.requests)
+
+    version, source = fetch(server.url, cache_path, timeout=5.0)
+    check("a 304 renews the TTL", source == 'cache' and len(server.requests) == 2, (source, server.requests))
+
+    server.publish("0.9.1", '"v2"', "Tue, 06 Oct 2026 10:00:00 GMT")
+    expire(cache_path, ttl)
+    version, source = fetch(server.url, cache_path, timeout=5.0)
+    check("a new version after the TTL is downloaded (200)", (version, source) == ("0.9.1", 'network'),
+          (version, source))
+    with open(cache_path, encoding="utf-8") as f:
+        cache = json.load(f)
+    check("the cache stores the new validators", (cache["etag"], cache["version"]) == ('"v2"', "0.9.1"), cache)
+
+def main():
+    addon = load_addon()
+    server = VersionServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="qgs_update_check_") as cache_dir:
+            run_checks(addon, server, os.path.join(cache_dir, "update_cache.json"))
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("All update check cases passed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Write the SHA-256 checksum file that Update Now verifies downloads against.
+
+Run after every change to __init__.py, before pushing a release:
+
+    python tools/publish_checksum.py
+
+The updater downloads <filename>.sha256 next to the add-on and refuses to install when it
+is missing or does not match. With --check, nothing is written and the exit code is 1 if
+the committed checksum is stale (for use in CI or a pre-push hook).
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKSUM_SUFFIX = ".sha256"
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(prog="publish_checksum.py", description=__doc__.split("\n\n")[0])
+    parser.add_argument("filename", nargs="?", default="__init__.py", help="File served by the updater")
+    parser.add_argument("--check", action="store_true", help="Only verify the existing checksum file")
+    args = parser.parse_args()
+
+    path = os.path.join(ADDON_DIR, args.filename)
+    checksum_path = path + CHECKSUM_SUFFIX
+    # Same layout as sha256sum, so `sha256sum -c` works too; the updater reads the first field.
+    line = f"{file_sha256(path)}  {args.filename}\n"
+    if args.check:
+        try:
+            with open(checksum_path, "r", encoding="utf-8") as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = ""
+        if current != line:
+            print(f"{os.path.basename(checksum_path)} is stale; run tools/publish_checksum.py", file=sys.stderr)
+            return 1
+        return 0
+    with open(checksum_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(line)
+    print(line, end="")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())